@@ -0,0 +1,190 @@
+import argparse
+import json
+import math
+import os
+import time
+import tracemalloc
+
+from evdev import ecodes
+
+import core.processor
+import core.virtual_gamepad
+from core.processor import InputProcessor
+from core.recording import SessionRecording
+from core.virtual_gamepad import VirtualGamepad
+from benchmarks.fakes import BenchMapper, FakeInputDevice, NullUInput, event
+
+
+# Usage (from the repository root):
+#   python -m benchmarks.bench_processor
+#   python -m benchmarks.bench_processor --scenario stick_sweep --frames 200000
+#   python -m benchmarks.bench_processor --recording session.ljgmrec
+
+
+FRAME_INTERVAL = 0.001  # 1 kHz reports
+
+
+def stick_sweep(frames, axis_max):
+    center = axis_max / 2.0
+    events = []
+    t = 1_000_000.0
+    for i in range(frames):
+        angle = i * 2 * math.pi / 500
+        events.append(event(t, ecodes.EV_ABS, ecodes.ABS_X, int(center + center * math.sin(angle))))
+        events.append(event(t, ecodes.EV_ABS, ecodes.ABS_Y, int(center + center * math.cos(angle))))
+        events.append(event(t, ecodes.EV_SYN, ecodes.SYN_REPORT, 0))
+        t += FRAME_INTERVAL
+    return events
+
+
+def button_mash(frames, axis_max):
+    events = []
+    t = 1_000_000.0
+    for i in range(frames):
+        code = 288 + (i // 2) % 12
+        events.append(event(t, ecodes.EV_KEY, code, 1 - i % 2))
+        events.append(event(t, ecodes.EV_SYN, ecodes.SYN_REPORT, 0))
+        t += FRAME_INTERVAL
+    return events
+
+
+def hat_storm(frames, axis_max):
+    cycle = (-1, 0, 1, 0)
+    events = []
+    t = 1_000_000.0
+    for i in range(frames):
+        events.append(event(t, ecodes.EV_ABS, ecodes.ABS_HAT0X, cycle[i % 4]))
+        events.append(event(t, ecodes.EV_ABS, ecodes.ABS_HAT0Y, cycle[(i + 1) % 4]))
+        events.append(event(t, ecodes.EV_SYN, ecodes.SYN_REPORT, 0))
+        t += FRAME_INTERVAL
+    return events
+
+
+SCENARIOS = {
+    # name: (generator, mouse mode)
+    "stick_sweep": (stick_sweep, False),
+    "button_mash": (button_mash, False),
+    "hat_storm": (hat_storm, False),
+    "mouse_mode": (stick_sweep, True),
+}
+
+
+def build_processor(mouse_mode, axis_max, latency, absinfo=None):
+    core.virtual_gamepad.UInput = NullUInput
+    core.processor.UInput = NullUInput
+
+    device = FakeInputDevice(axis_max=axis_max, absinfo=absinfo)
+    processor = InputProcessor(device, VirtualGamepad(), mapper=BenchMapper())
+    processor.build_axis_tables()
+    processor.set_mouse_mode(mouse_mode)
+    processor.enable_latency_stats(latency)
+    processor.set_batched_output(True)
+    processor.running = True
+    return processor, device
+
+
+def drive(processor, device, chunks):
+    # Same read path as the live loop: drain the device, then run timers.
+    for chunk in chunks:
+        device.feed(chunk)
+        processor.process_pending()
+        processor.on_timer()
+
+
+def run_scenario(name, events, axis_max=255, latency=False, repeat=3,
+                 absinfo=None, mouse_mode=None):
+    if mouse_mode is None:
+        _, mouse_mode = SCENARIOS.get(name, (None, False))
+    chunks = [
+        events[i:i + FakeInputDevice.READ_CHUNK]
+        for i in range(0, len(events), FakeInputDevice.READ_CHUNK)
+    ]
+
+    processor, device = build_processor(mouse_mode, axis_max, latency, absinfo)
+    drive(processor, device, chunks)  # warm-up
+
+    best_wall = best_cpu = None
+    for _ in range(repeat):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        drive(processor, device, chunks)
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+        best_cpu = cpu if best_cpu is None else min(best_cpu, cpu)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    drive(processor, device, chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+    processor.cleanup()
+
+    count = len(events)
+    return {
+        "scenario": name,
+        "events": count,
+        "events_per_sec": round(count / best_wall) if best_wall else 0,
+        "cpu_us_per_event": round(best_cpu * 1e6 / count, 3) if count else 0.0,
+        "alloc_peak_kib": round(peak / 1024, 1),
+        "retained_blocks": retained,
+    }
+
+
+def print_table(results):
+    header = f"{'scenario':<14}{'events':>10}{'events/s':>14}{'cpu us/ev':>12}{'peak KiB':>11}{'retained':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<14}{r['events']:>10}{r['events_per_sec']:>14}"
+            f"{r['cpu_us_per_event']:>12.3f}{r['alloc_peak_kib']:>11.1f}{r['retained_blocks']:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LJGM processing pipeline benchmark")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    parser.add_argument("--frames", type=int, default=50000)
+    parser.add_argument("--axis-max", type=int, default=255)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", action="store_true", help="enable latency instrumentation")
+    parser.add_argument("--recording", action="append", help="replay a recorded session (.ljgmrec)")
+    parser.add_argument("--mouse", action="store_true", help="run recordings in mouse mode")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = []
+    for path in args.recording or []:
+        recording = SessionRecording.load(path)
+        results.append(
+            run_scenario(
+                os.path.basename(path),
+                recording.events,
+                latency=args.latency,
+                repeat=args.repeat,
+                absinfo=recording.absinfo,
+                mouse_mode=args.mouse,
+            )
+        )
+
+    scenarios = args.scenario or ([] if args.recording else list(SCENARIOS))
+    for name in scenarios:
+        generator, _ = SCENARIOS[name]
+        events = generator(args.frames, args.axis_max)
+        results.append(
+            run_scenario(name, events, args.axis_max, args.latency, args.repeat)
+        )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
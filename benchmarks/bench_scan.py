@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from evdev import ecodes
+
+from core.device_detector import DeviceDetector, _WORD_BITS
+
+
+# Usage (from the repository root):
+#   python -m benchmarks.bench_scan
+#   python -m benchmarks.bench_scan --nodes 1000 --gamepads 4
+#   python -m benchmarks.bench_scan --live     # also time this machine's nodes
+
+
+def bitmap(codes):
+    # Inverse of device_detector.parse_bitmap: kernel-style hex words.
+    if not codes:
+        return "0"
+    words = [0] * (max(codes) // _WORD_BITS + 1)
+    for code in codes:
+        words[code // _WORD_BITS] |= 1 << (code % _WORD_BITS)
+    return " ".join(format(word, "x") for word in reversed(words))
+
+
+KEYBOARD = {
+    "ev": {ecodes.EV_SYN, ecodes.EV_KEY, ecodes.EV_MSC, ecodes.EV_LED},
+    "key": set(range(1, 120)),
+    "abs": set(),
+}
+MOUSE = {
+    "ev": {ecodes.EV_SYN, ecodes.EV_KEY, ecodes.EV_REL},
+    "key": set(range(ecodes.BTN_LEFT, ecodes.BTN_LEFT + 8)),
+    "abs": set(),
+}
+GAMEPAD = {
+    "ev": {ecodes.EV_SYN, ecodes.EV_KEY, ecodes.EV_ABS, ecodes.EV_FF},
+    "key": set(range(0x130, 0x13f)),
+    "abs": {ecodes.ABS_X, ecodes.ABS_Y, ecodes.ABS_RX, ecodes.ABS_RY,
+            ecodes.ABS_HAT0X, ecodes.ABS_HAT0Y},
+}
+
+
+def write_node(root, dev_dir, index, kind, name):
+    base = os.path.join(root, f"event{index}", "device")
+    os.makedirs(os.path.join(base, "capabilities"))
+    os.makedirs(os.path.join(base, "id"))
+    for attr, codes in kind.items():
+        with open(os.path.join(base, "capabilities", attr), "w") as f:
+            f.write(bitmap(codes) + "\n")
+    ids = {"bustype": 3, "vendor": 0x045e, "product": 0x0b12 + index, "version": 0x0110}
+    for field, value in ids.items():
+        with open(os.path.join(base, "id", field), "w") as f:
+            f.write(format(value, "04x") + "\n")
+    for attr, value in (("name", name), ("phys", f"usb-bench/input{index}"), ("uniq", "")):
+        with open(os.path.join(base, attr), "w") as f:
+            f.write(value + "\n")
+    open(os.path.join(dev_dir, f"event{index}"), "w").close()
+
+
+def build_tree(nodes, gamepads):
+    root = tempfile.mkdtemp(prefix="ljgm-scan-")
+    sysfs = os.path.join(root, "sys")
+    dev_dir = os.path.join(root, "dev")
+    os.makedirs(sysfs)
+    os.makedirs(dev_dir)
+    step = max(1, nodes // max(1, gamepads))
+    for i in range(nodes):
+        if gamepads and i % step == step - 1 and i // step < gamepads:
+            write_node(sysfs, dev_dir, i, GAMEPAD, f"Bench Pad {i}")
+        elif i % 2:
+            write_node(sysfs, dev_dir, i, MOUSE, f"Bench Mouse {i}")
+        else:
+            write_node(sysfs, dev_dir, i, KEYBOARD, f"Bench Keyboard {i}")
+    return root, sysfs, dev_dir
+
+
+def time_scan(detector, repeat):
+    best = None
+    records = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = detector.scan()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, records
+
+
+def result(name, elapsed, records):
+    count = len(records)
+    return {
+        "scan": name,
+        "nodes": count,
+        "gamepads": sum(1 for r in records if r.score > 0),
+        "total_ms": round(elapsed * 1e3, 3),
+        "us_per_node": round(elapsed * 1e6 / count, 1) if count else 0.0,
+        "open_fds": open_fd_count(),
+    }
+
+
+def open_fd_count():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+def print_table(results):
+    header = f"{'scan':<14}{'nodes':>8}{'gamepads':>10}{'total ms':>11}{'us/node':>10}{'fds':>6}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scan']:<14}{r['nodes']:>8}{r['gamepads']:>10}"
+            f"{r['total_ms']:>11.3f}{r['us_per_node']:>10.1f}{r['open_fds']:>6}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LJGM controller scan benchmark")
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--gamepads", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--live", action="store_true",
+                        help="also scan this machine (sysfs vs opening every node)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = []
+    root, sysfs, dev_dir = build_tree(args.nodes, args.gamepads)
+    try:
+        detector = DeviceDetector(sysfs_root=sysfs, input_dir=dev_dir)
+        elapsed, records = time_scan(detector, args.repeat)
+        results.append(result("sysfs-fake", elapsed, records))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.live:
+        detector = DeviceDetector()
+        if detector.sysfs_available():
+            elapsed, records = time_scan(detector, args.repeat)
+            results.append(result("sysfs-live", elapsed, records))
+        # Old behaviour: open and query every readable node.
+        detector = DeviceDetector(sysfs_root=os.devnull + ".missing")
+        elapsed, records = time_scan(detector, args.repeat)
+        results.append(result("open-live", elapsed, records))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
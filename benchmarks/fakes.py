@@ -0,0 +1,126 @@
+import os
+
+from evdev import AbsInfo, InputEvent, ecodes
+
+from core.mapper import Mapper
+
+
+BENCH_PROFILE = {
+    "analog": {
+        "buttons": {
+            "288": "BTN_Y",
+            "289": "BTN_B",
+            "290": "BTN_A",
+            "291": "BTN_X",
+            "292": "BTN_TL",
+            "293": "BTN_TR",
+            "294": "BTN_TL2",
+            "295": "BTN_TR2",
+            "296": "BTN_SELECT",
+            "297": "BTN_START",
+            "298": "BTN_THUMBL",
+            "299": "BTN_THUMBR",
+            "17:-1": "BTN_DPAD_UP",
+            "17:1": "BTN_DPAD_DOWN",
+            "16:-1": "BTN_DPAD_LEFT",
+            "16:1": "BTN_DPAD_RIGHT",
+        }
+    },
+    "digital": {"buttons": {}},
+}
+
+
+class BenchMapper(Mapper):
+
+    # Fixed in-memory profile: never touches config/profile.json.
+
+    def load(self):
+        self._compiled = {}
+        self.data = {
+            mode: {"buttons": dict(section["buttons"])}
+            for mode, section in BENCH_PROFILE.items()
+        }
+
+    def save(self):
+        pass
+
+
+class NullUInput:
+
+    # Drop-in for evdev.UInput that counts writes instead of hitting
+    # /dev/uinput.
+
+    def __init__(self, events=None, name="py-evdev-uinput", **kwargs):
+        self.name = name
+        self.writes = 0
+        self.syns = 0
+
+    def write(self, event_type, code, value):
+        self.writes += 1
+
+    def syn(self):
+        self.syns += 1
+
+    def close(self):
+        pass
+
+
+class FakeInputDevice:
+
+    # In-memory stand-in for evdev.InputDevice. read() hands out at most
+    # 64 events per call, like the kernel, then raises BlockingIOError.
+
+    READ_CHUNK = 64
+
+    def __init__(self, axis_max=255, name="LJGM Bench Pad", absinfo=None):
+        self.name = name
+        self.path = "/dev/input/bench"
+        self.phys = "bench/input0"
+        self.uniq = ""
+        self.fd = os.open(os.devnull, os.O_RDONLY)
+        self.events = []
+        self.position = 0
+        self.absinfo = {
+            ecodes.ABS_X: AbsInfo(axis_max // 2, 0, axis_max, 0, 0, 0),
+            ecodes.ABS_Y: AbsInfo(axis_max // 2, 0, axis_max, 0, 0, 0),
+            ecodes.ABS_Z: AbsInfo(axis_max // 2, 0, axis_max, 0, 0, 0),
+            ecodes.ABS_RZ: AbsInfo(axis_max // 2, 0, axis_max, 0, 0, 0),
+            ecodes.ABS_HAT0X: AbsInfo(0, -1, 1, 0, 0, 0),
+            ecodes.ABS_HAT0Y: AbsInfo(0, -1, 1, 0, 0, 0),
+        }
+        if absinfo is not None:
+            self.absinfo = dict(absinfo)
+
+    def capabilities(self, verbose=False, absinfo=True):
+        return {
+            ecodes.EV_KEY: list(range(288, 300)),
+            ecodes.EV_ABS: list(self.absinfo.items()),
+        }
+
+    def feed(self, events):
+        self.events = events
+        self.position = 0
+
+    def read(self):
+        start = self.position
+        if start >= len(self.events):
+            raise BlockingIOError()
+        end = min(start + self.READ_CHUNK, len(self.events))
+        self.position = end
+        return iter(self.events[start:end])
+
+    def grab(self):
+        pass
+
+    def ungrab(self):
+        pass
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def event(timestamp, event_type, code, value):
+    sec = int(timestamp)
+    return InputEvent(sec, int((timestamp - sec) * 1e6), event_type, code, value)
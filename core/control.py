@@ -0,0 +1,234 @@
+import errno
+import json
+import os
+import select
+import socket
+import threading
+import time
+
+
+# Local control protocol: one JSON object per line in each direction.
+#   -> {"cmd": "status"}
+#   <- {"ok": true, ...}   or   {"ok": false, "error": "..."}
+
+
+def default_socket_path(name="ljgm"):
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(runtime, f"{name}-{os.getpid()}.sock")
+
+
+class _Connection:
+
+    __slots__ = ("sock", "inbox", "outbox")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+
+
+class ControlServer:
+
+    # Serves the control socket from the ControllerService event loop, so
+    # commands run on the loop thread between input events and never touch
+    # processors from another thread. Sockets are non-blocking; a client
+    # that stops reading is dropped instead of stalling input.
+
+    MAX_LINE = 64 * 1024
+    MAX_OUTBOX = 256 * 1024
+
+    def __init__(self, path, handlers):
+        self.path = path
+        # cmd -> callable(request dict) -> reply dict
+        self.handlers = handlers
+        self.service = None
+        self.connections = {}
+
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        old_umask = os.umask(0o177)
+        try:
+            self.sock.bind(path)
+        finally:
+            os.umask(old_umask)
+        self.sock.listen(4)
+
+    def attach(self, service):
+        self.service = service
+        service.add_handler(self.sock.fileno(), self._on_accept)
+
+    def _on_accept(self, mask):
+        while True:
+            try:
+                sock, _ = self.sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"[!] Control socket: {e}")
+                return
+            sock.setblocking(False)
+            connection = _Connection(sock)
+            fd = sock.fileno()
+            self.connections[fd] = connection
+            self.service.add_handler(
+                fd, lambda mask, fd=fd: self._on_client(fd, mask)
+            )
+
+    def _on_client(self, fd, mask):
+        connection = self.connections.get(fd)
+        if connection is None:
+            return
+        if mask & select.EPOLLIN and not self._receive(connection):
+            self._drop(fd)
+            return
+        if mask & (select.EPOLLERR | select.EPOLLHUP) and not mask & select.EPOLLIN:
+            self._drop(fd)
+            return
+        if not self._send(connection):
+            self._drop(fd)
+
+    def _receive(self, connection):
+        while True:
+            try:
+                data = connection.sock.recv(4096)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                return False
+            if not data:
+                return False
+            connection.inbox += data
+
+        while True:
+            end = connection.inbox.find(b"\n")
+            if end < 0:
+                return len(connection.inbox) <= self.MAX_LINE
+            line = bytes(connection.inbox[:end])
+            del connection.inbox[:end + 1]
+            if line.strip():
+                reply = self.dispatch(line)
+                connection.outbox += json.dumps(reply).encode() + b"\n"
+                if len(connection.outbox) > self.MAX_OUTBOX:
+                    return False
+
+    def dispatch(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            handler = self.handlers.get(request.get("cmd"))
+            if handler is None:
+                raise ValueError(f"unknown command: {request.get('cmd')!r}")
+            reply = handler(request) or {}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        reply["ok"] = True
+        return reply
+
+    def _send(self, connection):
+        while connection.outbox:
+            try:
+                sent = connection.sock.send(connection.outbox)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                return False
+            del connection.outbox[:sent]
+        events = select.EPOLLIN
+        if connection.outbox:
+            events |= select.EPOLLOUT
+        self.service.modify_handler(connection.sock.fileno(), events)
+        return True
+
+    def _drop(self, fd):
+        connection = self.connections.pop(fd, None)
+        if connection is None:
+            return
+        self.service.remove_handler(fd)
+        try:
+            connection.sock.close()
+        except OSError:
+            pass
+
+    def close(self):
+        for fd in list(self.connections):
+            self._drop(fd)
+        if self.service:
+            self.service.remove_handler(self.sock.fileno())
+        self.sock.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class ControlClient:
+
+    # Blocking client for the control socket; safe to share between threads.
+
+    def __init__(self, path, timeout=2.0):
+        self.path = path
+        self.timeout = timeout
+        self.sock = None
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+
+    def connect(self, wait=0.0, alive=None):
+        # Retries for up to `wait` seconds while the server starts; alive()
+        # returning False (e.g. the server process exited) gives up early.
+        deadline = time.monotonic() + wait
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+                self.sock = sock
+                return self
+            except OSError as e:
+                sock.close()
+                if e.errno not in (errno.ENOENT, errno.ECONNREFUSED):
+                    raise
+                if time.monotonic() >= deadline or (alive and not alive()):
+                    raise
+            time.sleep(0.02)
+
+    def request(self, cmd, **args):
+        args["cmd"] = cmd
+        payload = json.dumps(args).encode() + b"\n"
+        with self._lock:
+            if self.sock is None:
+                # Reset by an earlier failure; the server may still be up.
+                self.connect()
+            try:
+                self.sock.sendall(payload)
+                while b"\n" not in self._buffer:
+                    data = self.sock.recv(4096)
+                    if not data:
+                        raise OSError(errno.ECONNRESET, "Control connection closed")
+                    self._buffer += data
+            except BaseException:
+                # A late reply must never be read as the answer to the next
+                # request: drop the connection and whatever was buffered.
+                self._reset()
+                raise
+            end = self._buffer.find(b"\n")
+            line = bytes(self._buffer[:end])
+            del self._buffer[:end + 1]
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error", "request failed"))
+        return reply
+
+    def _reset(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+        self._buffer.clear()
+
+    def close(self):
+        with self._lock:
+            self._reset()
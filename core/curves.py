@@ -0,0 +1,127 @@
+from evdev import ecodes
+
+
+CURVES = ("linear", "expo", "s-curve", "points")
+
+# Profile "axes" entry keys -> (min, max); deadzones are in stick units
+# (0-32767) like the processor deadzone, sensitivity is a percentage.
+_NUMBERS = {
+    "expo": (0.0, 1.0),
+    "strength": (0.0, 1.0),
+    "deadzone": (0, 32767),
+    "anti_deadzone": (0, 32767),
+    "outer_deadzone": (0, 32767),
+    "sensitivity": (10, 500),
+}
+_KEYS = set(_NUMBERS) | {"curve", "points"}
+
+AXIS_MAX = 32767.0
+
+
+def validate_axes(axes):
+    # Validates the profile "axes" section:
+    #   {"ABS_X": {"curve": "expo", "expo": 0.4, "outer_deadzone": 1500}, ...}
+    if not isinstance(axes, dict):
+        raise ValueError("'axes' must be an object")
+    for axis, spec in axes.items():
+        if not isinstance(axis, str) or not (axis.isdigit() or axis.startswith("ABS_")):
+            raise ValueError(f"'axes' keys must be event codes or ABS_ names, not {axis!r}")
+        if not axis.isdigit() and not isinstance(getattr(ecodes, axis, None), int):
+            raise ValueError(f"'axes': unknown axis {axis!r}")
+        if not isinstance(spec, dict):
+            raise ValueError(f"'axes.{axis}' must be an object")
+        unknown = set(spec) - _KEYS
+        if unknown:
+            raise ValueError(f"'axes.{axis}': unknown keys: {', '.join(sorted(unknown))}")
+        curve = spec.get("curve", "linear")
+        if curve not in CURVES:
+            raise ValueError(f"'axes.{axis}.curve' must be one of {', '.join(CURVES)}")
+        for key, (low, high) in _NUMBERS.items():
+            if key not in spec:
+                continue
+            value = spec[key]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+                raise ValueError(f"'axes.{axis}.{key}' must be a number in {low}-{high}")
+        if spec.get("deadzone", 0) + spec.get("outer_deadzone", 0) >= AXIS_MAX:
+            raise ValueError(f"'axes.{axis}': deadzone and outer_deadzone leave no travel")
+        if curve == "points":
+            _validate_points(axis, spec.get("points"))
+        elif "points" in spec:
+            raise ValueError(f"'axes.{axis}.points' needs \"curve\": \"points\"")
+    return axes
+
+
+def _validate_points(axis, points):
+    if not isinstance(points, list) or not points:
+        raise ValueError(f"'axes.{axis}.points' must be a list of [input, output] pairs")
+    last = -1.0
+    for point in points:
+        if (
+            not isinstance(point, list)
+            or len(point) != 2
+            or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in point)
+            or not all(0.0 <= v <= 1.0 for v in point)
+        ):
+            raise ValueError(f"'axes.{axis}.points' entries must be [input, output] in 0-1")
+        if point[0] <= last:
+            raise ValueError(f"'axes.{axis}.points' inputs must increase")
+        last = point[0]
+
+
+class AxisCurve:
+
+    # Response curve for one stick axis, applied to the magnitude of the
+    # normalized value (-32768..32767) so both directions stay symmetric:
+    #   inner deadzone -> rescale to the live range -> outer deadzone
+    #   (saturation) -> curve -> anti-deadzone -> sensitivity
+    # It is evaluated only while the processor builds its axis tables, never
+    # per event, so richer curves cost nothing on the input path.
+
+    def __init__(self, spec):
+        self.curve = spec.get("curve", "linear")
+        self.expo = float(spec.get("expo", 0.3))
+        self.strength = float(spec.get("strength", 0.5))
+        # None: use the processor's deadzone.
+        self.deadzone = spec.get("deadzone")
+        self.anti_deadzone = spec.get("anti_deadzone", 0) / AXIS_MAX
+        self.outer_deadzone = spec.get("outer_deadzone", 0) / AXIS_MAX
+        self.sensitivity = spec.get("sensitivity", 100) / 100.0
+        points = [tuple(point) for point in spec.get("points") or ()]
+        if points and points[0][0] > 0.0:
+            points.insert(0, (0.0, 0.0))
+        if points and points[-1][0] < 1.0:
+            points.append((1.0, 1.0))
+        self.points = points
+
+    def shape(self, x):
+        # x in [0, 1] -> [0, 1]
+        if self.curve == "expo":
+            return (1.0 - self.expo) * x + self.expo * x * x * x
+        if self.curve == "s-curve":
+            power = 1.0 + 3.0 * self.strength
+            low, high = x ** power, (1.0 - x) ** power
+            return low / (low + high)
+        if self.curve == "points":
+            points = self.points
+            for (x0, y0), (x1, y1) in zip(points, points[1:]):
+                if x <= x1:
+                    return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+            return points[-1][1]
+        return x
+
+    def apply(self, value, deadzone, sensitivity):
+        # value: normalized axis value; deadzone: the processor default in
+        # stick units; sensitivity: the processor's global multiplier.
+        magnitude = abs(value) / AXIS_MAX
+        inner = (deadzone if self.deadzone is None else self.deadzone) / AXIS_MAX
+        if magnitude < inner or magnitude == 0.0:
+            return 0
+        live = 1.0 - inner - self.outer_deadzone
+        x = min(1.0, (magnitude - inner) / live) if live > 0 else 1.0
+        y = self.shape(x)
+        if y > 0.0:
+            y = self.anti_deadzone + (1.0 - self.anti_deadzone) * y
+        scaled = int(round(y * AXIS_MAX * self.sensitivity * sensitivity))
+        if value < 0:
+            scaled = -scaled
+        return max(-32768, min(32767, scaled))
@@ -1,11 +1,88 @@
-from evdev import InputDevice, list_devices, ecodes
+import os
+import struct
+
+from evdev import DeviceInfo, InputDevice, list_devices, ecodes
+
+SYSFS_INPUT = "/sys/class/input"
+INPUT_DIR = "/dev/input"
+
+# Capability bitmaps in sysfs are printed as kernel longs, high word first.
+_WORD_BITS = struct.calcsize("l") * 8
+
+
+def parse_bitmap(text):
+    codes = set()
+    for index, word in enumerate(reversed(text.split())):
+        value = int(word, 16)
+        base = index * _WORD_BITS
+        while value:
+            low = value & -value
+            codes.add(base + low.bit_length() - 1)
+            value ^= low
+    return codes
+
+
+def _read_attr(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def device_identity(device):
+    # Stable across replugs: VID/PID plus serial, else the physical port.
+    vid = format(device.info.vendor, "04x")
+    pid = format(device.info.product, "04x")
+    uniq = getattr(device, "uniq", "") or ""
+    if uniq:
+        return f"{vid}:{pid}:{uniq}"
+    phys = getattr(device, "phys", "") or ""
+    if phys:
+        return f"{vid}:{pid}@{phys}"
+    return f"{vid}:{pid}@{device.path}"
+
+
+class DeviceRecord:
+
+    # Cached facts about one input node; duck-types the parts of InputDevice
+    # the GUI reads (path, name, info) without keeping an fd open.
+
+    __slots__ = ("path", "name", "info", "phys", "uniq", "score", "ff")
+
+    def __init__(self, path, name, info, phys, uniq, score, ff):
+        self.path = path
+        self.name = name
+        self.info = info
+        self.phys = phys
+        self.uniq = uniq
+        self.score = score
+        self.ff = ff
+
+    @property
+    def vid(self):
+        return format(self.info.vendor, "04x")
+
+    @property
+    def pid(self):
+        return format(self.info.product, "04x")
+
+    def open(self):
+        return InputDevice(self.path)
+
+    def __repr__(self):
+        return f"DeviceRecord({self.path!r}, {self.name!r}, {self.vid}:{self.pid}, score={self.score})"
 
 
 class DeviceDetector:
 
-    def __init__(self, vid=None, pid=None):
+    def __init__(self, vid=None, pid=None, sysfs_root=SYSFS_INPUT, input_dir=INPUT_DIR):
         self.vid = vid.lower() if vid else None
         self.pid = pid.lower() if pid else None
+        # Scanning sysfs needs no fds and no read permission on the nodes;
+        # opening every node is only the fallback when sysfs is missing.
+        self.sysfs_root = sysfs_root
+        self.input_dir = input_dir
 
     GAMEPAD_KEYS = {
         ecodes.BTN_A,
@@ -53,7 +130,9 @@ class DeviceDetector:
             item[0] if isinstance(item, tuple) else item
             for item in raw_abs_codes
         }
+        return self._score_codes(key_codes, abs_codes)
 
+    def _score_codes(self, key_codes, abs_codes):
         if not key_codes or not abs_codes:
             return 0
 
@@ -73,8 +152,166 @@ class DeviceDetector:
     def _is_joystick(self, dev):
         return self._score_device(dev) > 0
 
+    # ----------------- Sysfs scan -----------------
+
+    def sysfs_available(self):
+        return os.path.isdir(self.sysfs_root)
+
+    def read_node(self, name):
+        # name is "eventN"; returns None if the node is gone or malformed.
+        base = os.path.join(self.sysfs_root, name, "device")
+        caps = os.path.join(base, "capabilities")
+        ev = _read_attr(os.path.join(caps, "ev"))
+        if not ev:
+            return None
+        try:
+            ev_bits = parse_bitmap(ev)
+            key_codes = parse_bitmap(_read_attr(os.path.join(caps, "key")))
+            abs_codes = parse_bitmap(_read_attr(os.path.join(caps, "abs")))
+            info = DeviceInfo(
+                *(
+                    int(_read_attr(os.path.join(base, "id", field)) or "0", 16)
+                    for field in ("bustype", "vendor", "product", "version")
+                )
+            )
+        except ValueError:
+            return None
+        return DeviceRecord(
+            os.path.join(self.input_dir, name),
+            _read_attr(os.path.join(base, "name")),
+            info,
+            _read_attr(os.path.join(base, "phys")),
+            _read_attr(os.path.join(base, "uniq")),
+            self._score_codes(key_codes, abs_codes),
+            ecodes.EV_FF in ev_bits,
+        )
+
+    def probe_open(self, path):
+        try:
+            dev = InputDevice(path)
+        except OSError:
+            # Not readable yet (udev still applying permissions) or gone.
+            return None
+        try:
+            return DeviceRecord(
+                path,
+                dev.name,
+                dev.info,
+                dev.phys or "",
+                dev.uniq or "",
+                self._score_device(dev),
+                ecodes.EV_FF in dev.capabilities(),
+            )
+        except OSError:
+            return None
+        finally:
+            try:
+                dev.close()
+            except Exception:
+                pass
+
+    def probe(self, path):
+        if self.sysfs_available():
+            return self.read_node(os.path.basename(path))
+        return self.probe_open(path)
+
+    def scan(self):
+        # Every event node as a DeviceRecord; nothing is opened when sysfs
+        # is available.
+        if not self.sysfs_available():
+            return [
+                record for record in map(self.probe_open, list_devices())
+                if record is not None
+            ]
+        records = []
+        for name in sorted(os.listdir(self.sysfs_root)):
+            if name.startswith("event"):
+                record = self.read_node(name)
+                if record is not None:
+                    records.append(record)
+        return records
+
+    def _matches_ids(self, record):
+        return record.vid == self.vid and record.pid == self.pid
+
+    @staticmethod
+    def _open_all():
+        devices = []
+        for path in list_devices():
+            try:
+                devices.append(InputDevice(path))
+            except OSError:
+                # Node vanished or is not readable by this user.
+                continue
+        return devices
+
+    @staticmethod
+    def _close_except(devices, keep):
+        for dev in devices:
+            if dev not in keep:
+                try:
+                    dev.close()
+                except Exception:
+                    pass
+
     def list_supported(self):
-        devices = [InputDevice(path) for path in list_devices()]
+        if not self.sysfs_available():
+            return self._list_supported_open()
+
+        records = [r for r in self.scan() if r.score > 0]
+        if self.vid and self.pid:
+            records = [r for r in records if self._matches_ids(r)]
+        records.sort(key=lambda r: r.score, reverse=True)
+
+        result = []
+        for record in records:
+            try:
+                result.append(record.open())
+            except OSError:
+                continue
+        return result
+
+    def find(self, preferred_path=None):
+        if not self.sysfs_available():
+            devices = self._open_all()
+            found = self._find_in(devices, preferred_path)
+            self._close_except(devices, [found] if found else [])
+            return found
+
+        # Only the chosen node is opened; if that fails (permissions, node
+        # just went away) the next best candidate is tried.
+        records = self.scan()
+        while records:
+            record = self._find_record(records, preferred_path)
+            if record is None:
+                return None
+            try:
+                return record.open()
+            except OSError:
+                records.remove(record)
+        return None
+
+    def _find_record(self, records, preferred_path):
+        if preferred_path:
+            for record in records:
+                if record.path == preferred_path and record.score > 0:
+                    return record
+
+        #  Manual VID/PID mode
+        if self.vid and self.pid:
+            for record in records:
+                if self._matches_ids(record):
+                    return record
+            return None
+
+        # Auto-detect mode (best scoring gamepad-like input device)
+        best = max(records, key=lambda r: r.score, default=None)
+        if best is not None and best.score > 0:
+            return best
+        return None
+
+    def _list_supported_open(self):
+        devices = self._open_all()
 
         supported = []
         for dev in devices:
@@ -88,11 +325,11 @@ class DeviceDetector:
                 supported.append((score, dev))
 
         supported.sort(key=lambda item: item[0], reverse=True)
-        return [dev for _, dev in supported]
-
-    def find(self, preferred_path=None):
-        devices = [InputDevice(path) for path in list_devices()]
+        result = [dev for _, dev in supported]
+        self._close_except(devices, result)
+        return result
 
+    def _find_in(self, devices, preferred_path):
         if preferred_path:
             for dev in devices:
                 if dev.path == preferred_path and self._is_joystick(dev):
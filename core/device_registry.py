@@ -0,0 +1,183 @@
+import os
+import select
+import threading
+
+from core.device_detector import INPUT_DIR, DeviceDetector
+from core.watch import (
+    IN_ATTRIB,
+    IN_CREATE,
+    IN_DELETE,
+    IN_MOVED_FROM,
+    IN_MOVED_TO,
+    IN_Q_OVERFLOW,
+    Inotify,
+)
+
+
+class DeviceRegistry:
+
+    # Long-lived view of /dev/input/event*. Nodes are probed once when they
+    # appear (from sysfs, or by opening them when sysfs is unavailable, in
+    # which case they are retried when udev fixes their permissions), then
+    # cached.
+    # Listeners are called as listener(event, record) with event "added" or
+    # "removed", from the registry thread.
+
+    def __init__(self, input_dir=INPUT_DIR, detector=None):
+        self.input_dir = input_dir
+        self.detector = detector or DeviceDetector(input_dir=input_dir)
+        self.records = {}
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._inotify = None
+        self._wake_r = self._wake_w = None
+
+    # ----------------- Queries -----------------
+
+    def supported(self, vid=None, pid=None):
+        vid = vid.lower() if vid else None
+        pid = pid.lower() if pid else None
+        with self._lock:
+            records = [r for r in self.records.values() if r.score > 0]
+        if vid and pid:
+            records = [r for r in records if r.vid == vid and r.pid == pid]
+        records.sort(key=lambda r: (-r.score, r.path))
+        return records
+
+    def get(self, path):
+        with self._lock:
+            return self.records.get(path)
+
+    def find(self, preferred_path=None, vid=None, pid=None):
+        if preferred_path:
+            record = self.get(preferred_path)
+            if record and record.score > 0:
+                return record
+        candidates = self.supported(vid, pid)
+        return candidates[0] if candidates else None
+
+    def force_feedback_devices(self):
+        with self._lock:
+            return [r for r in self.records.values() if r.ff]
+
+    # ----------------- Listeners -----------------
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        try:
+            self.listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def _notify(self, event, record):
+        for listener in list(self.listeners):
+            try:
+                listener(event, record)
+            except Exception as e:
+                print(f"[!] Device listener failed: {e}")
+
+    # ----------------- Probing -----------------
+
+    def _add(self, path, notify=True):
+        record = self.detector.probe(path)
+        if record is None:
+            return None
+        with self._lock:
+            known = path in self.records
+            self.records[path] = record
+        if notify and not known:
+            self._notify("added", record)
+        return record
+
+    def _remove(self, path):
+        with self._lock:
+            record = self.records.pop(path, None)
+        if record:
+            self._notify("removed", record)
+
+    def scan(self):
+        try:
+            names = os.listdir(self.input_dir)
+        except OSError:
+            names = []
+        seen = set()
+        for name in names:
+            if name.startswith("event"):
+                path = os.path.join(self.input_dir, name)
+                seen.add(path)
+                if self.get(path) is None:
+                    self._add(path)
+        with self._lock:
+            gone = [path for path in self.records if path not in seen]
+        for path in gone:
+            self._remove(path)
+
+    # ----------------- Monitor thread -----------------
+
+    def start(self):
+        if self._thread:
+            return
+        try:
+            self._inotify = Inotify()
+            self._inotify.add_watch(
+                self.input_dir,
+                IN_CREATE | IN_ATTRIB | IN_DELETE | IN_MOVED_TO | IN_MOVED_FROM,
+            )
+        except OSError as e:
+            print(f"[!] Hotplug monitoring unavailable: {e}")
+            if self._inotify:
+                self._inotify.close()
+            self._inotify = None
+
+        # Watch first, then scan, so nothing slips in between.
+        self.scan()
+        if not self._inotify:
+            return
+
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if not thread:
+            return
+        self._thread = None
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+        thread.join(timeout=1.0)
+        for fd in (self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._wake_r = self._wake_w = None
+        self._inotify.close()
+        self._inotify = None
+
+    def _run(self):
+        inotify_fd = self._inotify.fileno()
+        while self._thread is not None:
+            ready, _, _ = select.select([inotify_fd, self._wake_r], [], [])
+            if self._wake_r in ready:
+                return
+            for _, mask, name in self._inotify.read():
+                if mask & IN_Q_OVERFLOW:
+                    # Hotplug events were dropped; resync from the directory.
+                    self.scan()
+                    continue
+                if not name.startswith("event"):
+                    continue
+                path = os.path.join(self.input_dir, name)
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._remove(path)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add(path)
+                elif mask & IN_ATTRIB and self.get(path) is None:
+                    # Permissions changed; the node may be readable now.
+                    self._add(path)
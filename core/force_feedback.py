@@ -0,0 +1,231 @@
+import errno
+from collections import OrderedDict
+
+from evdev import ecodes, ff
+
+
+class ForceFeedbackBridge:
+
+    # Forwards rumble from the virtual gamepad to the physical pad.
+    #
+    # Games upload/erase effects on the virtual device; the kernel turns each
+    # request into an EV_UINPUT event on the uinput fd and blocks the game
+    # until we answer, so requests are answered straight from the event loop.
+    # Virtual effect IDs are translated to physical slots through an LRU
+    # cache: pads with only a few slots evict the least recently played
+    # effect and re-upload it lazily the next time it plays.
+
+    DEFAULT_SLOTS = 16
+
+    def __init__(self, ui, physical):
+        self.ui = ui
+        self.physical = None
+        self.slots = self.DEFAULT_SLOTS
+        self.has_gain = False
+        # virtual id -> Effect as uploaded by the game
+        self.effects = {}
+        # virtual id -> (physical id, scale generation), least recent first
+        self.mapped = OrderedDict()
+        self.playing = set()
+        self.enabled = True
+        self.scale = 1.0
+        # Bumped on every intensity change; stale uploads are redone lazily.
+        self.generation = 0
+        self.game_gain = 0xFFFF
+        self.set_physical(physical)
+
+    def fileno(self):
+        return self.ui.fd
+
+    # ----------------- Settings (any thread) -----------------
+
+    def set_intensity(self, percent):
+        self.scale = max(0, min(100, percent)) / 100.0
+        self.generation += 1
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+
+    # ----------------- Physical device -----------------
+
+    def set_physical(self, device):
+        # Effects on a previous (or reset) device are gone; everything is
+        # re-uploaded on demand.
+        self.physical = device
+        self.mapped.clear()
+        self.playing.clear()
+        if device is None:
+            return
+        try:
+            caps = device.capabilities().get(ecodes.EV_FF, [])
+        except OSError:
+            caps = []
+        self.has_gain = ecodes.FF_GAIN in caps
+        self.slots = getattr(device, "ff_effects_count", 0) or self.DEFAULT_SLOTS
+        if self.has_gain:
+            self._write_gain()
+
+    def _write_gain(self):
+        try:
+            self.physical.write(ecodes.EV_FF, ecodes.FF_GAIN, self.game_gain)
+        except OSError:
+            pass
+
+    def _scaled(self, effect, physical_id):
+        copy = ff.Effect.from_buffer_copy(effect)
+        copy.id = physical_id
+        scale = self.scale
+        if copy.type == ecodes.FF_RUMBLE:
+            rumble = copy.u.ff_rumble_effect
+            rumble.strong_magnitude = int(rumble.strong_magnitude * scale)
+            rumble.weak_magnitude = int(rumble.weak_magnitude * scale)
+        elif copy.type == ecodes.FF_PERIODIC:
+            periodic = copy.u.ff_periodic_effect
+            periodic.magnitude = int(periodic.magnitude * scale)
+            periodic.offset = int(periodic.offset * scale)
+        elif copy.type == ecodes.FF_CONSTANT:
+            constant = copy.u.ff_constant_effect
+            constant.level = int(constant.level * scale)
+        elif copy.type == ecodes.FF_RAMP:
+            ramp = copy.u.ff_ramp_effect
+            ramp.start_level = int(ramp.start_level * scale)
+            ramp.end_level = int(ramp.end_level * scale)
+        return copy
+
+    def _evict(self):
+        for virtual_id in self.mapped:
+            if virtual_id not in self.playing:
+                break
+        else:
+            virtual_id = next(iter(self.mapped), None)
+        if virtual_id is None:
+            return False
+        physical_id, _ = self.mapped.pop(virtual_id)
+        self.playing.discard(virtual_id)
+        try:
+            self.physical.erase_effect(physical_id)
+        except OSError:
+            pass
+        return True
+
+    def _upload(self, virtual_id):
+        # Returns the physical id, uploading or refreshing it as needed.
+        entry = self.mapped.get(virtual_id)
+        if entry is not None and entry[1] == self.generation:
+            self.mapped.move_to_end(virtual_id)
+            return entry[0]
+
+        effect = self.effects[virtual_id]
+        target = entry[0] if entry is not None else -1
+        if entry is None and len(self.mapped) >= self.slots:
+            self._evict()
+        while True:
+            try:
+                physical_id = self.physical.upload_effect(self._scaled(effect, target))
+                break
+            except OSError as e:
+                if e.errno != errno.ENOSPC or target != -1 or not self._evict():
+                    raise
+        self.mapped[virtual_id] = (physical_id, self.generation)
+        self.mapped.move_to_end(virtual_id)
+        return physical_id
+
+    def _forget(self, virtual_id):
+        self.effects.pop(virtual_id, None)
+        self.playing.discard(virtual_id)
+        entry = self.mapped.pop(virtual_id, None)
+        if entry is not None and self.physical is not None:
+            try:
+                self.physical.erase_effect(entry[0])
+            except OSError:
+                pass
+
+    # ----------------- uinput requests (event loop) -----------------
+
+    def handle(self):
+        while True:
+            try:
+                events = list(self.ui.read())
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return
+                raise
+            for event in events:
+                if event.type == ecodes.EV_UINPUT:
+                    if event.code == ecodes.UI_FF_UPLOAD:
+                        self._on_upload(event.value)
+                    elif event.code == ecodes.UI_FF_ERASE:
+                        self._on_erase(event.value)
+                elif event.type == ecodes.EV_FF:
+                    self._on_play(event.code, event.value)
+
+    def _on_upload(self, request_id):
+        upload = self.ui.begin_upload(request_id)
+        try:
+            virtual_id = upload.effect.id
+            self.effects[virtual_id] = ff.Effect.from_buffer_copy(upload.effect)
+            if virtual_id in self.mapped:
+                # Updated in place on the next play (or now, if playing).
+                self.mapped[virtual_id] = (self.mapped[virtual_id][0], -1)
+            upload.retval = 0
+        finally:
+            self.ui.end_upload(upload)
+        if virtual_id in self.playing and self.physical is not None:
+            try:
+                self._upload(virtual_id)
+            except OSError as e:
+                print(f"[!] Force feedback: {e}")
+
+    def _on_erase(self, request_id):
+        erase = self.ui.begin_erase(request_id)
+        try:
+            self._forget(erase.effect_id)
+            erase.retval = 0
+        finally:
+            self.ui.end_erase(erase)
+
+    def _on_play(self, code, value):
+        if code == ecodes.FF_GAIN:
+            self.game_gain = value
+            if self.physical is not None and self.has_gain:
+                self._write_gain()
+            return
+        if code not in self.effects or self.physical is None:
+            return
+
+        try:
+            if value and self.enabled:
+                physical_id = self._upload(code)
+                self.physical.write(ecodes.EV_FF, physical_id, value)
+                self.playing.add(code)
+            elif code in self.mapped:
+                self.physical.write(ecodes.EV_FF, self.mapped[code][0], 0)
+                self.playing.discard(code)
+        except OSError as e:
+            # Rumble must never take the input path down with it.
+            print(f"[!] Force feedback: {e}")
+
+    def stop_all(self):
+        if self.physical is None:
+            return
+        for virtual_id in list(self.playing):
+            entry = self.mapped.get(virtual_id)
+            if entry is not None:
+                try:
+                    self.physical.write(ecodes.EV_FF, entry[0], 0)
+                except OSError:
+                    pass
+        self.playing.clear()
+
+    def close(self):
+        self.stop_all()
+        if self.physical is not None:
+            for physical_id, _ in self.mapped.values():
+                try:
+                    self.physical.erase_effect(physical_id)
+                except OSError:
+                    pass
+        self.mapped.clear()
+        self.effects.clear()
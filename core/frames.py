@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+from evdev import InputDevice, ecodes
+
+from core.processor import InputProcessor
+
+
+class ControllerFrame:
+
+    __slots__ = ("timestamp", "axes", "buttons")
+
+    def __init__(self, timestamp, axes, buttons):
+        self.timestamp = timestamp
+        # Virtual axis code -> processed value (same values uinput receives).
+        self.axes = axes
+        # Virtual button code -> 0/1/2 (released / pressed / autorepeat).
+        self.buttons = buttons
+
+    def axis(self, name):
+        return self.axes.get(getattr(ecodes, name), 0)
+
+    def pressed(self, name):
+        return bool(self.buttons.get(getattr(ecodes, name), 0))
+
+    def __repr__(self):
+        return f"ControllerFrame(t={self.timestamp:.6f}, axes={self.axes}, buttons={self.buttons})"
+
+
+class FrameOutput:
+
+    # Stand-in for VirtualGamepad: the processor writes into it exactly as it
+    # would into uinput, and every flushed frame becomes a snapshot.
+
+    def __init__(self, on_frame):
+        self.on_frame = on_frame
+        self.batched = True
+        self.pending = False
+        self.axes = {
+            ecodes.ABS_X: 0,
+            ecodes.ABS_Y: 0,
+            ecodes.ABS_RX: 0,
+            ecodes.ABS_RY: 0,
+            ecodes.ABS_HAT0X: 0,
+            ecodes.ABS_HAT0Y: 0,
+        }
+        self.buttons = {}
+
+    def set_batched(self, enabled):
+        if not enabled:
+            self.flush()
+        self.batched = enabled
+
+    def emit_key(self, code, value):
+        self.buttons[code] = value
+        self.pending = True
+        if not self.batched:
+            self.flush()
+
+    def emit_abs(self, code, value):
+        self.axes[code] = value
+        self.pending = True
+        if not self.batched:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.pending = False
+        self.on_frame(
+            ControllerFrame(time.time(), dict(self.axes), dict(self.buttons))
+        )
+
+    def close(self):
+        pass
+
+
+async def frames(device, mapper=None, grab=False, stick_sensitivity=100, maxsize=256):
+    # Usage: async for frame in frames("/dev/input/event5"): ...
+    # A path is opened (and closed) here; a caller-owned InputDevice is only
+    # released, never closed.
+    owns_device = isinstance(device, str)
+    if owns_device:
+        device = InputDevice(device)
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize)
+    finished = object()
+
+    def on_frame(frame):
+        # Slow consumers get the newest state rather than a growing backlog.
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(frame)
+
+    processor = InputProcessor(device, FrameOutput(on_frame), mapper=mapper)
+    processor.set_stick_sensitivity(stick_sensitivity)
+
+    def on_readable():
+        if not processor.process_pending():
+            loop.remove_reader(device.fd)
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(finished)
+
+    processor.attach(grab=grab)
+    loop.add_reader(device.fd, on_readable)
+    try:
+        while True:
+            frame = await queue.get()
+            if frame is finished:
+                return
+            yield frame
+    finally:
+        try:
+            loop.remove_reader(device.fd)
+        except (OSError, ValueError):
+            pass
+        processor.running = False
+        processor.cleanup(close_device=owns_device)
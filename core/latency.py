@@ -0,0 +1,115 @@
+import math
+import time
+
+
+EVENT_CLASSES = ("buttons", "sticks", "hat", "mouse")
+
+
+class LatencyHistogram:
+
+    # Log-spaced buckets from 1 us to 1 s: recording is one log10 and one
+    # list increment, with no per-sample allocation.
+    BUCKETS_PER_DECADE = 20
+    DECADES = 6
+
+    def __init__(self):
+        self.size = self.BUCKETS_PER_DECADE * self.DECADES + 1
+        self.counts = [0] * self.size
+        self.count = 0
+        self.max = 0.0
+
+    def reset(self):
+        for index in range(self.size):
+            self.counts[index] = 0
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds):
+        if seconds < 0:
+            # Clock skew between kernel timestamp and wall clock.
+            seconds = 0.0
+        micros = seconds * 1e6
+        if micros < 1.0:
+            index = 0
+        else:
+            index = min(
+                self.size - 1,
+                int(math.log10(micros) * self.BUCKETS_PER_DECADE),
+            )
+        self.counts[index] += 1
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def bucket_upper(self, index):
+        # Upper bound of a bucket, in seconds.
+        return 10 ** ((index + 1) / self.BUCKETS_PER_DECADE) / 1e6
+
+
+class RollingLatency:
+
+    # Two histograms rotated every `window` seconds; reports cover between
+    # one and two windows of recent samples.
+
+    def __init__(self, window=10.0):
+        self.window = window
+        self.current = LatencyHistogram()
+        self.previous = LatencyHistogram()
+        self.started = time.monotonic()
+
+    def record(self, seconds):
+        now = time.monotonic()
+        if now - self.started >= self.window:
+            self.previous, self.current = self.current, self.previous
+            self.current.reset()
+            self.started = now
+        self.current.record(seconds)
+
+    def snapshot(self):
+        current, previous = self.current, self.previous
+        counts = [a + b for a, b in zip(current.counts, previous.counts)]
+        total = sum(counts)
+        if not total:
+            return {"count": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+        def percentile(fraction):
+            target = fraction * total
+            seen = 0
+            for index, count in enumerate(counts):
+                seen += count
+                if seen >= target:
+                    return current.bucket_upper(index)
+            return current.bucket_upper(len(counts) - 1)
+
+        worst = max(current.max, previous.max)
+        return {
+            "count": total,
+            "p50_ms": round(min(percentile(0.50), worst) * 1000, 3),
+            "p99_ms": round(min(percentile(0.99), worst) * 1000, 3),
+            "max_ms": round(worst * 1000, 3),
+        }
+
+
+class LatencyStats:
+
+    def __init__(self, window=10.0):
+        self.classes = {name: RollingLatency(window) for name in EVENT_CLASSES}
+
+    def record(self, event_class, seconds):
+        self.classes[event_class].record(seconds)
+
+    def snapshot(self):
+        return {name: stats.snapshot() for name, stats in self.classes.items()}
+
+    @staticmethod
+    def format(snapshot):
+        parts = []
+        for name in EVENT_CLASSES:
+            stats = snapshot.get(name)
+            if not stats or not stats["count"]:
+                continue
+            parts.append(
+                f"{name}: p50 {stats['p50_ms']:.2f} ms | "
+                f"p99 {stats['p99_ms']:.2f} ms | max {stats['max_ms']:.2f} ms"
+            )
+        return "\n".join(parts) if parts else "No samples yet"
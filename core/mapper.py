@@ -1,57 +1,184 @@
 import json
 import os
 
+from evdev import ecodes
+
+from core.curves import AxisCurve
+from core.persistence import ProfileWriter, backup_path, validate_profile
+
 CONFIG_PATH = "config/profile.json"
 
+DPAD_BUTTONS = (
+    "BTN_DPAD_UP",
+    "BTN_DPAD_DOWN",
+    "BTN_DPAD_LEFT",
+    "BTN_DPAD_RIGHT",
+)
+
+
+class MappedAction:
+
+    __slots__ = ("name", "code", "dpad")
+
+    def __init__(self, name):
+        self.name = name
+        # D-pad buttons are folded into HAT output by the processor.
+        self.dpad = name in DPAD_BUTTONS
+        self.code = getattr(ecodes, name, None)
+        if not isinstance(self.code, int):
+            self.code = None
+
+
+class CompiledProfile:
+
+    def __init__(self, mapper, mode):
+        self.mode = mode
+        # EV_KEY code -> action
+        self.keys = {}
+        # (EV_ABS code, direction) -> action
+        self.directions = {}
+
+        key_codes = set()
+        direction_codes = set()
+        for current_mode in ("analog", "digital"):
+            buttons = mapper.data.get(current_mode, {}).get("buttons", {})
+            for token in buttons:
+                code, sep, _ = token.partition(":")
+                try:
+                    code = int(code)
+                except ValueError:
+                    continue
+                if sep:
+                    direction_codes.add(code)
+                else:
+                    key_codes.add(code)
+
+        # Resolve through translate() once so the mode fallback order stays
+        # identical to the uncompiled lookup.
+        actions = {}
+        for code in key_codes:
+            name = mapper.translate(mode, code)
+            if name:
+                self.keys[code] = actions.setdefault(name, MappedAction(name))
+        for code in direction_codes:
+            for value in (-1, 1):
+                name = mapper.translate(mode, code, value)
+                if name:
+                    self.directions[(code, value)] = actions.setdefault(
+                        name, MappedAction(name)
+                    )
+
+        self.direction_axes = frozenset(direction_codes)
+
+        # EV_ABS code -> AxisCurve, from the optional "axes" section.
+        self.curves = {}
+        for axis, spec in mapper.data.get("axes", {}).items():
+            code = int(axis) if axis.isdigit() else getattr(ecodes, axis, None)
+            if isinstance(code, int):
+                self.curves[code] = AxisCurve(spec)
+        # Raw section, so a reload can tell whether stick tables need a
+        # rebuild.
+        self.curves_source = mapper.data.get("axes")
+
 
 class Mapper:
 
-    def __init__(self):
+    def __init__(self, path=None, autoload=True):
+        self.path = path or CONFIG_PATH
         self.data = {}
-        self.load()
+        self._compiled = {}
+        if autoload:
+            self.load()
+
+    @classmethod
+    def from_file(cls, path=None):
+        # Read-only load for background reloads: raises on a bad file
+        # instead of resetting it to defaults.
+        mapper = cls(path, autoload=False)
+        with open(mapper.path, "r") as f:
+            content = f.read().strip()
+        if not content:
+            raise ValueError(f"{mapper.path}: empty profile")
+        mapper.data, _ = cls.parse(content)
+        return mapper
+
+    @property
+    def writer(self):
+        return ProfileWriter.for_path(self.path)
+
+    @staticmethod
+    def parse(content):
+        loaded = json.loads(content)
+
+        # ---------- AUTO MIGRATION ----------
+        # If old format detected
+        if "buttons" in loaded and "analog" not in loaded:
+            data = {
+                "analog": {"buttons": loaded.get("buttons", {})},
+                "digital": {"buttons": {}}
+            }
+            return data, True
+
+        # Ensure required keys exist
+        if "analog" not in loaded:
+            loaded["analog"] = {"buttons": {}}
+        if "digital" not in loaded:
+            loaded["digital"] = {"buttons": {}}
+        if "buttons" not in loaded["analog"]:
+            loaded["analog"]["buttons"] = {}
+        if "buttons" not in loaded["digital"]:
+            loaded["digital"]["buttons"] = {}
+
+        return validate_profile(loaded), False
+
+    @classmethod
+    def _read(cls, path):
+        with open(path, "r") as f:
+            content = f.read().strip()
+        if not content:
+            raise ValueError(f"{path}: empty profile")
+        return cls.parse(content)
 
     def load(self):
+        self._compiled = {}
+
+        # Edits still waiting in the write-behind queue are newer than disk.
+        pending = self.writer.pending()
+        if pending is not None:
+            self.data = pending
+            return
 
-        if not os.path.exists(CONFIG_PATH):
+        if not os.path.exists(self.path):
             self._create_default()
             return
 
         try:
-            with open(CONFIG_PATH, "r") as f:
-                content = f.read().strip()
-
-                if not content:
-                    self._create_default()
-                    return
-
-                loaded = json.loads(content)
-
-                # ---------- AUTO MIGRATION ----------
-                # If old format detected
-                if "buttons" in loaded and "analog" not in loaded:
-                    self.data = {
-                        "analog": {"buttons": loaded.get("buttons", {})},
-                        "digital": {"buttons": {}}
-                    }
-                    self.save()
-                    return
-
-                # Ensure required keys exist
-                if "analog" not in loaded:
-                    loaded["analog"] = {"buttons": {}}
-                if "digital" not in loaded:
-                    loaded["digital"] = {"buttons": {}}
-                if "buttons" not in loaded["analog"]:
-                    loaded["analog"]["buttons"] = {}
-                if "buttons" not in loaded["digital"]:
-                    loaded["digital"]["buttons"] = {}
-
-                self.data = loaded
+            self.data, migrated = self._read(self.path)
+            if migrated:
+                self.save()
+            return
+        except Exception as e:
+            error = e
 
+        # Broken profile: fall back to the last-known-good copy and keep the
+        # bad file around instead of silently overwriting it.
+        print(f"[!] Profile {self.path} is unreadable ({error})")
+        self._set_aside()
+        try:
+            self.data, _ = self._read(backup_path(self.path))
+            print("[+] Restored profile from last-known-good backup")
+            self.save()
         except Exception:
             self._create_default()
 
+    def _set_aside(self):
+        try:
+            os.replace(self.path, self.path + ".corrupt")
+        except OSError:
+            pass
+
     def _create_default(self):
+        self._compiled = {}
         self.data = {
             "analog": {"buttons": {}},
             "digital": {"buttons": {}}
@@ -59,13 +186,24 @@ class Mapper:
         self.save()
 
     def save(self):
-        os.makedirs("config", exist_ok=True)
-        with open(CONFIG_PATH, "w") as f:
-            json.dump(self.data, f, indent=4)
+        self.writer.write_now(self.data)
+
+    def flush(self):
+        self.writer.flush()
 
     def set_mapping(self, mode, physical_code, virtual_button):
         self.data[mode]["buttons"][str(physical_code)] = virtual_button
-        self.save()
+        self._compiled = {}
+        # Coalesced, atomic write on a background thread.
+        self.writer.schedule(self.data)
+
+    def compile(self, mode):
+        # Compiled tables are cached until the profile data changes.
+        profile = self._compiled.get(mode)
+        if profile is None:
+            profile = CompiledProfile(self, mode)
+            self._compiled[mode] = profile
+        return profile
 
     def translate(self, mode, physical_code, physical_value=None):
         modes = [mode] if mode in ("analog", "digital") else []
@@ -89,19 +227,6 @@ class Mapper:
 
         return None
 
-    def has_axis_direction_mappings(self, mode, axis_code):
-        prefix = f"{axis_code}:"
-        modes = [mode] if mode in ("analog", "digital") else []
-        for fallback in ("analog", "digital"):
-            if fallback not in modes:
-                modes.append(fallback)
-
-        for current_mode in modes:
-            buttons = self.data.get(current_mode, {}).get("buttons", {})
-            if any(key.startswith(prefix) for key in buttons):
-                return True
-        return False
-
     def is_empty(self):
         return (
             not self.data.get("analog", {}).get("buttons") and
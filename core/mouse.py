@@ -0,0 +1,107 @@
+from evdev import ecodes
+
+
+class MouseEngine:
+
+    RATE_HZ = 500
+    DEADZONE = 3000
+
+    # Cursor speeds in pixels per second. The old per-event deltas were tuned
+    # for roughly 100 stick reports per second, which REFERENCE_RATE keeps.
+    REFERENCE_RATE = 100.0
+    MIN_SPEED = 100.0
+    MAX_SPEED = 4000.0
+
+    def __init__(self, ui, rate_hz=RATE_HZ):
+        self.ui = ui
+        self.interval = 1.0 / max(1, rate_hz)
+        self.sensitivity = 1.0
+        self.stick = {ecodes.ABS_X: 0, ecodes.ABS_Y: 0}
+        self.velocity_x = 0.0
+        self.velocity_y = 0.0
+        # Fractional pixels carried over between ticks.
+        self.remainder_x = 0.0
+        self.remainder_y = 0.0
+        self.last_tick = None
+        # None while the stick is centered: nothing is scheduled at all.
+        self.next_tick = None
+
+    def set_rate(self, rate_hz):
+        self.interval = 1.0 / max(1, rate_hz)
+
+    def set_sensitivity(self, sensitivity, now=None):
+        self.sensitivity = sensitivity
+        self._update_velocity(now)
+
+    def _speed(self, value):
+        magnitude = abs(value)
+        if magnitude < self.DEADZONE:
+            return 0.0
+        speed = (magnitude / 2200.0) * self.sensitivity * self.REFERENCE_RATE
+        speed = min(self.MAX_SPEED, max(self.MIN_SPEED, speed))
+        return -speed if value < 0 else speed
+
+    def set_axis(self, axis_code, value, now):
+        self.stick[axis_code] = value
+        self._update_velocity(now)
+
+    def _update_velocity(self, now):
+        if now is not None and self.next_tick is not None:
+            # Integrate up to now with the old velocity before switching.
+            self._integrate(now)
+        self.velocity_x = self._speed(self.stick[ecodes.ABS_X])
+        self.velocity_y = self._speed(self.stick[ecodes.ABS_Y])
+
+        if not self.velocity_x and not self.velocity_y:
+            self.stop()
+        elif self.next_tick is None and now is not None:
+            self.last_tick = now
+            self.next_tick = now + self.interval
+
+    def stop(self):
+        self.next_tick = None
+        self.last_tick = None
+        self.remainder_x = 0.0
+        self.remainder_y = 0.0
+
+    def reset(self):
+        self.stick[ecodes.ABS_X] = 0
+        self.stick[ecodes.ABS_Y] = 0
+        self.velocity_x = 0.0
+        self.velocity_y = 0.0
+        self.stop()
+
+    def timeout(self, now):
+        if self.next_tick is None:
+            return None
+        return max(0.0, self.next_tick - now)
+
+    def _integrate(self, now):
+        dt = now - self.last_tick
+        if dt <= 0:
+            return
+        self.last_tick = now
+        self.remainder_x += self.velocity_x * dt
+        self.remainder_y += self.velocity_y * dt
+
+    def tick(self, now):
+        if self.next_tick is None or now < self.next_tick:
+            return
+
+        self._integrate(now)
+        dx = int(self.remainder_x)
+        dy = int(self.remainder_y)
+        self.remainder_x -= dx
+        self.remainder_y -= dy
+
+        if dx or dy:
+            if dx:
+                self.ui.write(ecodes.EV_REL, ecodes.REL_X, dx)
+            if dy:
+                self.ui.write(ecodes.EV_REL, ecodes.REL_Y, dy)
+            self.ui.syn()
+
+        self.next_tick += self.interval
+        if self.next_tick <= now:
+            # Fell behind (e.g. preempted); resume from now instead of bursting.
+            self.next_tick = now + self.interval
@@ -0,0 +1,169 @@
+import atexit
+import copy
+import json
+import os
+import tempfile
+import threading
+
+from core.curves import validate_axes
+
+
+def validate_profile(data):
+    if not isinstance(data, dict):
+        raise ValueError("profile must be a JSON object")
+    for mode in ("analog", "digital"):
+        section = data.get(mode)
+        if not isinstance(section, dict):
+            raise ValueError(f"profile section '{mode}' must be an object")
+        buttons = section.get("buttons")
+        if not isinstance(buttons, dict):
+            raise ValueError(f"'{mode}.buttons' must be an object")
+        for token, name in buttons.items():
+            if not isinstance(token, str) or not isinstance(name, str):
+                raise ValueError(f"'{mode}.buttons' entries must be strings")
+    if "axes" in data:
+        validate_axes(data["axes"])
+    return data
+
+
+def backup_path(path):
+    return path + ".bak"
+
+
+def _fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _is_valid_file(path):
+    try:
+        with open(path, "r") as f:
+            validate_profile(json.load(f))
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def atomic_write_json(path, data):
+    # temp file + fsync + rename: readers (and the hot-reload watcher) only
+    # ever see the old or the new complete file.
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Keep the file we are about to replace as last-known-good.
+        if os.path.exists(path) and _is_valid_file(path):
+            bak_tmp = tmp_path + ".bak"
+            try:
+                os.link(path, bak_tmp)
+                os.replace(bak_tmp, backup_path(path))
+            except OSError:
+                try:
+                    os.unlink(bak_tmp)
+                except OSError:
+                    pass
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+class ProfileWriter:
+
+    # Write-behind persistence: edits within DELAY seconds are coalesced into
+    # one atomic write on a background thread. One writer per file is shared
+    # by every Mapper instance pointing at it.
+
+    DELAY = 0.3
+
+    _writers = {}
+    _writers_lock = threading.Lock()
+
+    @classmethod
+    def for_path(cls, path):
+        key = os.path.abspath(path)
+        with cls._writers_lock:
+            writer = cls._writers.get(key)
+            if writer is None:
+                writer = cls(path)
+                cls._writers[key] = writer
+            return writer
+
+    @classmethod
+    def flush_all(cls):
+        with cls._writers_lock:
+            writers = list(cls._writers.values())
+        for writer in writers:
+            writer.flush()
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # Serializes file writes without blocking schedule() callers.
+        self._write_lock = threading.Lock()
+        self._pending = None
+        # Data being written right now, still newer than what is on disk.
+        self._writing = None
+        self._timer = None
+
+    def pending(self):
+        with self._lock:
+            data = self._pending if self._pending is not None else self._writing
+            return copy.deepcopy(data) if data is not None else None
+
+    def schedule(self, data):
+        with self._lock:
+            self._pending = copy.deepcopy(data)
+            if self._timer is None:
+                self._timer = threading.Timer(self.DELAY, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def write_now(self, data):
+        with self._lock:
+            self._pending = copy.deepcopy(data)
+        self.flush()
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                data = self._pending
+                self._pending = None
+                self._writing = data
+                timer = self._timer
+                self._timer = None
+            if timer is not None and timer is not threading.current_thread():
+                timer.cancel()
+            if data is None:
+                return
+            try:
+                atomic_write_json(self.path, data)
+            except (OSError, TypeError, ValueError) as e:
+                # Runs on the timer thread: report instead of dying silently.
+                print(f"[!] Failed to save profile {self.path}: {e}")
+            finally:
+                with self._lock:
+                    self._writing = None
+
+
+atexit.register(ProfileWriter.flush_all)
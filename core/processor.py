@@ -1,23 +1,63 @@
 import os
 import time
 import errno
+import select
+import threading
 from evdev import ecodes, UInput
+from core.device_detector import device_identity
+from core.force_feedback import ForceFeedbackBridge
+from core.latency import LatencyStats
 from core.mapper import Mapper
+from core.mouse import MouseEngine
+from core.realtime import normal_scheduling
+from core.reconnect import DeviceWaiter
+from core.recording import SessionRecorder
+from core.ring import BUTTON_BITS
+from core.watch import FileWatcher
 
 
 class InputProcessor:
 
     DEADZONE = 4000
 
-    def __init__(self, physical, virtual):
+    # Physical stick axis -> virtual gamepad axis (DragonRise right stick
+    # reports on Z/RZ).
+    STICK_OUTPUTS = {
+        ecodes.ABS_X: ecodes.ABS_X,
+        ecodes.ABS_Y: ecodes.ABS_Y,
+        ecodes.ABS_Z: ecodes.ABS_RX,
+        ecodes.ABS_RZ: ecodes.ABS_RY,
+    }
+
+    # Stick axis -> slot in FrameRing records (LX, LY, RX, RY).
+    RING_AXES = {
+        ecodes.ABS_X: 0,
+        ecodes.ABS_Y: 1,
+        ecodes.ABS_Z: 2,
+        ecodes.ABS_RZ: 3,
+    }
+
+    # Axes with a wider raw range (e.g. xpad's -32768..32767) fall back to
+    # per-event computation; a table that size takes ~0.1 s to build.
+    MAX_AXIS_TABLE_SIZE = 4096
+
+    def __init__(self, physical, virtual, mapper=None):
         self.physical = physical
         self.virtual = virtual
-        self.mapper = Mapper()
+        self.mapper = mapper or Mapper()
         self.use_mouse_mode = False
         self.mouse_ui = None
+        self.mouse_engine = None
+        self.mouse_rate = MouseEngine.RATE_HZ
         self.stick_sensitivity = 1.0
         self.mouse_sensitivity = 1.0
+        self.deadzone = self.DEADZONE
         self.axis_info = dict(physical.capabilities(absinfo=True).get(ecodes.EV_ABS, []))
+        # Built when the processor attaches, so settings applied before that
+        # (sensitivity, deadzone, ...) cost nothing.
+        self.axis_tables = {}
+        self._axis_generation = 0
+        self._axis_lock = threading.Lock()
         self.hat_state = {
             ecodes.ABS_HAT0X: 0,
             ecodes.ABS_HAT0Y: 0,
@@ -28,12 +68,224 @@ class InputProcessor:
             "BTN_DPAD_UP": 0,
             "BTN_DPAD_DOWN": 0,
         }
+        self.mouse_pending = False
+        # Optional input->output latency instrumentation.
+        self.latency = None
+        self._latency_pending = {}
+        self._mouse_motion_stamp = None
+        self.recorder = None
+        # Optional FrameRing for live diagnostics, published at each SYN.
+        self.frame_ring = None
+        self._ring_raw = [0, 0, 0, 0]
+        self._ring_out = [0, 0, 0, 0]
+        # physical key code -> action currently held down
+        self.held_keys = {}
+        # Hot reload of the mapping profile (set before start/attach).
+        self.watch_profile = False
+        self.profile_watcher = None
+        self._pending_profile = None
+        self._profile_generation = 0
+        # Extra fds the event loop must poll: fd -> handler
+        self.aux_handlers = {}
+        # Keep the virtual devices alive and wait for the pad to come back
+        # when it is unplugged or resets, instead of ending the session.
+        self.auto_reconnect = False
+        self.identity = None
+        self.disconnected = False
+        self.device_waiter = None
+        self._grab_on_attach = True
+        # Rumble passthrough, set up in attach() when the virtual pad has FF.
+        self.force_feedback = None
+        self.ff_intensity = 100
+        self.ff_enabled = True
+        # Optional RealtimeConfig applied to the thread running start().
+        self.realtime = None
+        self.realtime_report = None
         self.running = False
         self.cleaned_up = False
 
+        # Self-pipe used by stop() to wake the event loop immediately;
+        # created in attach(), so a processor that never runs owns no fds.
+        self._wake_r = self._wake_w = None
+        # Held while writing to _wake_w, so cleanup() never closes it (and
+        # lets the number be reused) under a concurrent stop().
+        self._wake_lock = threading.Lock()
+
         # For now default mode = analog
         # Later we will auto-detect LED state
         self.current_mode = "analog"
+        self.profile = self.mapper.compile(self.current_mode)
+
+    def _on_profile_changed(self):
+        if not self.profile_watcher.changed():
+            return
+        # Parse and compile off the event loop; the result is swapped in by
+        # the loop itself between two events.
+        self._profile_generation += 1
+        threading.Thread(
+            target=self._load_profile,
+            args=(self._profile_generation,),
+            daemon=True,
+        ).start()
+
+    def _load_profile(self, generation):
+        normal_scheduling()
+        try:
+            mapper = Mapper.from_file(self.mapper.path)
+            profile = mapper.compile(self.current_mode)
+        except Exception as e:
+            print(f"[!] Ignoring profile change: {e}")
+            return
+        if generation != self._profile_generation:
+            # A newer change is already being loaded.
+            return
+        self._pending_profile = (mapper, profile)
+        self._wake()
+
+    def _apply_pending_profile(self):
+        pending = self._pending_profile
+        if pending is None:
+            return
+        self._pending_profile = None
+        mapper, profile = pending
+        old = self.profile
+
+        # Re-route anything currently held so nothing stays stuck on an
+        # output the new profile no longer uses.
+        for code, old_action in list(self.held_keys.items()):
+            new_action = profile.keys.get(code)
+            if new_action and new_action.name == old_action.name:
+                self.held_keys[code] = new_action
+                continue
+            self._emit_button(old_action, 0)
+            if new_action:
+                self._emit_button(new_action, 1)
+                self.held_keys[code] = new_action
+            else:
+                del self.held_keys[code]
+
+        for code, value in self.hat_state.items():
+            if value == 0:
+                continue
+            old_action = old.directions.get((code, value)) if code in old.direction_axes else None
+            new_action = profile.directions.get((code, value)) if code in profile.direction_axes else None
+            if old_action and new_action and old_action.name == new_action.name:
+                continue
+            if code in old.direction_axes:
+                if old_action:
+                    self._emit_mapped_key(old_action, 0)
+            else:
+                self.virtual.emit_abs(code, 0)
+            if code in profile.direction_axes:
+                if new_action:
+                    self._emit_mapped_key(new_action, 1)
+            else:
+                self.virtual.emit_abs(code, value)
+
+        self.mapper = mapper
+        self.profile = profile
+        if profile.curves_source != old.curves_source:
+            self._rebuild_axis_tables()
+        self.flush()
+        print("[+] Mapping profile reloaded")
+
+    def set_mapper(self, mapper):
+        # Switch to another profile file, e.g. a per-device profile created
+        # while running. Held outputs are re-routed as on a hot reload.
+        self._profile_generation += 1  # drop a reload of the old file
+        old_watcher = self.profile_watcher
+        if old_watcher:
+            # The new watcher is created first so its fd never reuses the
+            # number of the one being closed.
+            self.aux_handlers.pop(old_watcher.fileno(), None)
+            self.profile_watcher = None
+            try:
+                self.profile_watcher = FileWatcher(mapper.path)
+                self.aux_handlers[self.profile_watcher.fileno()] = self._on_profile_changed
+            except OSError as e:
+                print(f"[!] Profile hot reload unavailable: {e}")
+            old_watcher.close()
+        self._pending_profile = (mapper, mapper.compile(self.current_mode))
+        self._apply_pending_profile()
+        print(f"[+] Using profile {mapper.path}")
+
+    def set_batched_output(self, enabled):
+        self.virtual.set_batched(enabled)
+        if not enabled:
+            self._flush_mouse()
+
+    def _mouse_write(self, event_type, code, value):
+        self.mouse_ui.write(event_type, code, value)
+        if self.virtual.batched:
+            self.mouse_pending = True
+        else:
+            self.mouse_ui.syn()
+
+    def _flush_mouse(self):
+        if self.mouse_pending and self.mouse_ui:
+            self.mouse_ui.syn()
+        self.mouse_pending = False
+
+    def flush(self):
+        self.virtual.flush()
+        self._flush_mouse()
+        if self._latency_pending:
+            self._record_latency()
+
+    def enable_latency_stats(self, enabled=True):
+        self._latency_pending = {}
+        self._mouse_motion_stamp = None
+        self.latency = LatencyStats() if enabled else None
+
+    def latency_stats(self):
+        latency = self.latency
+        return latency.snapshot() if latency else None
+
+    def start_recording(self, path):
+        self.stop_recording()
+        self.recorder = SessionRecorder(path, self.physical)
+
+    def stop_recording(self):
+        recorder = self.recorder
+        self.recorder = None
+        if recorder:
+            recorder.close()
+
+    def set_frame_ring(self, ring):
+        self._ring_raw = [0, 0, 0, 0]
+        self._ring_out = [0, 0, 0, 0]
+        self.frame_ring = ring
+
+    def _publish_frame(self, ring, event):
+        buttons = 0
+        for action in self.held_keys.values():
+            buttons |= BUTTON_BITS.get(action.name, 0)
+        for (code, value), action in self.profile.directions.items():
+            if self.hat_state.get(code) == value and code in self.profile.direction_axes:
+                buttons |= BUTTON_BITS.get(action.name, 0)
+        ring.publish(
+            self._ring_raw,
+            self._ring_out,
+            self.hat_state[ecodes.ABS_HAT0X],
+            self.hat_state[ecodes.ABS_HAT0Y],
+            buttons,
+            event.sec + event.usec / 1e6,
+        )
+
+    def _mark_latency(self, event, event_class):
+        # Keep the earliest kernel timestamp of each class in this frame.
+        if event_class not in self._latency_pending:
+            self._latency_pending[event_class] = event.sec + event.usec / 1e6
+
+    def _record_latency(self):
+        latency = self.latency
+        pending = self._latency_pending
+        self._latency_pending = {}
+        if latency is None:
+            return
+        now = time.time()
+        for event_class, stamp in pending.items():
+            latency.record(event_class, now - stamp)
 
     def normalize_axis(self, axis_code, value):
         info = self.axis_info.get(axis_code)
@@ -48,7 +300,7 @@ class InputProcessor:
         return int((value - 128) * 256)
 
     def apply_deadzone(self, value):
-        if abs(value) < self.DEADZONE:
+        if abs(value) < self.deadzone:
             return 0
         return value
 
@@ -56,19 +308,95 @@ class InputProcessor:
         scaled = int(value * self.stick_sensitivity)
         return max(-32768, min(32767, scaled))
 
-    def _emit_mapped_key(self, mapped_name, value):
-        if mapped_name in self.key_dpad_state:
-            self.key_dpad_state[mapped_name] = 1 if value else 0
+    def _compute_stick_value(self, axis_code, raw_value, profile=None):
+        curve = (profile or self.profile).curves.get(axis_code)
+        if curve is not None:
+            return curve.apply(
+                self.normalize_axis(axis_code, raw_value),
+                self.deadzone,
+                self.stick_sensitivity,
+            )
+        value = self.apply_deadzone(self.normalize_axis(axis_code, raw_value))
+        return self._apply_stick_sensitivity(value)
+
+    def _rebuild_axis_tables(self):
+        # Settings changed. The event loop (which may serve every pad, at
+        # real-time priority) never builds tables itself: the computed path
+        # takes over at once and a worker swaps the new tables in.
+        with self._axis_lock:
+            self._axis_generation += 1
+            generation = self._axis_generation
+            self.axis_tables = {}
+        if not self.running:
+            return
+        threading.Thread(
+            target=self._axis_table_worker,
+            args=(generation, self.profile),
+            daemon=True,
+        ).start()
+
+    def build_axis_tables(self):
+        # Synchronous build, for callers that drive handle_event directly.
+        self._install_axis_tables(self._axis_generation, self.profile)
+
+    def _axis_table_worker(self, generation, profile):
+        normal_scheduling()
+        self._install_axis_tables(generation, profile)
+
+    def _install_axis_tables(self, generation, profile):
+        tables = self._build_axis_tables(profile, generation)
+        with self._axis_lock:
+            # Swap in one assignment so the event loop never sees a partial
+            # set, and never tables built from superseded settings.
+            if tables is not None and generation == self._axis_generation:
+                self.axis_tables = tables
+
+    def _build_axis_tables(self, profile, generation):
+        # One output value per possible raw value, indexed by raw - min.
+        # Returns None as soon as a newer rebuild makes the result useless.
+        tables = {}
+        for axis_code in self.STICK_OUTPUTS:
+            if generation != self._axis_generation:
+                return None
+            info = self.axis_info.get(axis_code)
+            if not info or info.max < info.min:
+                continue
+            if info.max - info.min + 1 > self.MAX_AXIS_TABLE_SIZE:
+                continue
+            tables[axis_code] = (
+                info.min,
+                [
+                    self._compute_stick_value(axis_code, raw, profile)
+                    for raw in range(info.min, info.max + 1)
+                ],
+            )
+        return tables
+
+    def _stick_value(self, axis_code, raw_value):
+        table = self.axis_tables.get(axis_code)
+        if table:
+            index = raw_value - table[0]
+            values = table[1]
+            if 0 <= index < len(values):
+                return values[index]
+        return self._compute_stick_value(axis_code, raw_value)
+
+    def _emit_button(self, action, value):
+        if self.use_mouse_mode and self._handle_mouse_bound_button(action.name, value):
+            return "mouse"
+        self._emit_mapped_key(action, value)
+        return "buttons"
+
+    def _emit_mapped_key(self, action, value):
+        if action.dpad:
+            self.key_dpad_state[action.name] = 1 if value else 0
             hat_x = self.key_dpad_state["BTN_DPAD_RIGHT"] - self.key_dpad_state["BTN_DPAD_LEFT"]
             hat_y = self.key_dpad_state["BTN_DPAD_DOWN"] - self.key_dpad_state["BTN_DPAD_UP"]
             self.virtual.emit_abs(ecodes.ABS_HAT0X, hat_x)
             self.virtual.emit_abs(ecodes.ABS_HAT0Y, hat_y)
             return
-        try:
-            mapped_code = getattr(ecodes, mapped_name)
-            self.virtual.emit_key(mapped_code, value)
-        except AttributeError:
-            pass
+        if action.code is not None:
+            self.virtual.emit_key(action.code, value)
 
     def _setup_mouse(self):
         if self.mouse_ui:
@@ -86,38 +414,82 @@ class InputProcessor:
             name="LJGM Virtual Mouse",
             bustype=ecodes.BUS_USB
         )
+        self.mouse_engine = MouseEngine(self.mouse_ui, self.mouse_rate)
+        self.mouse_engine.set_sensitivity(self.mouse_sensitivity)
 
     def set_mouse_mode(self, enabled):
         self.use_mouse_mode = enabled
         if enabled:
             self._setup_mouse()
+        elif self.mouse_engine:
+            self.mouse_engine.reset()
+
+    def set_mouse_rate(self, rate_hz):
+        self.mouse_rate = max(50, min(1000, int(rate_hz)))
+        if self.mouse_engine:
+            self.mouse_engine.set_rate(self.mouse_rate)
 
     def set_stick_sensitivity(self, percent):
         self.stick_sensitivity = max(0.1, min(5.0, percent / 100.0))
+        self._rebuild_axis_tables()
+
+    def set_deadzone(self, value):
+        self.deadzone = max(0, min(32767, int(value)))
+        self._rebuild_axis_tables()
+
+    def set_axis_info(self, axis_info):
+        # Calibration may have changed (new absinfo ranges). Tables depend
+        # only on the stick ranges, so a plain replug keeps them.
+        old = self.axis_info
+        self.axis_info = dict(axis_info)
+        if self._stick_ranges(old) != self._stick_ranges(self.axis_info):
+            self._rebuild_axis_tables()
+
+    def _stick_ranges(self, axis_info):
+        ranges = {}
+        for axis_code in self.STICK_OUTPUTS:
+            info = axis_info.get(axis_code)
+            if info:
+                ranges[axis_code] = (info.min, info.max)
+        return ranges
+
+    def set_ff_intensity(self, percent):
+        self.ff_intensity = percent
+        if self.force_feedback:
+            self.force_feedback.set_intensity(percent)
+
+    def set_ff_enabled(self, enabled):
+        self.ff_enabled = enabled
+        if self.force_feedback:
+            self.force_feedback.set_enabled(enabled)
 
     def set_mouse_sensitivity(self, percent):
         self.mouse_sensitivity = max(0.1, min(6.0, percent / 100.0))
-
-    def _axis_to_mouse_delta(self, value):
-        magnitude = abs(value)
-        if magnitude < 3000:
-            return 0
-        # Blend base speed with configurable sensitivity.
-        delta = max(1, int((magnitude / 2200.0) * self.mouse_sensitivity))
-        delta = min(40, delta)
-        return -delta if value < 0 else delta
+        if self.mouse_engine:
+            self.mouse_engine.set_sensitivity(self.mouse_sensitivity)
 
     def _emit_mouse_move(self, axis_code, value):
-        if not self.mouse_ui:
-            return
-
-        delta = self._axis_to_mouse_delta(value)
-        if delta == 0:
+        # The stick only sets cursor velocity; MouseEngine moves the cursor
+        # at a fixed rate for as long as the stick is deflected.
+        if self.mouse_engine:
+            self.mouse_engine.set_axis(axis_code, value, time.monotonic())
+
+    def poll_timeout(self):
+        engine = self.mouse_engine
+        if engine is None or engine.next_tick is None:
+            return None
+        return engine.timeout(time.monotonic())
+
+    def on_timer(self, now=None):
+        engine = self.mouse_engine
+        if engine is None or engine.next_tick is None:
             return
-
-        rel_code = ecodes.REL_X if axis_code == ecodes.ABS_X else ecodes.REL_Y
-        self.mouse_ui.write(ecodes.EV_REL, rel_code, delta)
-        self.mouse_ui.syn()
+        engine.tick(time.monotonic() if now is None else now)
+        stamp = self._mouse_motion_stamp
+        if stamp is not None and self.latency is not None:
+            # Stick motion reaches the cursor on the first tick after it.
+            self._mouse_motion_stamp = None
+            self.latency.record("mouse", time.time() - stamp)
 
     def _emit_mouse_from_hat(self, axis_code, axis_value):
         if not self.mouse_ui or axis_value == 0:
@@ -126,43 +498,36 @@ class InputProcessor:
         step = max(1, int(6 * self.mouse_sensitivity))
         delta = step if axis_value > 0 else -step
         rel_code = ecodes.REL_X if axis_code == ecodes.ABS_HAT0X else ecodes.REL_Y
-        self.mouse_ui.write(ecodes.EV_REL, rel_code, delta)
-        self.mouse_ui.syn()
+        self._mouse_write(ecodes.EV_REL, rel_code, delta)
 
     def _handle_mouse_bound_button(self, mapped_name, value):
         if not self.mouse_ui:
             return False
 
         if mapped_name == "BTN_A":
-            self.mouse_ui.write(ecodes.EV_KEY, ecodes.BTN_LEFT, value)
-            self.mouse_ui.syn()
+            self._mouse_write(ecodes.EV_KEY, ecodes.BTN_LEFT, value)
             return True
 
         if mapped_name == "BTN_B":
-            self.mouse_ui.write(ecodes.EV_KEY, ecodes.BTN_RIGHT, value)
-            self.mouse_ui.syn()
+            self._mouse_write(ecodes.EV_KEY, ecodes.BTN_RIGHT, value)
             return True
 
         if mapped_name == "BTN_Y":
-            self.mouse_ui.write(ecodes.EV_KEY, ecodes.BTN_MIDDLE, value)
-            self.mouse_ui.syn()
+            self._mouse_write(ecodes.EV_KEY, ecodes.BTN_MIDDLE, value)
             return True
 
         if mapped_name == "BTN_X" and value == 1:
             for _ in range(2):
-                self.mouse_ui.write(ecodes.EV_KEY, ecodes.BTN_LEFT, 1)
-                self.mouse_ui.write(ecodes.EV_KEY, ecodes.BTN_LEFT, 0)
-            self.mouse_ui.syn()
+                self._mouse_write(ecodes.EV_KEY, ecodes.BTN_LEFT, 1)
+                self._mouse_write(ecodes.EV_KEY, ecodes.BTN_LEFT, 0)
             return True
 
         if mapped_name == "BTN_TL" and value == 1:
-            self.mouse_ui.write(ecodes.EV_REL, ecodes.REL_WHEEL, 1)
-            self.mouse_ui.syn()
+            self._mouse_write(ecodes.EV_REL, ecodes.REL_WHEEL, 1)
             return True
 
         if mapped_name == "BTN_TR" and value == 1:
-            self.mouse_ui.write(ecodes.EV_REL, ecodes.REL_WHEEL, -1)
-            self.mouse_ui.syn()
+            self._mouse_write(ecodes.EV_REL, ecodes.REL_WHEEL, -1)
             return True
 
         return False
@@ -172,19 +537,11 @@ class InputProcessor:
         if old_value == value:
             return
 
-        old_mapped = None
-        if old_value in (-1, 1):
-            old_mapped = self.mapper.translate(
-                self.current_mode, code, old_value
-            )
+        old_mapped = self.profile.directions.get((code, old_value))
         if old_mapped:
             self._emit_mapped_key(old_mapped, 0)
 
-        new_mapped = None
-        if value in (-1, 1):
-            new_mapped = self.mapper.translate(
-                self.current_mode, code, value
-            )
+        new_mapped = self.profile.directions.get((code, value))
         if new_mapped:
             self._emit_mapped_key(new_mapped, 1)
 
@@ -192,46 +549,218 @@ class InputProcessor:
 
     def stop(self):
         self.running = False
+        self._wake()
+
+    def _wake(self):
+        with self._wake_lock:
+            if self._wake_w is None:
+                return
+            try:
+                os.write(self._wake_w, b"\0")
+            except OSError:
+                pass
+
+    def _on_wakeup(self):
         try:
-            self.physical.ungrab()
+            while os.read(self._wake_r, 64):
+                pass
+        except OSError:
+            pass
+        self._apply_pending_profile()
+
+    # ----------------- Reconnect -----------------
+
+    def release_outputs(self):
+        # Nothing may stay pressed or deflected while the pad is gone.
+        for action in list(self.held_keys.values()):
+            self._emit_button(action, 0)
+        self.held_keys = {}
+        for code, value in self.hat_state.items():
+            if value and code in self.profile.direction_axes:
+                action = self.profile.directions.get((code, value))
+                if action:
+                    self._emit_mapped_key(action, 0)
+            self.hat_state[code] = 0
+        for name in self.key_dpad_state:
+            self.key_dpad_state[name] = 0
+        self.virtual.emit_abs(ecodes.ABS_HAT0X, 0)
+        self.virtual.emit_abs(ecodes.ABS_HAT0Y, 0)
+        for output_code in self.STICK_OUTPUTS.values():
+            self.virtual.emit_abs(output_code, 0)
+        if self.mouse_engine:
+            self.mouse_engine.reset()
+        if self.mouse_ui:
+            for code in (ecodes.BTN_LEFT, ecodes.BTN_RIGHT, ecodes.BTN_MIDDLE):
+                self._mouse_write(ecodes.EV_KEY, code, 0)
+        self._latency_pending = {}
+        self._mouse_motion_stamp = None
+        self.flush()
+
+    def disconnect(self):
+        # The physical pad vanished. The caller must stop polling its fd
+        # first: the number is reused as soon as it is closed. Returns False
+        # when waiting is impossible and the session has to end.
+        self.release_outputs()
+        self.stop_recording()
+        if self.force_feedback:
+            self.force_feedback.set_physical(None)
+        try:
+            self.physical.close()
         except Exception:
             pass
+        self.disconnected = True
+
+        if self.device_waiter is None:
+            try:
+                self.device_waiter = DeviceWaiter(self.identity)
+            except OSError as e:
+                print(f"[!] Cannot wait for controller: {e}")
+                return False
+        self.aux_handlers[self.device_waiter.fileno()] = self._on_input_nodes
+        print(f"[!] {self.physical.name} disconnected, waiting for it to return...")
+
+        for path in self.device_waiter.existing():
+            if self._try_reconnect(path):
+                break
+        return True
+
+    def _on_input_nodes(self):
+        for path in self.device_waiter.changed():
+            if self._try_reconnect(path):
+                return
 
-    def cleanup(self):
+    def _try_reconnect(self, path):
+        device = self.device_waiter.open_match(path)
+        if device is None:
+            return False
+        try:
+            self.reconnect(device)
+        except OSError as e:
+            print(f"[!] Reconnect to {path} failed: {e}")
+            try:
+                device.close()
+            except Exception:
+                pass
+            return False
+        return True
+
+    def reconnect(self, device):
+        if self._grab_on_attach:
+            self._grab(device)
+        os.set_blocking(device.fd, False)
+        self.physical = device
+        # A reset can come back with different calibration.
+        self.set_axis_info(device.capabilities(absinfo=True).get(ecodes.EV_ABS, []))
+        if self.force_feedback:
+            self.force_feedback.set_physical(device)
+
+        waiter = self.device_waiter
+        self.device_waiter = None
+        self.aux_handlers.pop(waiter.fileno(), None)
+        waiter.close()
+        self.disconnected = False
+        print(f"[+] {device.name} reconnected at {device.path}")
+
+    def cleanup(self, close_device=True):
         if self.cleaned_up:
             return
         self.cleaned_up = True
 
+        self.stop_recording()
+        if self.device_waiter:
+            self.device_waiter.close()
+            self.device_waiter = None
+        if self.force_feedback:
+            try:
+                self.force_feedback.close()
+            except Exception:
+                pass
+            self.force_feedback = None
+
         try:
             self.physical.ungrab()
         except Exception:
             pass
-        try:
-            self.physical.close()
-        except Exception:
-            pass
+        if close_device:
+            try:
+                self.physical.close()
+            except Exception:
+                pass
         if self.mouse_ui:
             try:
                 self.mouse_ui.close()
             except Exception:
                 pass
             self.mouse_ui = None
+            self.mouse_engine = None
         if self.virtual:
             try:
                 self.virtual.close()
             except Exception:
                 pass
 
-    def start(self):
+        with self._wake_lock:
+            wake_r, wake_w = self._wake_r, self._wake_w
+            self._wake_r = self._wake_w = None
+        for fd in (wake_r, wake_w):
+            if fd is None:
+                continue
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def attach(self, grab=True):
 
         if self.use_mouse_mode:
             self._setup_mouse()
 
+        if grab:
+            self._grab()
+        self._grab_on_attach = grab
+        self.identity = device_identity(self.physical)
+
+        os.set_blocking(self.physical.fd, False)
+        self.set_batched_output(True)
+
+        if self._wake_r is None:
+            wake_r, wake_w = os.pipe()
+            os.set_blocking(wake_r, False)
+            os.set_blocking(wake_w, False)
+            with self._wake_lock:
+                self._wake_r, self._wake_w = wake_r, wake_w
+        self.aux_handlers = {self._wake_r: self._on_wakeup}
+        if self.watch_profile and not self.profile_watcher:
+            try:
+                self.profile_watcher = FileWatcher(self.mapper.path)
+            except OSError as e:
+                print(f"[!] Profile hot reload unavailable: {e}")
+        if self.profile_watcher:
+            self.aux_handlers[self.profile_watcher.fileno()] = self._on_profile_changed
+
+        if getattr(self.virtual, "ff_effects", None) and not self.force_feedback:
+            self.force_feedback = ForceFeedbackBridge(self.virtual.ui, self.physical)
+            self.force_feedback.set_intensity(self.ff_intensity)
+            self.force_feedback.set_enabled(self.ff_enabled)
+        if self.force_feedback:
+            self.aux_handlers[self.force_feedback.fileno()] = self._on_force_feedback
+
+        self.running = True
+        self._rebuild_axis_tables()
+
+    def _on_force_feedback(self):
+        try:
+            self.force_feedback.handle()
+        except OSError as e:
+            print(f"[!] Force feedback: {e}")
+
+    def _grab(self, device=None):
+        device = device or self.physical
         print("[+] Grabbing physical device...")
         grabbed = False
         for _ in range(100):
             try:
-                self.physical.grab()
+                device.grab()
                 grabbed = True
                 break
             except OSError as e:
@@ -243,96 +772,136 @@ class InputProcessor:
         if not grabbed:
             raise OSError(errno.EBUSY, "Failed to grab input device after retries")
 
-        os.set_blocking(self.physical.fd, False)
+    def start(self):
+
+        self.attach()
+        if self.realtime is not None:
+            self.realtime_report = self.realtime.apply()
         print("[+] Forwarding events with dynamic mapping...")
-        self.running = True
+
+        poller = select.epoll()
+        registered = set()
+        self._sync_poller(poller, registered)
 
         try:
             while self.running:
-                try:
-                    event = self.physical.read_one()
-                except BlockingIOError:
-                    time.sleep(0.005)
-                    continue
-                except OSError as e:
-                    # Non-blocking reads can also surface EAGAIN as plain OSError.
-                    if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
-                        time.sleep(0.005)
+                timeout = self.poll_timeout()
+                for fd, mask in poller.poll(-1 if timeout is None else timeout):
+                    handler = self.aux_handlers.get(fd)
+                    if handler:
+                        handler()
+                        self._sync_poller(poller, registered)
                         continue
-                    break
-
-                if event is None:
-                    time.sleep(0.005)
-                    continue
-
-                # ------------------------
-                # BUTTON EVENTS
-                # ------------------------
-                if event.type == ecodes.EV_KEY:
-
-                    mapped_name = self.mapper.translate(
-                        self.current_mode,
-                        event.code
-                    )
-
-                    if mapped_name:
-                        if self.use_mouse_mode and self._handle_mouse_bound_button(
-                            mapped_name, event.value
-                        ):
-                            continue
-                        self._emit_mapped_key(mapped_name, event.value)
-
-                # ------------------------
-                # AXIS EVENTS
-                # ------------------------
-                elif event.type == ecodes.EV_ABS:
-
-                    # Left Stick
-                    if event.code == ecodes.ABS_X:
-                        value = self.apply_deadzone(
-                            self.normalize_axis(event.code, event.value)
-                        )
-                        value = self._apply_stick_sensitivity(value)
-                        if self.use_mouse_mode:
-                            self._emit_mouse_move(event.code, value)
-                        else:
-                            self.virtual.emit_abs(ecodes.ABS_X, value)
-
-                    elif event.code == ecodes.ABS_Y:
-                        value = self.apply_deadzone(
-                            self.normalize_axis(event.code, event.value)
-                        )
-                        value = self._apply_stick_sensitivity(value)
-                        if self.use_mouse_mode:
-                            self._emit_mouse_move(event.code, value)
-                        else:
-                            self.virtual.emit_abs(ecodes.ABS_Y, value)
-
-                    # Right Stick (DragonRise)
-                    elif event.code == ecodes.ABS_Z:
-                        value = self.apply_deadzone(
-                            self.normalize_axis(event.code, event.value)
-                        )
-                        value = self._apply_stick_sensitivity(value)
-                        self.virtual.emit_abs(ecodes.ABS_RX, value)
-
-                    elif event.code == ecodes.ABS_RZ:
-                        value = self.apply_deadzone(
-                            self.normalize_axis(event.code, event.value)
-                        )
-                        value = self._apply_stick_sensitivity(value)
-                        self.virtual.emit_abs(ecodes.ABS_RY, value)
-
-                    # D-Pad
-                    elif event.code in (ecodes.ABS_HAT0X, ecodes.ABS_HAT0Y):
-                        if self.use_mouse_mode and self.current_mode == "digital":
-                            self._emit_mouse_from_hat(event.code, event.value)
-                            continue
-                        if self.mapper.has_axis_direction_mappings(
-                            self.current_mode, event.code
-                        ):
-                            self._handle_hat_mapping(event.code, event.value)
-                        else:
-                            self.virtual.emit_abs(event.code, event.value)
+                    if fd != self.physical.fd or self.disconnected:
+                        continue
+                    if mask & (select.EPOLLERR | select.EPOLLHUP) or not self.process_pending():
+                        poller.unregister(fd)
+                        registered.discard(fd)
+                        if not (self.auto_reconnect and self.running and self.disconnect()):
+                            self.running = False
+                            break
+                        self._sync_poller(poller, registered)
+                self.on_timer()
         finally:
+            poller.close()
             self.cleanup()
+
+    def _sync_poller(self, poller, registered):
+        # Reconcile epoll with the fds this processor currently owns; they
+        # change on disconnect/reconnect and when recording starts.
+        wanted = set(self.aux_handlers)
+        if not self.disconnected:
+            wanted.add(self.physical.fd)
+        for fd in registered - wanted:
+            try:
+                poller.unregister(fd)
+            except (OSError, ValueError):
+                pass
+        for fd in wanted - registered:
+            poller.register(fd, select.EPOLLIN)
+        registered.clear()
+        registered.update(wanted)
+
+    def process_pending(self):
+        # Drain everything the kernel has queued; returns False once the
+        # device is gone so the caller can tear the session down.
+        while self.running:
+            recorder = self.recorder
+            try:
+                for event in self.physical.read():
+                    if recorder:
+                        recorder.write(event)
+                    self.handle_event(event)
+            except BlockingIOError:
+                return True
+            except OSError as e:
+                # Non-blocking reads can also surface EAGAIN as plain OSError.
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return True
+                return False
+        return True
+
+    def handle_event(self, event):
+
+        # ------------------------
+        # FRAME BOUNDARY
+        # ------------------------
+        if event.type == ecodes.EV_SYN:
+            if event.code == ecodes.SYN_REPORT:
+                self.flush()
+                ring = self.frame_ring
+                if ring is not None:
+                    self._publish_frame(ring, event)
+
+        # ------------------------
+        # BUTTON EVENTS
+        # ------------------------
+        elif event.type == ecodes.EV_KEY:
+
+            action = self.profile.keys.get(event.code)
+
+            if action:
+                if event.value:
+                    self.held_keys[event.code] = action
+                else:
+                    self.held_keys.pop(event.code, None)
+                event_class = self._emit_button(action, event.value)
+                if self.latency is not None:
+                    self._mark_latency(event, event_class)
+
+        # ------------------------
+        # AXIS EVENTS
+        # ------------------------
+        elif event.type == ecodes.EV_ABS:
+
+            # Sticks
+            output_code = self.STICK_OUTPUTS.get(event.code)
+            if output_code is not None:
+                value = self._stick_value(event.code, event.value)
+                if self.frame_ring is not None:
+                    index = self.RING_AXES[event.code]
+                    self._ring_raw[index] = self.normalize_axis(event.code, event.value)
+                    self._ring_out[index] = value
+                if self.use_mouse_mode and output_code in (ecodes.ABS_X, ecodes.ABS_Y):
+                    self._emit_mouse_move(event.code, value)
+                    if self.latency is not None and self._mouse_motion_stamp is None:
+                        self._mouse_motion_stamp = event.sec + event.usec / 1e6
+                else:
+                    self.virtual.emit_abs(output_code, value)
+                    if self.latency is not None:
+                        self._mark_latency(event, "sticks")
+
+            # D-Pad
+            elif event.code in (ecodes.ABS_HAT0X, ecodes.ABS_HAT0Y):
+                if self.use_mouse_mode and self.current_mode == "digital":
+                    self._emit_mouse_from_hat(event.code, event.value)
+                    if self.latency is not None:
+                        self._mark_latency(event, "mouse")
+                    return
+                if event.code in self.profile.direction_axes:
+                    self._handle_hat_mapping(event.code, event.value)
+                else:
+                    self.virtual.emit_abs(event.code, event.value)
+                    self.hat_state[event.code] = event.value
+                if self.latency is not None:
+                    self._mark_latency(event, "hat")
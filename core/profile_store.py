@@ -0,0 +1,118 @@
+import copy
+import os
+import re
+import threading
+
+from core.mapper import CONFIG_PATH, Mapper
+
+PROFILE_DIR = "config/profiles"
+
+
+def device_ids(device):
+    vid = format(device.info.vendor, "04x")
+    pid = format(device.info.product, "04x")
+    uniq = getattr(device, "uniq", "") or ""
+    return vid, pid, uniq
+
+
+def profile_key(vid, pid, uniq=None):
+    key = f"{vid.lower()}_{pid.lower()}"
+    if uniq:
+        key += "_" + re.sub(r"[^0-9a-z]+", "-", uniq.lower()).strip("-")
+    return key
+
+
+class ProfileStore:
+
+    # Per-controller mapping profiles stored as config/profiles/<vid>_<pid>.json
+    # or <vid>_<pid>_<uniq>.json. The index is built from file names only, so
+    # lookups never parse profiles that are not in use; each profile is
+    # loaded once and its compiled tables are cached by its Mapper.
+
+    def __init__(self, directory=PROFILE_DIR, default_path=CONFIG_PATH):
+        self.directory = directory
+        self.default_path = default_path
+        self.index = {}
+        self._mappers = {}
+        self._lock = threading.Lock()
+        # Directory mtime the index was built from.
+        self._scanned = None
+        self.rescan()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def refresh(self):
+        # Profiles created or removed by another process (the GUI wizard
+        # while the daemon runs, or by hand) show up on the next lookup.
+        if self._mtime() != self._scanned:
+            self.rescan()
+
+    def rescan(self):
+        index = {}
+        # Taken first: a change during listdir() triggers another rescan.
+        scanned = self._mtime()
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            if name.endswith(".json") and not name.startswith("."):
+                index[name[:-5]] = os.path.join(self.directory, name)
+        with self._lock:
+            self.index = index
+            self._scanned = scanned
+
+    def path_for(self, device):
+        vid, pid, uniq = device_ids(device)
+        self.refresh()
+        index = self.index
+        if uniq:
+            path = index.get(profile_key(vid, pid, uniq))
+            if path:
+                return path
+        return index.get(profile_key(vid, pid), self.default_path)
+
+    def has_profile(self, device):
+        return self.path_for(device) != self.default_path
+
+    def default_mapper(self):
+        return self._mapper(self.default_path)
+
+    def mapper_for(self, device):
+        return self._mapper(self.path_for(device))
+
+    def _mapper(self, path):
+        with self._lock:
+            mapper = self._mappers.get(path)
+            if mapper is None:
+                mapper = Mapper(path)
+                self._mappers[path] = mapper
+            return mapper
+
+    def compiled_for(self, device, mode="analog"):
+        return self.mapper_for(device).compile(mode)
+
+    def create_for(self, device, per_unit=False):
+        # New per-controller profile seeded from whatever the device uses now.
+        vid, pid, uniq = device_ids(device)
+        key = profile_key(vid, pid, uniq if per_unit else None)
+        path = os.path.join(self.directory, key + ".json")
+
+        seed = self.mapper_for(device)
+        mapper = Mapper(path, autoload=False)
+        mapper.data = copy.deepcopy(seed.data)
+        mapper.save()
+
+        with self._lock:
+            self.index[key] = path
+            self._mappers[path] = mapper
+        return mapper
+
+    def forget(self, path):
+        # Drop a cached profile so the next lookup reloads it from disk.
+        with self._lock:
+            self._mappers.pop(path, None)
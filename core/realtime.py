@@ -0,0 +1,172 @@
+import ctypes
+import os
+import resource
+
+from core.watch import _load_libc
+
+
+# sys/mman.h
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+POLICIES = {
+    "other": getattr(os, "SCHED_OTHER", 0),
+    "fifo": getattr(os, "SCHED_FIFO", 1),
+    "rr": getattr(os, "SCHED_RR", 2),
+}
+_POLICY_NAMES = {value: name for name, value in POLICIES.items()}
+
+
+def parse_cpus(value):
+    # "2,3" / "0-3,6" / [2, 3] -> sorted list of CPU numbers.
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, (list, tuple)):
+            cpus = {int(cpu) for cpu in value}
+        else:
+            cpus = set()
+            for part in str(value).split(","):
+                part = part.strip()
+                if not part:
+                    continue
+                if "-" in part:
+                    first, last = part.split("-", 1)
+                    cpus.update(range(int(first), int(last) + 1))
+                else:
+                    cpus.add(int(part))
+    except ValueError:
+        raise ValueError(f"bad CPU list: {value}") from None
+    if not cpus or min(cpus) < 0:
+        raise ValueError(f"bad CPU list: {value}")
+    return sorted(cpus)
+
+
+def thread_switches():
+    # Context switches of the calling thread; involuntary ones are the
+    # preemptions a real-time policy is meant to prevent.
+    usage = resource.getrusage(getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF))
+    return {"voluntary": usage.ru_nvcsw, "involuntary": usage.ru_nivcsw}
+
+
+def normal_scheduling():
+    # New threads inherit the policy of the thread that starts them. Work
+    # the real-time loop hands to a worker (table builds, profile parsing)
+    # calls this first so it never holds the loop's core at its priority.
+    try:
+        if os.sched_getscheduler(0) != POLICIES["other"]:
+            os.sched_setscheduler(0, POLICIES["other"], os.sched_param(0))
+    except OSError:
+        pass
+
+
+class RealtimeConfig:
+
+    # Opt-in scheduling for the thread that runs the input loop. Every step
+    # is best-effort: without CAP_SYS_NICE / CAP_IPC_LOCK (or matching
+    # RLIMIT_RTPRIO / RLIMIT_MEMLOCK) the step is skipped and the reason is
+    # reported, and the loop runs with whatever was granted.
+
+    DEFAULT_PRIORITY = 10
+
+    def __init__(self, policy=None, priority=None, nice=None, cpus=None, lock_memory=False):
+        policy = (policy or "other").lower()
+        if policy not in POLICIES:
+            raise ValueError(f"unknown scheduling policy: {policy}")
+        self.policy = policy
+        self.priority = self.DEFAULT_PRIORITY if priority is None else int(priority)
+        if policy != "other":
+            low = os.sched_get_priority_min(POLICIES[policy])
+            high = os.sched_get_priority_max(POLICIES[policy])
+            if not low <= self.priority <= high:
+                raise ValueError(f"{policy} priority must be {low}-{high}")
+        self.nice = None if nice is None else int(nice)
+        if self.nice is not None and not -20 <= self.nice <= 19:
+            raise ValueError("nice must be -20..19")
+        self.cpus = parse_cpus(cpus)
+        self.lock_memory = bool(lock_memory)
+
+    def enabled(self):
+        return (
+            self.policy != "other"
+            or self.nice is not None
+            or self.cpus is not None
+            or self.lock_memory
+        )
+
+    def apply(self):
+        # Applies to the calling thread (Linux scheduling attributes are
+        # per thread) and returns what actually took effect.
+        errors = []
+
+        if self.cpus is not None:
+            try:
+                os.sched_setaffinity(0, self.cpus)
+            except (OSError, ValueError) as e:
+                errors.append(f"affinity: {e}")
+
+        if self.policy != "other":
+            try:
+                os.sched_setscheduler(
+                    0, POLICIES[self.policy], os.sched_param(self.priority)
+                )
+            except OSError as e:
+                errors.append(f"{self.policy}: {e}")
+
+        if self.nice is not None:
+            try:
+                os.setpriority(os.PRIO_PROCESS, 0, self.nice)
+            except OSError as e:
+                errors.append(f"nice: {e}")
+
+        memory_locked = False
+        if self.lock_memory:
+            memory_locked, error = self._lock_memory()
+            if error:
+                errors.append(f"mlockall: {error}")
+
+        report = self.current()
+        report["memory_locked"] = memory_locked
+        report["errors"] = errors
+        for error in errors:
+            print(f"[!] Real-time setting not applied ({error})")
+        if self.enabled() and not errors:
+            print(f"[+] Real-time: {self.describe(report)}")
+        return report
+
+    @staticmethod
+    def _lock_memory():
+        # MCL_FUTURE under a finite RLIMIT_MEMLOCK would make later
+        # allocations fail, so only the current pages are locked then.
+        soft, _ = resource.getrlimit(resource.RLIMIT_MEMLOCK)
+        unlimited = soft == resource.RLIM_INFINITY or os.geteuid() == 0
+        flags = MCL_CURRENT | MCL_FUTURE if unlimited else MCL_CURRENT
+        try:
+            result = _load_libc().mlockall(flags)
+        except (OSError, AttributeError) as e:
+            return False, str(e)
+        if result != 0:
+            err = ctypes.get_errno()
+            return False, os.strerror(err)
+        return "all" if flags & MCL_FUTURE else "current", None
+
+    @staticmethod
+    def current():
+        policy = os.sched_getscheduler(0)
+        return {
+            "policy": _POLICY_NAMES.get(policy, str(policy)),
+            "priority": os.sched_getparam(0).sched_priority,
+            "nice": os.getpriority(os.PRIO_PROCESS, 0),
+            "cpus": sorted(os.sched_getaffinity(0)),
+        }
+
+    @staticmethod
+    def describe(report):
+        parts = [report["policy"]]
+        if report["policy"] != "other":
+            parts[0] += f" {report['priority']}"
+        parts.append(f"nice {report['nice']}")
+        parts.append("cpus " + ",".join(str(cpu) for cpu in report["cpus"]))
+        if report.get("memory_locked"):
+            parts.append(f"mlock {report['memory_locked']}")
+        return " | ".join(parts)
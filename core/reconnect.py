@@ -0,0 +1,62 @@
+import os
+
+from core.device_detector import INPUT_DIR, DeviceDetector, device_identity
+from core.watch import IN_ATTRIB, IN_CREATE, IN_MOVED_TO, IN_Q_OVERFLOW, Inotify
+
+
+class DeviceWaiter:
+
+    # Waits for a specific controller to come back after it vanished. The
+    # inotify fd is polled by the owning event loop, so waiting costs nothing
+    # until a node appears in /dev/input. IN_ATTRIB catches the second chance
+    # when the node was created before udev made it readable.
+
+    MASK = IN_CREATE | IN_ATTRIB | IN_MOVED_TO
+
+    def __init__(self, identity, input_dir=INPUT_DIR, detector=None):
+        self.identity = identity
+        self.input_dir = input_dir
+        self.detector = detector or DeviceDetector(input_dir=input_dir)
+        self.inotify = Inotify()
+        try:
+            self.inotify.add_watch(input_dir, self.MASK)
+        except OSError:
+            self.inotify.close()
+            raise
+
+    def fileno(self):
+        return self.inotify.fd
+
+    def changed(self):
+        paths = []
+        for _, mask, name in self.inotify.read():
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: look at every node.
+                paths.extend(p for p in self.existing() if p not in paths)
+            elif name.startswith("event"):
+                path = os.path.join(self.input_dir, name)
+                if path not in paths:
+                    paths.append(path)
+        return paths
+
+    def existing(self):
+        # Nodes already present, for a pad that returned before the watch
+        # was set up.
+        try:
+            names = os.listdir(self.input_dir)
+        except OSError:
+            return []
+        return [os.path.join(self.input_dir, n) for n in sorted(names) if n.startswith("event")]
+
+    def open_match(self, path):
+        record = self.detector.probe(path)
+        if record is None or device_identity(record) != self.identity:
+            return None
+        try:
+            return record.open()
+        except OSError:
+            # Not readable yet; IN_ATTRIB will bring us back here.
+            return None
+
+    def close(self):
+        self.inotify.close()
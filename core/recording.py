@@ -0,0 +1,334 @@
+import argparse
+import errno
+import os
+import select
+import struct
+import threading
+import time
+from collections import deque
+
+from evdev import AbsInfo, DeviceInfo, InputDevice, InputEvent, ecodes
+
+
+# File layout (little endian):
+#   header  : MAGIC, bustype, vendor, product, version
+#   strings : name, phys, uniq             (u16 length + utf-8 bytes each)
+#   keys    : u16 count, u16 code * count
+#   abs     : u16 count, (u16 code, i32 value/min/max/fuzz/flat/resolution) * count
+#   events  : (u32 sec, u32 usec, u16 type, u16 code, i32 value) until EOF
+
+MAGIC = b"LJGMREC1"
+HEADER = struct.Struct("<8sHHHH")
+U16 = struct.Struct("<H")
+ABS_ENTRY = struct.Struct("<Hiiiiii")
+EVENT = struct.Struct("<IIHHi")
+
+
+class SessionRecorder:
+
+    def __init__(self, path, device):
+        self.path = path
+        self.file = open(path, "wb")
+        self.count = 0
+        self._write_header(device)
+
+    def _write_string(self, text):
+        data = (text or "").encode("utf-8")[:0xffff]
+        self.file.write(U16.pack(len(data)))
+        self.file.write(data)
+
+    def _write_header(self, device):
+        info = device.info
+        self.file.write(
+            HEADER.pack(MAGIC, info.bustype, info.vendor, info.product, info.version)
+        )
+        self._write_string(device.name)
+        self._write_string(getattr(device, "phys", ""))
+        self._write_string(getattr(device, "uniq", ""))
+
+        caps = device.capabilities(absinfo=True)
+        keys = caps.get(ecodes.EV_KEY, [])
+        self.file.write(U16.pack(len(keys)))
+        for code in keys:
+            self.file.write(U16.pack(code))
+
+        axes = caps.get(ecodes.EV_ABS, [])
+        self.file.write(U16.pack(len(axes)))
+        for code, absinfo in axes:
+            self.file.write(ABS_ENTRY.pack(code, *absinfo))
+
+    def write(self, event):
+        self.file.write(
+            EVENT.pack(event.sec, event.usec, event.type, event.code, event.value)
+        )
+        self.count += 1
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class SessionRecording:
+
+    def __init__(self, name, info, phys, uniq, keys, absinfo, events):
+        self.name = name
+        self.info = info
+        self.phys = phys
+        self.uniq = uniq
+        self.keys = keys
+        self.absinfo = absinfo
+        self.events = events
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path}: not an LJGM recording")
+        magic, bustype, vendor, product, version = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not an LJGM recording")
+        try:
+            return cls._parse(data, HEADER.size, bustype, vendor, product, version)
+        except struct.error:
+            raise ValueError(f"{path}: truncated LJGM recording") from None
+
+    @classmethod
+    def _parse(cls, data, offset, bustype, vendor, product, version):
+        def read_string():
+            nonlocal offset
+            (length,) = U16.unpack_from(data, offset)
+            offset += U16.size
+            text = data[offset:offset + length].decode("utf-8", "replace")
+            offset += length
+            return text
+
+        name = read_string()
+        phys = read_string()
+        uniq = read_string()
+
+        (key_count,) = U16.unpack_from(data, offset)
+        offset += U16.size
+        keys = [
+            U16.unpack_from(data, offset + i * U16.size)[0]
+            for i in range(key_count)
+        ]
+        offset += key_count * U16.size
+
+        (abs_count,) = U16.unpack_from(data, offset)
+        offset += U16.size
+        absinfo = []
+        for _ in range(abs_count):
+            code, *fields = ABS_ENTRY.unpack_from(data, offset)
+            absinfo.append((code, AbsInfo(*fields)))
+            offset += ABS_ENTRY.size
+
+        usable = (len(data) - offset) // EVENT.size * EVENT.size
+        events = [
+            InputEvent(sec, usec, event_type, code, value)
+            for sec, usec, event_type, code, value in EVENT.iter_unpack(
+                data[offset:offset + usable]
+            )
+        ]
+
+        info = DeviceInfo(bustype, vendor, product, version)
+        return cls(name, info, phys, uniq, keys, absinfo, events)
+
+    def frames(self):
+        # Split the event stream at SYN_REPORT boundaries.
+        frame = []
+        for event in self.events:
+            frame.append(event)
+            if event.type == ecodes.EV_SYN and event.code == ecodes.SYN_REPORT:
+                yield frame
+                frame = []
+        if frame:
+            yield frame
+
+
+def _timestamp(event):
+    return event.sec + event.usec / 1e6
+
+
+def _restamp(event, now):
+    sec = int(now)
+    return InputEvent(sec, int((now - sec) * 1e6), event.type, event.code, event.value)
+
+
+def replay(recording, processor, realtime=True, speed=1.0):
+    # Feed a recording straight into InputProcessor.handle_event (or any
+    # object with that method). With realtime=False it runs as fast as
+    # possible and keeps the original timestamps.
+    start = time.monotonic()
+    first = None
+    for frame in recording.frames():
+        if realtime:
+            stamp = _timestamp(frame[0])
+            if first is None:
+                first = stamp
+            delay = start + (stamp - first) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.time()
+            frame = [_restamp(event, now) for event in frame]
+        for event in frame:
+            processor.handle_event(event)
+
+
+class ReplayDevice:
+
+    # Stand-in for evdev.InputDevice that plays a recording through a pipe,
+    # so a running InputProcessor/ControllerService loop reads it exactly
+    # like a physical pad. Once the recording ends reads fail with ENODEV.
+
+    def __init__(self, recording, path="/dev/input/replay"):
+        self.recording = recording
+        self.path = path
+        self.name = recording.name
+        self.phys = recording.phys
+        self.uniq = recording.uniq
+        self.info = recording.info
+        self._r, self._w = os.pipe()
+        os.set_blocking(self._r, False)
+        # Wakeup bytes only; a full pipe already means "events pending".
+        os.set_blocking(self._w, False)
+        self.fd = self._r
+        self.queue = deque()
+        self.finished = False
+        self._thread = None
+        self._stopped = threading.Event()
+        # Guards _w against close() while the feeder is writing to it.
+        self._lock = threading.Lock()
+
+    def capabilities(self, verbose=False, absinfo=True):
+        axes = self.recording.absinfo
+        if not absinfo:
+            axes = [code for code, _ in axes]
+        return {
+            ecodes.EV_SYN: [ecodes.SYN_REPORT],
+            ecodes.EV_KEY: list(self.recording.keys),
+            ecodes.EV_ABS: list(axes),
+        }
+
+    def play(self, realtime=True, speed=1.0):
+        self._thread = threading.Thread(
+            target=self._feed, args=(realtime, speed), daemon=True
+        )
+        self._thread.start()
+
+    def _feed(self, realtime, speed):
+        start = time.monotonic()
+        first = None
+        for frame in self.recording.frames():
+            if self._stopped.is_set():
+                return
+            if realtime:
+                stamp = _timestamp(frame[0])
+                if first is None:
+                    first = stamp
+                delay = start + (stamp - first) / speed - time.monotonic()
+                if delay > 0 and self._stopped.wait(delay):
+                    return
+            # Timestamps are rebased to "now" so latency stats stay meaningful.
+            now = time.time()
+            self.queue.extend(_restamp(event, now) for event in frame)
+            self._notify()
+        self.finished = True
+        self._notify()
+
+    def _notify(self):
+        with self._lock:
+            if self._w is None:
+                return
+            try:
+                os.write(self._w, b"\0")
+            except OSError:
+                pass
+
+    def read(self):
+        try:
+            while os.read(self._r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        except OSError:
+            raise OSError(errno.ENODEV, "Replay device closed")
+
+        events = []
+        while self.queue:
+            events.append(self.queue.popleft())
+        if events:
+            return iter(events)
+        if self.finished:
+            raise OSError(errno.ENODEV, "Recording finished")
+        raise BlockingIOError(errno.EAGAIN, "No events")
+
+    def grab(self):
+        pass
+
+    def ungrab(self):
+        pass
+
+    def close(self):
+        # Stop the feeder before its fds go away (and get reused).
+        self._stopped.set()
+        thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join()
+        with self._lock:
+            fds = (self._r, self._w)
+            self._r = self._w = None
+        for fd in fds:
+            if fd is None:
+                continue
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def record(device, path, duration=None):
+    recorder = SessionRecorder(path, device)
+    deadline = time.monotonic() + duration if duration else None
+    try:
+        while True:
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+            ready, _, _ = select.select([device.fd], [], [], timeout)
+            if ready:
+                for event in device.read():
+                    recorder.write(event)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.close()
+    return recorder.count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or inspect LJGM controller sessions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    record_cmd = sub.add_parser("record")
+    record_cmd.add_argument("device")
+    record_cmd.add_argument("output")
+    record_cmd.add_argument("--duration", type=float)
+    info_cmd = sub.add_parser("info")
+    info_cmd.add_argument("recording")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        count = record(InputDevice(args.device), args.output, args.duration)
+        print(f"[+] Recorded {count} events to {args.output}")
+    else:
+        rec = SessionRecording.load(args.recording)
+        span = 0.0
+        if rec.events:
+            span = _timestamp(rec.events[-1]) - _timestamp(rec.events[0])
+        print(f"Device : {rec.name} ({rec.info.vendor:04x}:{rec.info.product:04x})")
+        print(f"Events : {len(rec.events)} in {sum(1 for _ in rec.frames())} frames")
+        print(f"Length : {span:.3f} s")
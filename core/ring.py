@@ -0,0 +1,159 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+# Virtual buttons in mask bit order.
+BUTTON_NAMES = (
+    "BTN_A", "BTN_B", "BTN_X", "BTN_Y",
+    "BTN_TL", "BTN_TR", "BTN_TL2", "BTN_TR2",
+    "BTN_SELECT", "BTN_START", "BTN_THUMBL", "BTN_THUMBR",
+    "BTN_DPAD_UP", "BTN_DPAD_DOWN", "BTN_DPAD_LEFT", "BTN_DPAD_RIGHT",
+)
+BUTTON_BITS = {name: 1 << bit for bit, name in enumerate(BUTTON_NAMES)}
+
+# head sequence, capacity
+_HEADER = struct.Struct("<QI4x")
+# seq, timestamp, raw LX LY RX RY, out LX LY RX RY, hat x y, buttons, seq
+_RECORD = struct.Struct("<Qd4h4h2b2xIQ")
+
+
+def shared_ring_path(name):
+    # tmpfs-backed where available, so publishing never touches a disk.
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, name)
+
+
+class InputFrame:
+
+    __slots__ = ("seq", "timestamp", "raw", "out", "hat", "buttons")
+
+    def __init__(self, seq, timestamp, raw, out, hat, buttons):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.raw = raw
+        self.out = out
+        self.hat = hat
+        self.buttons = buttons
+
+    def pressed(self, name):
+        return bool(self.buttons & BUTTON_BITS.get(name, 0))
+
+
+class FrameRing:
+
+    # Fixed-size single-writer ring of input frames. The processor writes a
+    # record in place and then bumps the head; readers never block it and
+    # simply drop frames they were too slow for. Each record carries its
+    # sequence number at both ends, so a reader (possibly in another process
+    # on a shared-memory buffer) can reject one that was being overwritten.
+
+    def __init__(self, capacity=256, buffer=None):
+        if buffer is None:
+            buffer = bytearray(self.buffer_size(capacity))
+            _HEADER.pack_into(buffer, 0, 0, capacity)
+        else:
+            _, capacity = _HEADER.unpack_from(buffer, 0)
+            if capacity <= 0 or len(buffer) < self.buffer_size(capacity):
+                raise ValueError("buffer does not hold a frame ring")
+        self.buffer = memoryview(buffer)
+        self.capacity = capacity
+        self._mmap = None
+        # Writer-side copy of the head; there is only ever one writer.
+        self._seq = _HEADER.unpack_from(self.buffer, 0)[0]
+
+    @staticmethod
+    def buffer_size(capacity):
+        return _HEADER.size + capacity * _RECORD.size
+
+    @classmethod
+    def initialize(cls, buffer, capacity):
+        # Lay a ring out in caller-provided memory (e.g. shared memory).
+        _HEADER.pack_into(buffer, 0, 0, capacity)
+        return cls(capacity, buffer)
+
+    @classmethod
+    def create_file(cls, path, capacity=256):
+        # Writer side of a ring shared with another process through a file.
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            size = cls.buffer_size(capacity)
+            os.ftruncate(fd, size)
+            mapped = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        ring = cls.initialize(mapped, capacity)
+        ring._mmap = mapped
+        return ring
+
+    @classmethod
+    def open_file(cls, path):
+        # Read-only view of a ring created with create_file().
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            mapped = mmap.mmap(fd, 0, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        try:
+            ring = cls(buffer=mapped)
+        except ValueError:
+            mapped.close()
+            raise
+        ring._mmap = mapped
+        return ring
+
+    def close(self):
+        self.buffer.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def head(self):
+        return _HEADER.unpack_from(self.buffer, 0)[0]
+
+    # ----------------- Writer -----------------
+
+    def publish(self, raw, out, hat_x, hat_y, buttons, timestamp=None):
+        seq = self._seq + 1
+        self._seq = seq
+        offset = _HEADER.size + (seq % self.capacity) * _RECORD.size
+        _RECORD.pack_into(
+            self.buffer,
+            offset,
+            seq,
+            time.monotonic() if timestamp is None else timestamp,
+            raw[0], raw[1], raw[2], raw[3],
+            out[0], out[1], out[2], out[3],
+            hat_x, hat_y,
+            buttons,
+            seq,
+        )
+        _HEADER.pack_into(self.buffer, 0, seq, self.capacity)
+
+    # ----------------- Readers -----------------
+
+    def _read(self, seq):
+        offset = _HEADER.size + (seq % self.capacity) * _RECORD.size
+        fields = _RECORD.unpack_from(self.buffer, offset)
+        if fields[0] != seq or fields[-1] != seq:
+            return None
+        return InputFrame(seq, fields[1], fields[2:6], fields[6:10], fields[10:12], fields[12])
+
+    def latest(self):
+        head = self.head()
+        return self._read(head) if head else None
+
+    def read_since(self, seq, limit=None):
+        # Frames newer than seq, oldest first; frames already overwritten
+        # are skipped.
+        head = self.head()
+        first = max(seq + 1, head - self.capacity + 2, 1)
+        if limit is not None:
+            first = max(first, head - limit + 1)
+        frames = []
+        for index in range(first, head + 1):
+            frame = self._read(index)
+            if frame is not None:
+                frames.append(frame)
+        return frames
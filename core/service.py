@@ -0,0 +1,397 @@
+import os
+import select
+import threading
+import time
+from collections import deque
+
+from evdev import ecodes
+
+from core.device_detector import device_identity
+from core.processor import InputProcessor
+from core.virtual_gamepad import VirtualGamepad
+from core.watch import DirectoryWatcher
+
+
+class ControllerService:
+
+    MAX_SLOTS = 16
+
+    def __init__(self, profiles=None, auto_reconnect=True):
+        # Optional ProfileStore: each pad gets its own VID/PID/uniq profile.
+        self.profiles = profiles
+        # Move running pads to per-device profiles created (or removed)
+        # while the service runs.
+        self.watch_profiles = False
+        self._profiles_watcher = None
+        # Unplugged pads keep their slot and virtual device until they return.
+        self.auto_reconnect = auto_reconnect
+        # slot number (1-based) -> InputProcessor
+        self.slots = {}
+        # device identity -> last slot it used, so a pad that reconnects
+        # gets its old player number back.
+        self.identities = {}
+        self.running = False
+        self.on_detach = None
+        # Called with processors added by hotplug, before they attach.
+        self.on_attach = None
+        # Called once the initial devices are attached and polled.
+        self.on_started = None
+        self.registry = None
+        self.auto_add = False
+        # Optional RealtimeConfig applied to the thread that calls run();
+        # realtime_report records what the kernel actually granted.
+        self.realtime = None
+        self.realtime_report = None
+
+        self._by_fd = {}
+        # Per-processor auxiliary fds (wakeups, profile watchers, reconnect
+        # waiters): fd -> owning processor.
+        self._aux = {}
+        # Service-level fds (control socket and its clients): fd -> handler
+        # called with the epoll event mask.
+        self._handlers = {}
+        self._handler_events = {}
+        self._commands = deque()
+        self._lock = threading.Lock()
+        self._poller = None
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+
+    # ----------------- Slots -----------------
+
+    device_identity = staticmethod(device_identity)
+
+    def _assign_slot(self, identity):
+        remembered = self.identities.get(identity)
+        if remembered is not None and remembered not in self.slots:
+            return remembered
+
+        taken = set(self.slots) | set(self.identities.values())
+        for slot in range(1, self.MAX_SLOTS + 1):
+            if slot not in taken:
+                return slot
+        # Every slot has been remembered at some point; reuse a free one.
+        for slot in range(1, self.MAX_SLOTS + 1):
+            if slot not in self.slots:
+                return slot
+        return None
+
+    @staticmethod
+    def virtual_name(slot):
+        if slot == 1:
+            return "LJGM Virtual Gamepad"
+        return f"LJGM Virtual Gamepad P{slot}"
+
+    def processors(self):
+        return [self.slots[slot] for slot in sorted(self.slots)]
+
+    def processor(self, slot):
+        return self.slots.get(slot)
+
+    def latency_stats(self):
+        return {
+            slot: processor.latency_stats()
+            for slot, processor in sorted(self.slots.items())
+            if processor.latency is not None
+        }
+
+    # ----------------- Devices -----------------
+
+    def add_devices(self, devices, mapper=None):
+        # Sort by physical port so the same wiring yields the same slots.
+        ordered = sorted(
+            devices, key=lambda dev: (getattr(dev, "phys", "") or "", dev.path)
+        )
+        return [self.add_device(dev, mapper=mapper) for dev in ordered]
+
+    def add_device(self, device, mapper=None):
+        if mapper is None and self.profiles is not None:
+            mapper = self.profiles.mapper_for(device)
+        identity = self.device_identity(device)
+        with self._lock:
+            slot = self._assign_slot(identity)
+            if slot is None:
+                raise RuntimeError("No free player slot")
+            virtual = VirtualGamepad(
+                name=self.virtual_name(slot),
+                ff_effects=self._ff_effects(device),
+            )
+            processor = InputProcessor(device, virtual, mapper=mapper)
+            processor.auto_reconnect = self.auto_reconnect
+            processor.slot = slot
+            self.slots[slot] = processor
+            self.identities[identity] = slot
+
+        self._commands.append(("attach", processor))
+        self._wake()
+        return processor
+
+    @staticmethod
+    def _ff_effects(device):
+        try:
+            return device.capabilities().get(ecodes.EV_FF, [])
+        except OSError:
+            return []
+
+    def attach_registry(self, registry, auto_add=False):
+        # Hotplug: pads that come back to a remembered slot are re-added;
+        # with auto_add every new controller joins the session (auto_add may
+        # also be a predicate taking the DeviceRecord).
+        self.registry = registry
+        self.auto_add = auto_add
+        registry.add_listener(self._on_registry_event)
+
+    def _on_registry_event(self, event, record):
+        if event != "added" or record.score <= 0:
+            return
+        auto_add = self.auto_add
+        if callable(auto_add):
+            auto_add = auto_add(record)
+        if not auto_add and self.device_identity(record) not in self.identities:
+            return
+        self._commands.append(("open", record))
+        self._wake()
+
+    def _open_record(self, record):
+        identity = self.device_identity(record)
+        for processor in self.slots.values():
+            if processor.physical.path == record.path:
+                return
+            if processor.identity == identity:
+                # Disconnected pad; it reconnects through its own waiter.
+                return
+        try:
+            device = record.open()
+        except OSError as e:
+            print(f"[!] Cannot open {record.path}: {e}")
+            return
+        processor = self.add_device(device)
+        if self.on_attach:
+            self.on_attach(processor)
+
+    def _watch_profiles(self):
+        try:
+            self._profiles_watcher = DirectoryWatcher(self.profiles.directory, ".json")
+        except OSError as e:
+            print(f"[!] Profile directory watch unavailable: {e}")
+            return
+        self.add_handler(self._profiles_watcher.fileno(), self._on_profiles_changed)
+
+    def _on_profiles_changed(self, mask):
+        if not self._profiles_watcher.changed():
+            return
+        self.profiles.rescan()
+        for processor in self.processors():
+            mapper = self.profiles.mapper_for(processor.physical)
+            if mapper.path != processor.mapper.path:
+                processor.set_mapper(mapper)
+                if processor.running:
+                    self._sync(processor)
+
+    def _unwatch_profiles(self):
+        watcher, self._profiles_watcher = self._profiles_watcher, None
+        if watcher:
+            self.remove_handler(watcher.fileno())
+            watcher.close()
+
+    def remove_device(self, slot):
+        processor = self.slots.get(slot)
+        if processor:
+            self._commands.append(("detach", processor))
+            self._wake()
+
+    # ----------------- Loop -----------------
+
+    def _wake(self):
+        wake_w = self._wake_w
+        if wake_w is None:
+            return
+        try:
+            os.write(wake_w, b"\0")
+        except OSError:
+            pass
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wake_r, 64):
+                pass
+        except OSError:
+            pass
+
+    def _run_commands(self):
+        while self._commands:
+            action, processor = self._commands.popleft()
+            if action == "attach":
+                self._attach(processor)
+            elif action == "detach":
+                self._detach(processor)
+            elif action == "open":
+                self._open_record(processor)
+
+    def _attach(self, processor):
+        try:
+            processor.attach()
+        except OSError as e:
+            print(f"[!] Slot {processor.slot}: {e}")
+            self._detach(processor)
+            return
+        self._sync(processor)
+        print(f"[+] Slot {processor.slot}: {processor.physical.name}")
+
+    def _sync(self, processor):
+        # Reconcile epoll with the fds the processor owns right now; they
+        # change on disconnect/reconnect and when recording starts.
+        wanted = set(processor.aux_handlers)
+        for fd, owner in list(self._aux.items()):
+            if owner is processor and fd not in wanted:
+                del self._aux[fd]
+                self._unregister(fd)
+        for fd in wanted:
+            if fd not in self._aux:
+                self._aux[fd] = processor
+                self._poller.register(fd, select.EPOLLIN)
+        if not processor.disconnected:
+            fd = processor.physical.fd
+            if fd not in self._by_fd:
+                self._by_fd[fd] = processor
+                self._poller.register(fd, select.EPOLLIN)
+
+    def _unregister(self, fd):
+        try:
+            self._poller.unregister(fd)
+        except (OSError, ValueError):
+            pass
+
+    def _lost(self, processor, fd):
+        # Stop polling the dead fd before anything closes it.
+        del self._by_fd[fd]
+        self._unregister(fd)
+        if processor.auto_reconnect and self.running and processor.disconnect():
+            self._sync(processor)
+        else:
+            self._detach(processor)
+
+    def _detach(self, processor):
+        if processor.cleaned_up:
+            return
+        fd = None
+        for known_fd, known in list(self._by_fd.items()):
+            if known is processor:
+                fd = known_fd
+        if fd is not None:
+            del self._by_fd[fd]
+        if fd is not None:
+            self._unregister(fd)
+        for aux_fd, owner in list(self._aux.items()):
+            if owner is processor:
+                del self._aux[aux_fd]
+                self._unregister(aux_fd)
+
+        processor.running = False
+        processor.cleanup()
+        with self._lock:
+            if self.slots.get(processor.slot) is processor:
+                del self.slots[processor.slot]
+
+        if self.on_detach:
+            self.on_detach(processor)
+
+    def add_handler(self, fd, handler, events=select.EPOLLIN):
+        # Loop thread only (or before run()).
+        self._handlers[fd] = handler
+        self._handler_events[fd] = events
+        if self._poller is not None:
+            self._poller.register(fd, events)
+
+    def modify_handler(self, fd, events):
+        if self._handler_events.get(fd) == events:
+            return
+        self._handler_events[fd] = events
+        if self._poller is not None:
+            self._poller.modify(fd, events)
+
+    def remove_handler(self, fd):
+        if self._handlers.pop(fd, None) is None:
+            return
+        del self._handler_events[fd]
+        if self._poller is not None:
+            self._unregister(fd)
+
+    def stop(self):
+        self.running = False
+        self._wake()
+
+    def _poll_timeout(self):
+        timeout = None
+        for processor in self._by_fd.values():
+            processor_timeout = processor.poll_timeout()
+            if processor_timeout is not None and (
+                timeout is None or processor_timeout < timeout
+            ):
+                timeout = processor_timeout
+        return -1 if timeout is None else timeout
+
+    def _run_timers(self):
+        now = time.monotonic()
+        for processor in list(self._by_fd.values()):
+            processor.on_timer(now)
+
+    def run(self):
+        self._poller = select.epoll()
+        self._poller.register(self._wake_r, select.EPOLLIN)
+        for fd, events in self._handler_events.items():
+            self._poller.register(fd, events)
+        if self.profiles is not None and self.watch_profiles:
+            self._watch_profiles()
+        if self.realtime is not None:
+            self.realtime_report = self.realtime.apply()
+        self.running = True
+        print("[+] Forwarding events with dynamic mapping...")
+
+        try:
+            self._run_commands()
+            if self.on_started:
+                self.on_started()
+            while self.running:
+                for fd, mask in self._poller.poll(self._poll_timeout()):
+                    if fd == self._wake_r:
+                        self._drain_wakeup()
+                        self._run_commands()
+                        continue
+                    handler = self._handlers.get(fd)
+                    if handler:
+                        handler(mask)
+                        continue
+                    owner = self._aux.get(fd)
+                    if owner:
+                        handler = owner.aux_handlers.get(fd)
+                        if handler:
+                            handler()
+                        if not owner.cleaned_up:
+                            self._sync(owner)
+                        continue
+                    processor = self._by_fd.get(fd)
+                    if processor is None:
+                        continue
+                    if mask & (select.EPOLLERR | select.EPOLLHUP):
+                        self._lost(processor, fd)
+                    elif not processor.process_pending():
+                        self._lost(processor, fd)
+                self._run_timers()
+        finally:
+            if self.registry:
+                self.registry.remove_listener(self._on_registry_event)
+            self._unwatch_profiles()
+            self._commands.clear()
+            for processor in list(self.slots.values()):
+                self._detach(processor)
+            poller, self._poller = self._poller, None
+            poller.close()
+            wake_r, wake_w = self._wake_r, self._wake_w
+            self._wake_r = self._wake_w = None
+            for fd in (wake_r, wake_w):
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
@@ -0,0 +1,182 @@
+import os
+import select
+import socket
+import threading
+
+USB_DEVICES = "/sys/bus/usb/devices"
+
+# linux/netlink.h
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1
+
+
+def _read_attr(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+class UsbDevice:
+
+    __slots__ = ("key", "busnum", "devnum", "vid", "pid", "manufacturer", "product")
+
+    def __init__(self, key, busnum, devnum, vid, pid, manufacturer, product):
+        self.key = key
+        self.busnum = busnum
+        self.devnum = devnum
+        self.vid = vid
+        self.pid = pid
+        self.manufacturer = manufacturer
+        self.product = product
+
+    def line(self):
+        # Same shape as an lsusb line.
+        name = " ".join(part for part in (self.manufacturer, self.product) if part)
+        return f"Bus {self.busnum:03d} Device {self.devnum:03d}: ID {self.vid}:{self.pid} {name}".rstrip()
+
+    def __eq__(self, other):
+        return isinstance(other, UsbDevice) and self.line() == other.line()
+
+    def __hash__(self):
+        return hash(self.line())
+
+
+def read_inventory(root=USB_DEVICES):
+    # sysfs name (e.g. "1-1.2", "usb1") -> UsbDevice; interfaces ("1-1:1.0")
+    # are skipped.
+    devices = {}
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return devices
+    for name in names:
+        if ":" in name:
+            continue
+        base = os.path.join(root, name)
+        vid = _read_attr(os.path.join(base, "idVendor"))
+        if not vid:
+            continue
+        try:
+            busnum = int(_read_attr(os.path.join(base, "busnum")) or 0)
+            devnum = int(_read_attr(os.path.join(base, "devnum")) or 0)
+        except ValueError:
+            continue
+        devices[name] = UsbDevice(
+            name,
+            busnum,
+            devnum,
+            vid,
+            _read_attr(os.path.join(base, "idProduct")),
+            _read_attr(os.path.join(base, "manufacturer")),
+            _read_attr(os.path.join(base, "product")),
+        )
+    return devices
+
+
+class UsbInventory:
+
+    # Background USB device list. Rescans sysfs only when the kernel reports
+    # a USB uevent (falling back to a slow periodic rescan when netlink is
+    # unavailable) and reports differences as on_change(added, removed),
+    # each a list of UsbDevice, from the inventory thread. The last snapshot
+    # survives stop(), so a restart only reports what changed meanwhile.
+
+    RESCAN_INTERVAL = 10.0
+    # uevents arrive in bursts (device + each interface); wait for the rest.
+    SETTLE = 0.05
+
+    def __init__(self, on_change, root=USB_DEVICES):
+        self.on_change = on_change
+        self.root = root
+        self.devices = {}
+        self._thread = None
+        # Write end of the thread's wake pipe; the thread owns the read end.
+        self._wake_w = None
+
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread:
+            return
+        wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, args=(wake_r,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if not thread:
+            return
+        self._thread = None
+        # Closing the write end wakes the thread (EOF on its read end). The
+        # thread closes the read end itself once it is done with it, so a
+        # rescan that outlives the join never selects on a reused fd.
+        wake_w, self._wake_w = self._wake_w, None
+        os.close(wake_w)
+        thread.join(timeout=1.0)
+
+    def rescan(self):
+        current = read_inventory(self.root)
+        previous = self.devices
+        added = [dev for key, dev in current.items() if previous.get(key) != dev]
+        removed = [dev for key, dev in previous.items() if current.get(key) != dev]
+        self.devices = current
+        if added or removed:
+            self.on_change(added, removed)
+
+    @staticmethod
+    def _open_monitor():
+        try:
+            sock = socket.socket(
+                socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT
+            )
+        except (OSError, AttributeError):
+            return None
+        try:
+            sock.bind((0, UEVENT_KERNEL_GROUP))
+        except OSError:
+            sock.close()
+            return None
+        sock.setblocking(False)
+        return sock
+
+    @staticmethod
+    def _is_usb_event(sock):
+        usb = False
+        while True:
+            try:
+                message = sock.recv(8192)
+            except (BlockingIOError, InterruptedError):
+                return usb
+            except OSError:
+                return True
+            if b"\0SUBSYSTEM=usb\0" in message:
+                usb = True
+
+    def _run(self, wake_r):
+        monitor = self._open_monitor()
+        timeout = None if monitor else self.RESCAN_INTERVAL
+        fds = [wake_r] + ([monitor] if monitor else [])
+        try:
+            self.rescan()
+            while self._thread is not None:
+                ready, _, _ = select.select(fds, [], [], timeout)
+                if wake_r in ready:
+                    return
+                if monitor is None:
+                    self.rescan()
+                    continue
+                if not self._is_usb_event(monitor):
+                    continue
+                # Let the rest of the burst arrive, then scan once.
+                ready, _, _ = select.select([wake_r], [], [], self.SETTLE)
+                if ready:
+                    return
+                self._is_usb_event(monitor)
+                self.rescan()
+        finally:
+            if monitor:
+                monitor.close()
+            os.close(wake_r)
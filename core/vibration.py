@@ -1,38 +1,218 @@
 # core/vibration.py
 
 import errno
+import threading
+from collections import OrderedDict
 
 from evdev import InputDevice, ecodes, ff
 from evdev import list_devices
 from core.device_detector import DeviceDetector
 
 
-class VibrationManager:
+class EffectPool:
+
+    # Uploaded rumble effects keyed by their parameters. Replaying a known
+    # key is a single write; when the pad is out of slots the least recently
+    # used effect is erased to make room.
+
+    DEFAULT_CAPACITY = 4
+
+    def __init__(self, device):
+        self.device = device
+        self.capacity = getattr(device, "ff_effects_count", 0) or self.DEFAULT_CAPACITY
+        # key -> effect id, least recently used first
+        self.effects = OrderedDict()
+
+    @staticmethod
+    def rumble_key(strong, weak, duration):
+        return ("rumble", strong, weak, duration)
+
+    @staticmethod
+    def build_rumble(strong, weak, duration):
+        rumble = ff.Rumble(strong_magnitude=strong, weak_magnitude=weak)
+        return ff.Effect(
+            ecodes.FF_RUMBLE,
+            -1,
+            0,
+            ff.Trigger(0, 0),
+            ff.Replay(duration, 0),
+            ff.EffectType(ff_rumble_effect=rumble)
+        )
+
+    def get(self, key, build):
+        effect_id = self.effects.get(key)
+        if effect_id is not None:
+            self.effects.move_to_end(key)
+            return effect_id
+
+        if len(self.effects) >= self.capacity:
+            self._evict()
+        while True:
+            try:
+                effect_id = self.device.upload_effect(build())
+                break
+            except OSError as exc:
+                # Fewer slots than advertised (or shared with a game).
+                if exc.errno != errno.ENOSPC or not self._evict():
+                    raise
+        self.effects[key] = effect_id
+        return effect_id
+
+    def rumble(self, strong, weak, duration):
+        return self.get(
+            self.rumble_key(strong, weak, duration),
+            lambda: self.build_rumble(strong, weak, duration),
+        )
+
+    def _evict(self):
+        if not self.effects:
+            return False
+        _, effect_id = self.effects.popitem(last=False)
+        try:
+            self.device.erase_effect(effect_id)
+        except OSError:
+            pass
+        return True
+
+    def clear(self):
+        while self._evict():
+            pass
+
+
+class PatternScheduler:
+
+    # Plays rumble patterns on a background thread so the Qt thread never
+    # waits on the device. Starting a pattern replaces the one playing.
 
     def __init__(self):
-        self.device = self.find_device()
+        self._cond = threading.Condition()
+        self._job = None
+        self._generation = 0
+        self._thread = None
+
+    def play(self, steps, run_step, stop):
+        # steps: [(strong, weak, duration_ms, pause_ms)]
+        with self._cond:
+            self._generation += 1
+            self._job = (self._generation, steps, run_step, stop)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self):
+        with self._cond:
+            self._generation += 1
+            self._job = None
+            self._cond.notify()
+
+    def _wait(self, generation, seconds):
+        # True if the pattern was replaced or cancelled meanwhile.
+        with self._cond:
+            self._cond.wait_for(lambda: self._generation != generation, seconds)
+            return self._generation != generation
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._job is not None)
+                generation, steps, run_step, stop = self._job
+                self._job = None
+            for strong, weak, duration, pause in steps:
+                try:
+                    run_step(strong, weak, duration)
+                except OSError as e:
+                    print(f"[!] Vibration failed: {e}")
+                    break
+                if self._wait(generation, (duration + pause) / 1000.0):
+                    break
+            try:
+                stop()
+            except OSError:
+                pass
+
+
+class VibrationManager:
+
+    # Multi-step patterns: (strong, weak, duration, pause) with magnitudes as
+    # fractions of the intensity and times as fractions of the duration.
+    PATTERNS = {
+        "single": [(1.0, 1.0, 1.0, 0.0)],
+        "pulse": [(1.0, 1.0, 0.15, 0.1)] * 4,
+        "double": [(1.0, 1.0, 0.12, 0.08), (1.0, 1.0, 0.12, 0.0)],
+        "ramp up": [(level / 5.0, level / 5.0, 0.2, 0.0) for level in range(1, 6)],
+        "ramp down": [(level / 5.0, level / 5.0, 0.2, 0.0) for level in range(5, 0, -1)],
+        "heartbeat": [(1.0, 0.4, 0.1, 0.1), (0.6, 0.2, 0.1, 0.5)] * 2,
+    }
+
+    # Magnitudes are rounded to this many levels so patterns reuse slots.
+    LEVELS = 20
+
+    def __init__(self, registry=None):
+        self.registry = registry
+        self.device = None
+        self.pool = None
+        self._lock = threading.Lock()
+        self.scheduler = PatternScheduler()
         self.enabled = True
         self.intensity = 100   # percent
         self.duration = 1000   # milliseconds
-        self.effect_id = None
+        self._playing = None
+        self._use_device(self.find_device())
+
+    def _use_device(self, device):
+        with self._lock:
+            self.device = device
+            self.pool = EffectPool(device) if device else None
+            self._playing = None
 
     def find_device(self, preferred_path=None):
+        if self.registry:
+            return self._find_in_registry(preferred_path)
+
         primary = DeviceDetector().find(preferred_path=preferred_path)
         if primary and ecodes.EV_FF in primary.capabilities():
             return primary
+        if primary:
+            primary.close()
 
         for path in list_devices():
-            dev = InputDevice(path)
+            try:
+                dev = InputDevice(path)
+            except OSError:
+                continue
             if ecodes.EV_FF in dev.capabilities():
                 return dev
+            dev.close()
+        return None
+
+    def _find_in_registry(self, preferred_path):
+        # Uses cached capabilities; only the chosen node is opened.
+        primary = self.registry.find(preferred_path=preferred_path)
+        candidates = [primary] if primary and primary.ff else []
+        candidates += self.registry.force_feedback_devices()
+        for record in candidates:
+            try:
+                return record.open()
+            except OSError:
+                continue
         return None
 
     def set_device_path(self, path):
-        self.device = self.find_device(preferred_path=path)
-        self.effect_id = None
+        self.scheduler.cancel()
+        old = self.device
+        self._use_device(None)
+        if old:
+            try:
+                old.close()
+            except Exception:
+                pass
+        self._use_device(self.find_device(preferred_path=path))
 
     def set_enabled(self, state: bool):
         self.enabled = state
+        if not state:
+            self.scheduler.cancel()
 
     def set_intensity(self, percent: int):
         self.intensity = max(0, min(100, percent))
@@ -44,7 +224,53 @@ class VibrationManager:
         # 0–100% → 0–0xffff
         return int((self.intensity / 100) * 0xffff)
 
-    def test(self, motor="both"):
+    def _magnitude(self, fraction):
+        level = round(fraction * self.LEVELS) / self.LEVELS
+        return int(level * self._convert_intensity())
+
+    def preload(self, pattern="single", motor="both"):
+        # Upload a pattern's effects ahead of time so its first play is
+        # just a write. Nothing is played.
+        for strong, weak, duration, _ in self._steps(pattern, motor):
+            with self._lock:
+                if not self.pool:
+                    return
+                try:
+                    self.pool.rumble(strong, weak, duration)
+                except OSError as e:
+                    print(f"[!] Vibration preload failed: {e}")
+                    return
+
+    def _steps(self, pattern, motor):
+        steps = []
+        for strong, weak, duration, pause in self.PATTERNS.get(pattern, self.PATTERNS["single"]):
+            if motor == "left":
+                weak = 0
+            elif motor == "right":
+                strong = 0
+            steps.append((
+                self._magnitude(strong),
+                self._magnitude(weak),
+                max(20, int(duration * self.duration)),
+                int(pause * self.duration),
+            ))
+        return steps
+
+    def _run_step(self, strong, weak, duration):
+        with self._lock:
+            if not self.pool:
+                return
+            effect_id = self.pool.rumble(strong, weak, duration)
+            self._playing = effect_id
+            self.device.write(ecodes.EV_FF, effect_id, 1)
+
+    def _stop(self):
+        with self._lock:
+            if self.device and self._playing is not None:
+                self.device.write(ecodes.EV_FF, self._playing, 0)
+            self._playing = None
+
+    def test(self, motor="both", pattern="single"):
 
         if not self.enabled:
             return
@@ -53,48 +279,4 @@ class VibrationManager:
             print("No vibration device found.")
             return
 
-        strong = 0
-        weak = 0
-        magnitude = self._convert_intensity()
-
-        if motor == "left":
-            strong = magnitude
-        elif motor == "right":
-            weak = magnitude
-        elif motor == "both":
-            strong = magnitude
-            weak = magnitude
-
-        rumble = ff.Rumble(
-            strong_magnitude=strong,
-            weak_magnitude=weak
-        )
-
-        def build_effect(effect_id):
-            return ff.Effect(
-                ecodes.FF_RUMBLE,
-                effect_id,
-                0,
-                ff.Trigger(0, 0),
-                ff.Replay(self.duration, 0),
-                ff.EffectType(ff_rumble_effect=rumble)
-            )
-
-        # Reuse the previously allocated effect slot to avoid ENOSPC on devices
-        # with a very small number of FF effect slots.
-        target_effect_id = self.effect_id if self.effect_id is not None else -1
-        effect = build_effect(target_effect_id)
-
-        try:
-            effect_id = self.device.upload_effect(effect)
-        except OSError as exc:
-            if exc.errno == errno.ENOSPC and self.effect_id is not None:
-                # If kernel state got out of sync, reset and retry once.
-                self.effect_id = None
-                effect = build_effect(-1)
-                effect_id = self.device.upload_effect(effect)
-            else:
-                raise
-
-        self.effect_id = effect_id
-        self.device.write(ecodes.EV_FF, effect_id, 1)
+        self.scheduler.play(self._steps(pattern, motor), self._run_step, self._stop)
@@ -1,10 +1,23 @@
+import os
+
 from evdev import UInput, ecodes, AbsInfo
 
 
 class VirtualGamepad:
 
-    def __init__(self):
+    # Effects a game may keep uploaded at once; the physical pad may have
+    # fewer slots, ForceFeedbackBridge multiplexes them.
+    MAX_EFFECTS = 16
+
+    def __init__(self, name="LJGM Virtual Gamepad", ff_effects=None):
         self.ui = None
+        self.name = name
+        # FF codes copied from the physical pad; empty means no rumble.
+        self.ff_effects = list(ff_effects or [])
+        # In batched mode writes are staged and only flush() emits SYN_REPORT,
+        # so every update belonging to one input frame reaches games together.
+        self.batched = False
+        self.pending = False
         self.create()
 
     def create(self):
@@ -40,22 +53,45 @@ class VirtualGamepad:
             }
         }
 
+        if self.ff_effects:
+            capabilities[ecodes.EV_FF] = self.ff_effects
+
         self.ui = UInput(
             capabilities,
-            name="LJGM Virtual Gamepad",
+            name=self.name,
             vendor=0x1234,
             product=0x5678,
             version=0x0001,
-            bustype=ecodes.BUS_USB
+            bustype=ecodes.BUS_USB,
+            max_effects=self.MAX_EFFECTS
         )
+        if self.ff_effects:
+            # Upload/erase requests and play events are read from this fd.
+            os.set_blocking(self.ui.fd, False)
+
+    def set_batched(self, enabled):
+        if not enabled:
+            self.flush()
+        self.batched = enabled
 
     def emit_key(self, code, value):
         self.ui.write(ecodes.EV_KEY, code, value)
-        self.ui.syn()
+        if self.batched:
+            self.pending = True
+        else:
+            self.ui.syn()
 
     def emit_abs(self, code, value):
         self.ui.write(ecodes.EV_ABS, code, value)
-        self.ui.syn()
+        if self.batched:
+            self.pending = True
+        else:
+            self.ui.syn()
+
+    def flush(self):
+        if self.pending and self.ui:
+            self.ui.syn()
+        self.pending = False
 
     def close(self):
         if self.ui:
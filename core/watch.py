@@ -0,0 +1,150 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+_EVENT = struct.Struct("iIII")
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        try:
+            _libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        except OSError:
+            _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    return _libc
+
+
+class Inotify:
+
+    # Minimal non-blocking inotify wrapper; fileno() can be registered with
+    # epoll/select alongside input device fds.
+
+    def __init__(self):
+        libc = _load_libc()
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+        self.watches = {}
+
+    def fileno(self):
+        return self.fd
+
+    def add_watch(self, path, mask):
+        wd = _load_libc().inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self.watches[wd] = path
+        return wd
+
+    def read(self):
+        # Returns [(watched_path, mask, name)]; empty when nothing is queued.
+        # A queue overflow (events were lost) is reported as
+        # (None, IN_Q_OVERFLOW, "") so callers can rescan.
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                return []
+            raise
+
+        events = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += length
+            path = self.watches.get(wd)
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+            if path is not None or mask & IN_Q_OVERFLOW:
+                events.append((path, mask, name))
+        return events
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+            self.watches = {}
+
+
+class FileWatcher:
+
+    # Watches one file by watching its directory, so atomic replace-by-rename
+    # is noticed as well as in-place rewrites.
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.directory = os.path.dirname(self.path)
+        self.name = os.path.basename(self.path)
+        os.makedirs(self.directory, exist_ok=True)
+        self.inotify = Inotify()
+        self.inotify.add_watch(self.directory, self.MASK)
+
+    def fileno(self):
+        return self.inotify.fd
+
+    def changed(self):
+        # Drain pending notifications; True if our file was (re)written.
+        hit = False
+        for _, mask, name in self.inotify.read():
+            if mask & IN_Q_OVERFLOW or (name == self.name and not mask & IN_ISDIR):
+                hit = True
+        return hit
+
+    def close(self):
+        self.inotify.close()
+
+
+class DirectoryWatcher(FileWatcher):
+
+    # Watches the entries of one directory: files with the given suffix
+    # being written, renamed in or out, or removed. Dot files (temporaries
+    # of atomic writes) are ignored.
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+
+    def __init__(self, directory, suffix=""):
+        self.path = self.directory = os.path.abspath(directory)
+        self.suffix = suffix
+        os.makedirs(self.directory, exist_ok=True)
+        self.inotify = Inotify()
+        self.inotify.add_watch(self.directory, self.MASK)
+
+    def changed(self):
+        hit = False
+        for _, mask, name in self.inotify.read():
+            if mask & IN_Q_OVERFLOW:
+                hit = True
+            if mask & IN_ISDIR or name.startswith("."):
+                continue
+            if name.endswith(self.suffix):
+                hit = True
+        return hit
@@ -0,0 +1,404 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import sys
+
+from core.control import ControlServer
+from core.device_detector import DeviceDetector
+from core.device_registry import DeviceRegistry
+from core.mapper import CONFIG_PATH
+from core.profile_store import PROFILE_DIR, ProfileStore
+from core.realtime import RealtimeConfig, thread_switches
+from core.ring import FrameRing, shared_ring_path
+from core.service import ControllerService
+
+
+# Headless entry point: evdev + the processing core only, no Qt.
+#
+#   python3 daemon.py --all-controllers
+#   ljgm-daemon --config /etc/ljgm/daemon.json
+#   ljgm-daemon --control /run/user/1000/ljgm.sock
+#
+# Settings come from the JSON config file, overridden by command line flags.
+# With a control socket, clients (the GUI) query status/stats and change
+# settings at runtime; see core/control.py for the protocol.
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG = "/etc/ljgm/daemon.json"
+
+# Exit status: 1 is also what an unexpected failure gives, so a missing
+# controller has its own code for callers (the GUI) to tell them apart.
+EXIT_ERROR = 1
+EXIT_CONFIG = 2
+EXIT_NO_CONTROLLER = 3
+
+DEFAULTS = {
+    "device": None,
+    "vid": None,
+    "pid": None,
+    "all_controllers": False,
+    "wait": True,
+    "profile": os.path.join(ROOT_DIR, CONFIG_PATH),
+    "profiles_dir": os.path.join(ROOT_DIR, PROFILE_DIR),
+    "watch_profile": True,
+    "mouse_mode": False,
+    "stick_sensitivity": 100,
+    "mouse_sensitivity": 100,
+    "deadzone": None,
+    "reconnect": True,
+    "rumble": True,
+    "rumble_intensity": 100,
+    "latency_stats": False,
+    "control": None,
+    # Scheduling for the input loop thread; all opt-in and best-effort.
+    "realtime": None,
+    "realtime_priority": None,
+    "nice": None,
+    "cpus": None,
+    "lock_memory": False,
+}
+
+
+def sd_notify(state):
+    # systemd readiness/status protocol; a no-op outside Type=notify units.
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(state.encode(), address)
+        return True
+    except OSError:
+        return False
+
+
+def load_config(path, required=False):
+    if not path or (not required and not os.path.exists(path)):
+        return {}
+    with open(path, "r") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: config must be a JSON object")
+    unknown = set(data) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"{path}: unknown settings: {', '.join(sorted(unknown))}")
+    return data
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="LJGM headless controller daemon")
+    parser.add_argument("--config", help=f"JSON settings file (default {DEFAULT_CONFIG} if present)")
+    parser.add_argument("--device", help="input device path, e.g. /dev/input/event5")
+    parser.add_argument("--vid", help="controller vendor id (hex)")
+    parser.add_argument("--pid", help="controller product id (hex)")
+    parser.add_argument("--all-controllers", action="store_true", default=None,
+                        help="drive every connected controller, one virtual pad each")
+    parser.add_argument("--no-wait", dest="wait", action="store_false", default=None,
+                        help="exit if no controller is connected at startup")
+    parser.add_argument("--profile", help="default mapping profile (JSON)")
+    parser.add_argument("--profiles-dir", help="per-controller profile directory")
+    parser.add_argument("--no-watch-profile", dest="watch_profile", action="store_false", default=None)
+    parser.add_argument("--mouse-mode", action="store_true", default=None)
+    parser.add_argument("--stick-sensitivity", type=int, help="percent")
+    parser.add_argument("--mouse-sensitivity", type=int, help="percent")
+    parser.add_argument("--deadzone", type=int, help="0-32767")
+    parser.add_argument("--no-reconnect", dest="reconnect", action="store_false", default=None)
+    parser.add_argument("--no-rumble", dest="rumble", action="store_false", default=None)
+    parser.add_argument("--rumble-intensity", type=int, help="percent")
+    parser.add_argument("--latency-stats", action="store_true", default=None,
+                        help="measure input->output latency (see the stats command)")
+    parser.add_argument("--realtime", choices=("fifo", "rr"),
+                        help="real-time scheduling policy for the input loop")
+    parser.add_argument("--realtime-priority", type=int, help="1-99 (default 10)")
+    parser.add_argument("--nice", type=int, help="-20..19, for the input loop")
+    parser.add_argument("--cpus", help="pin the input loop to these CPUs, e.g. 2,3 or 2-3")
+    parser.add_argument("--lock-memory", action="store_true", default=None,
+                        help="mlockall() so the loop never waits on page faults")
+    parser.add_argument("--control", help="serve the control protocol on this Unix socket")
+    parser.add_argument("--exit-with-stdin", action="store_true",
+                        help="stop when stdin is closed (used by the GUI)")
+    return parser.parse_args(argv)
+
+
+def build_settings(args):
+    settings = dict(DEFAULTS)
+    if args.config:
+        settings.update(load_config(args.config, required=True))
+    else:
+        settings.update(load_config(DEFAULT_CONFIG))
+    for key in DEFAULTS:
+        value = getattr(args, key, None)
+        if value is not None:
+            settings[key] = value
+    return settings
+
+
+class Daemon:
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.service = None
+        self.registry = None
+        self.primary = None
+        self.control = None
+        self.ring = None
+        self.ring_path = None
+        self.exit_with_stdin = False
+        self.realtime = RealtimeConfig(
+            policy=settings["realtime"],
+            priority=settings["realtime_priority"],
+            nice=settings["nice"],
+            cpus=settings["cpus"],
+            lock_memory=settings["lock_memory"],
+        )
+
+    def _configure(self, processor):
+        settings = self.settings
+        processor.watch_profile = settings["watch_profile"]
+        processor.set_stick_sensitivity(settings["stick_sensitivity"])
+        if settings["deadzone"] is not None:
+            processor.set_deadzone(settings["deadzone"])
+        processor.set_ff_enabled(settings["rumble"])
+        processor.set_ff_intensity(settings["rumble_intensity"])
+        if settings["latency_stats"]:
+            processor.enable_latency_stats(True)
+        # Mouse mode drives one controller only, as in the GUI: the --device
+        # pad, or the first one when none was given (or it is missing).
+        if self.primary is None or (
+            self._preferred(processor) and not self._preferred(self.primary)
+        ):
+            self._make_primary(processor)
+
+    def _preferred(self, processor):
+        device = self.settings["device"]
+        return bool(device) and processor.physical.path == device
+
+    def _make_primary(self, processor):
+        settings = self.settings
+        old, self.primary = self.primary, processor
+        if old is not None and old is not processor:
+            old.set_mouse_mode(False)
+            old.set_frame_ring(None)
+        processor.set_mouse_sensitivity(settings["mouse_sensitivity"])
+        processor.set_mouse_mode(settings["mouse_mode"])
+        if self.ring is not None:
+            processor.set_frame_ring(self.ring)
+
+    def _wanted(self, record):
+        settings = self.settings
+        vid, pid = settings["vid"], settings["pid"]
+        if vid and pid and (record.vid != vid.lower() or record.pid != pid.lower()):
+            return False
+        # Without --all-controllers, hotplug only fills an empty session.
+        return settings["all_controllers"] or not self.service.slots
+
+    def _initial_devices(self):
+        settings = self.settings
+        detector = DeviceDetector(vid=settings["vid"], pid=settings["pid"])
+        if settings["all_controllers"]:
+            return detector.list_supported()
+        device = detector.find(preferred_path=settings["device"])
+        return [device] if device else []
+
+    def _on_started(self):
+        count = len(self.service.slots)
+        sd_notify(f"READY=1\nSTATUS=Driving {count} controller(s)")
+        print(f"[+] Ready, {count} controller(s)")
+
+    def _primary(self):
+        processors = self.service.processors()
+        if self.primary not in processors:
+            self.primary = None
+            if processors:
+                preferred = [p for p in processors if self._preferred(p)]
+                self._make_primary((preferred or processors)[0])
+        return self.primary
+
+    # ----------------- Control commands -----------------
+
+    def _cmd_status(self, request):
+        primary = self._primary()
+        return {
+            "slots": [
+                {
+                    "slot": slot,
+                    "name": processor.physical.name,
+                    "path": processor.physical.path,
+                    "disconnected": processor.disconnected,
+                    "mouse_mode": processor.use_mouse_mode,
+                    "primary": processor is primary,
+                }
+                for slot, processor in sorted(self.service.slots.items())
+            ],
+        }
+
+    def _cmd_stats(self, request):
+        primary = self._primary()
+        return {
+            "latency": primary.latency_stats() if primary else None,
+            "slots": self.service.latency_stats(),
+            # Runs on the loop thread, so these are the loop's own numbers.
+            "realtime": self.service.realtime_report,
+            "switches": thread_switches(),
+        }
+
+    def _cmd_set(self, request):
+        settings = self.settings
+        processors = self.service.processors()
+        primary = self._primary()
+        reply = {}
+        for key, value in request.items():
+            if key == "cmd":
+                continue
+            if key == "stick_sensitivity":
+                for processor in processors:
+                    processor.set_stick_sensitivity(int(value))
+            elif key == "deadzone":
+                for processor in processors:
+                    processor.set_deadzone(int(value))
+            elif key == "rumble":
+                for processor in processors:
+                    processor.set_ff_enabled(bool(value))
+            elif key == "rumble_intensity":
+                for processor in processors:
+                    processor.set_ff_intensity(int(value))
+            elif key == "latency_stats":
+                for processor in processors:
+                    processor.enable_latency_stats(bool(value))
+            elif key == "mouse_mode":
+                if primary:
+                    primary.set_mouse_mode(bool(value))
+            elif key == "mouse_sensitivity":
+                if primary:
+                    primary.set_mouse_sensitivity(int(value))
+            elif key == "diagnostics":
+                reply.update(self._set_diagnostics(bool(value)))
+                continue
+            else:
+                raise ValueError(f"unknown setting: {key}")
+            settings[key] = value
+        return reply
+
+    def _set_diagnostics(self, enabled):
+        # Live frames for the GUI go through a shared-memory FrameRing on
+        # the primary controller; the client maps the file read-only.
+        primary = self._primary()
+        if enabled and primary is not None:
+            if self.ring is None:
+                self.ring_path = shared_ring_path(f"ljgm-ring-{os.getpid()}")
+                self.ring = FrameRing.create_file(self.ring_path)
+            primary.set_frame_ring(self.ring)
+            return {"ring": self.ring_path, "deadzone": primary.deadzone}
+        if primary is not None:
+            primary.set_frame_ring(None)
+        self._close_ring()
+        return {"ring": None}
+
+    def _close_ring(self):
+        if self.ring is None:
+            return
+        self.ring.close()
+        try:
+            os.unlink(self.ring_path)
+        except OSError:
+            pass
+        self.ring = self.ring_path = None
+
+    def _cmd_stop(self, request):
+        self.stop()
+        return {}
+
+    def _on_stdin(self, mask):
+        try:
+            data = os.read(sys.stdin.fileno(), 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.service.remove_handler(sys.stdin.fileno())
+            self.stop()
+
+    def stop(self, *_):
+        if self.service:
+            self.service.stop()
+
+    def run(self):
+        settings = self.settings
+        devices = self._initial_devices()
+        if not devices and not settings["wait"]:
+            print("[!] No controller found")
+            return EXIT_NO_CONTROLLER
+
+        profiles = ProfileStore(settings["profiles_dir"], default_path=settings["profile"])
+        self.service = ControllerService(
+            profiles=profiles, auto_reconnect=settings["reconnect"]
+        )
+        self.service.on_attach = self._configure
+        self.service.watch_profiles = settings["watch_profile"]
+        self.service.on_started = self._on_started
+        if self.realtime.enabled():
+            self.service.realtime = self.realtime
+
+        try:
+            if settings["wait"] or settings["all_controllers"]:
+                self.registry = DeviceRegistry()
+                self.registry.start()
+                self.service.attach_registry(self.registry, auto_add=self._wanted)
+            if not devices:
+                print("[+] Waiting for a controller...")
+
+            for processor in self.service.add_devices(devices):
+                self._configure(processor)
+
+            if settings["control"]:
+                self.control = ControlServer(settings["control"], {
+                    "status": self._cmd_status,
+                    "stats": self._cmd_stats,
+                    "set": self._cmd_set,
+                    "stop": self._cmd_stop,
+                })
+                self.control.attach(self.service)
+            if self.exit_with_stdin:
+                self.service.add_handler(sys.stdin.fileno(), self._on_stdin)
+
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+            self.service.run()
+        finally:
+            sd_notify("STOPPING=1")
+            if self.control:
+                self.control.close()
+            for processor in self.service.processors():
+                processor.set_frame_ring(None)
+            self._close_ring()
+            if self.registry:
+                self.registry.stop()
+        return 0
+
+
+def main(argv=None):
+    # journald shows lines as they are printed.
+    sys.stdout.reconfigure(line_buffering=True)
+    args = parse_args(argv)
+    try:
+        daemon = Daemon(build_settings(args))
+    except (OSError, ValueError) as e:
+        print(f"[!] {e}", file=sys.stderr)
+        return EXIT_CONFIG
+    daemon.exit_with_stdin = args.exit_with_stdin
+    try:
+        return daemon.run()
+    except Exception as e:
+        # e.g. no access to /dev/uinput; the last stderr line is what the
+        # GUI shows.
+        print(f"[!] {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+from collections import deque
+
+from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout
+from PyQt6.QtCore import Qt, QTimer, QPointF, QRectF
+from PyQt6.QtGui import QPainter, QColor, QPen
+
+from core.ring import BUTTON_NAMES
+
+
+BUTTON_LABELS = {
+    "BTN_A": "A", "BTN_B": "B", "BTN_X": "X", "BTN_Y": "Y",
+    "BTN_TL": "L1", "BTN_TR": "R1", "BTN_TL2": "L2", "BTN_TR2": "R2",
+    "BTN_SELECT": "Sel", "BTN_START": "Start",
+    "BTN_THUMBL": "L3", "BTN_THUMBR": "R3",
+    "BTN_DPAD_UP": "Up", "BTN_DPAD_DOWN": "Down",
+    "BTN_DPAD_LEFT": "Left", "BTN_DPAD_RIGHT": "Right",
+}
+
+
+class InputView(QWidget):
+
+    TRAIL = 48
+
+    def __init__(self):
+        super().__init__()
+        self.setMinimumHeight(360)
+        self.frame = None
+        # Buttons seen pressed since the last paint, so taps shorter than a
+        # display frame still light up.
+        self.buttons = 0
+        self.trails = (deque(maxlen=self.TRAIL), deque(maxlen=self.TRAIL))
+        self.deadzone = 0
+
+    def update_frames(self, frames, deadzone):
+        self.deadzone = deadzone
+        self.buttons = 0
+        for frame in frames:
+            self.buttons |= frame.buttons
+        # Decimate to the display: the newest frame for positions, a few
+        # evenly spaced ones for the motion trails.
+        step = max(1, len(frames) // 8)
+        for frame in frames[::step] + frames[-1:]:
+            self.trails[0].append((frame.out[0], frame.out[1]))
+            self.trails[1].append((frame.out[2], frame.out[3]))
+        self.frame = frames[-1]
+        self.update()
+
+    @staticmethod
+    def _point(center, radius, x, y):
+        return QPointF(center.x() + x / 32768.0 * radius, center.y() + y / 32768.0 * radius)
+
+    def _draw_stick(self, painter, rect, raw, out, trail, title):
+        center = rect.center()
+        radius = min(rect.width(), rect.height()) / 2 - 12
+
+        painter.setPen(QPen(QColor("#303844"), 2))
+        painter.drawEllipse(center, radius, radius)
+        dz = self.deadzone / 32768.0 * radius
+        painter.setPen(QPen(QColor("#5a3a3a"), 1, Qt.PenStyle.DashLine))
+        painter.drawEllipse(center, dz, dz)
+
+        painter.setPen(QPen(QColor("#2f8f4e"), 1))
+        for x, y in trail:
+            painter.drawPoint(self._point(center, radius, x, y))
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#6e7782"))
+        painter.drawEllipse(self._point(center, radius, raw[0], raw[1]), 5, 5)
+        painter.setBrush(QColor("#4fc3f7"))
+        painter.drawEllipse(self._point(center, radius, out[0], out[1]), 7, 7)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
+        painter.setPen(QColor("#c9d1d9"))
+        painter.drawText(
+            QRectF(rect.left(), rect.bottom() - 4, rect.width(), 18),
+            Qt.AlignmentFlag.AlignCenter,
+            f"{title}  raw {raw[0]:6d},{raw[1]:6d}  out {out[0]:6d},{out[1]:6d}",
+        )
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), QColor("#0f1318"))
+
+        frame = self.frame
+        if frame is None:
+            painter.setPen(QColor("#6e7782"))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "No input yet")
+            return
+
+        width = self.width()
+        size = min(width / 3, self.height() - 120)
+        left = QRectF(10, 10, size, size)
+        right = QRectF(width - size - 10, 10, size, size)
+        self._draw_stick(painter, left, frame.raw[0:2], frame.out[0:2], self.trails[0], "Left")
+        self._draw_stick(painter, right, frame.raw[2:4], frame.out[2:4], self.trails[1], "Right")
+
+        # HAT
+        hat = QRectF(width / 2 - 40, 30, 80, 80)
+        painter.setPen(QPen(QColor("#303844"), 2))
+        painter.drawRect(hat)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#d81b60"))
+        painter.drawEllipse(
+            QPointF(hat.center().x() + frame.hat[0] * 30, hat.center().y() + frame.hat[1] * 30), 8, 8
+        )
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
+        # Buttons
+        top = size + 40
+        cell = (width - 20) / 8
+        for index, name in enumerate(BUTTON_NAMES):
+            rect = QRectF(10 + (index % 8) * cell, top + (index // 8) * 40, cell - 6, 32)
+            pressed = bool(self.buttons & (1 << index))
+            painter.fillRect(rect, QColor("#1e7f1e" if pressed else "#1a1f26"))
+            painter.setPen(QColor("#ffffff" if pressed else "#6e7782"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, BUTTON_LABELS[name])
+
+
+class DiagnosticsTab(QWidget):
+
+    # Samples the running processor's FrameRing at display rate. on_active
+    # is called with True/False as the tab is shown/hidden so the processor
+    # only publishes while someone is watching.
+
+    INTERVAL_MS = 16
+
+    def __init__(self, ring_source, on_active=None):
+        super().__init__()
+        self.ring_source = ring_source
+        self.on_active = on_active
+        self.last_seq = 0
+        self.ring = None
+
+        layout = QVBoxLayout()
+        self.info = QLabel("Start the service to see live input")
+        self.view = InputView()
+        layout.addWidget(self.info)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.sample)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.on_active:
+            self.on_active(True)
+        self.timer.start(self.INTERVAL_MS)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+        if self.on_active:
+            self.on_active(False)
+
+    def sample(self):
+        ring, deadzone = self.ring_source()
+        if ring is not self.ring:
+            self.ring = ring
+            self.last_seq = 0
+        if ring is None:
+            return
+        frames = ring.read_since(self.last_seq)
+        if not frames:
+            return
+        self.last_seq = frames[-1].seq
+        self.info.setText(f"{len(frames)} frames since last paint")
+        self.view.update_frames(frames, deadzone)
@@ -1,15 +1,16 @@
 import sys
 import os
+import errno
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QApplication,
     QComboBox, QPushButton,
     QVBoxLayout, QGridLayout, QHBoxLayout
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QSocketNotifier
 
 from evdev import ecodes
 from core.device_detector import DeviceDetector
-from core.mapper import Mapper
+from core.profile_store import ProfileStore
 
 
 BUTTON_MAP = {
@@ -34,13 +35,19 @@ BUTTON_MAP = {
 
 class MappingWizard(QWidget):
 
-    def __init__(self, controller_path=None):
+    def __init__(self, controller_path=None, profile_store=None, registry=None):
         super().__init__()
 
         self.setWindowTitle("LJGM - Controller Mapping Wizard")
         self.setFixedSize(900, 660)
 
-        self.mapper = Mapper()
+        self.profiles = profile_store or ProfileStore()
+        self.registry = registry
+        self.joystick = None
+        # Read-readiness on the joystick fd; enabled only while waiting_for
+        # is set, so an idle wizard costs no wakeups at all.
+        self.notifier = None
+        self.mapper = self.profiles.default_mapper()
         self.current_mode = "analog"
         self.waiting_for = None
         self.controller_path = controller_path
@@ -50,11 +57,8 @@ class MappingWizard(QWidget):
         self.setup_ui()
         self.refresh_ui()
 
-        # Setup safe polling instead of threading
         self.joystick = self.detect_joystick()
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.poll_input)
-        self.timer.start(10)
+        self.select_profile()
         if not self.joystick:
             self.status.setText("No joystick detected")
 
@@ -75,6 +79,12 @@ class MappingWizard(QWidget):
         top_layout.addWidget(self.mode_select)
         top_layout.addStretch()
 
+        self.profile_label = QLabel()
+        self.own_profile_btn = QPushButton("Create Profile For This Controller")
+        self.own_profile_btn.clicked.connect(self.create_device_profile)
+        top_layout.addWidget(self.profile_label)
+        top_layout.addWidget(self.own_profile_btn)
+
         main_layout.addLayout(top_layout)
 
         grid = QGridLayout()
@@ -122,16 +132,87 @@ class MappingWizard(QWidget):
     # ----------------- Logic -----------------
 
     def detect_joystick(self):
-        dev = DeviceDetector().find(preferred_path=self.controller_path)
+        self._release_notifier()
+        if self.joystick:
+            try:
+                self.joystick.close()
+            except Exception:
+                pass
+            self.joystick = None
+
+        if self.registry:
+            record = self.registry.find(preferred_path=self.controller_path)
+            try:
+                dev = record.open() if record else None
+            except OSError:
+                dev = None
+        else:
+            dev = DeviceDetector().find(preferred_path=self.controller_path)
         if not dev:
             return None
         os.set_blocking(dev.fd, False)
+        self.notifier = QSocketNotifier(dev.fd, QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self.on_joystick_ready)
+        self.notifier.setEnabled(False)
         return dev
 
+    def _release_notifier(self):
+        # Must go before the fd it watches is closed.
+        if self.notifier:
+            self.notifier.setEnabled(False)
+            self.notifier.deleteLater()
+            self.notifier = None
+
+    def _set_waiting(self, name):
+        self.waiting_for = name
+        if not self.notifier:
+            return
+        if name:
+            # Presses made before the click must not be captured.
+            self._drain()
+            if not self.notifier:
+                # The drain found the controller gone.
+                self.waiting_for = None
+                return
+        self.notifier.setEnabled(bool(name))
+
+    def _drain(self):
+        events = []
+        try:
+            while True:
+                events.extend(self.joystick.read())
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                self._release_notifier()
+                self.status.setText("Controller disconnected")
+        return events
+
+    def select_profile(self):
+        if self.joystick:
+            self.mapper = self.profiles.mapper_for(self.joystick)
+        else:
+            self.mapper = self.profiles.default_mapper()
+        has_own = bool(self.joystick) and self.profiles.has_profile(self.joystick)
+        self.profile_label.setText(
+            f"Profile: {os.path.basename(self.mapper.path)}"
+        )
+        self.own_profile_btn.setEnabled(bool(self.joystick) and not has_own)
+        self.refresh_ui()
+
+    def create_device_profile(self):
+        if not self.joystick:
+            return
+        self.mapper = self.profiles.create_for(self.joystick)
+        self.select_profile()
+        self.status.setText("Controller now uses its own profile")
+
     def set_controller_path(self, path):
         self.controller_path = path
-        self.waiting_for = None
+        self._set_waiting(None)
         self.joystick = self.detect_joystick()
+        self.select_profile()
         if self.joystick:
             self.status.setText(f"Controller selected: {self.joystick.name}")
         else:
@@ -158,12 +239,12 @@ class MappingWizard(QWidget):
 
     def change_mode(self, mode):
         self.current_mode = mode
-        self.waiting_for = None
+        self._set_waiting(None)
         self.refresh_ui()
         self.status.setText(f"Switched to {mode}")
 
     def assign_button(self, name):
-        self.waiting_for = name
+        self._set_waiting(name)
         self.refresh_ui()
         self.buttons[name].setStyleSheet(self.waiting_style())
         self.status.setText(f"Press physical button for {name}")
@@ -188,34 +269,32 @@ class MappingWizard(QWidget):
             if not assigned:
                 btn.setStyleSheet(self.default_style())
 
-    def poll_input(self):
+    def on_joystick_ready(self):
 
-        if not self.joystick or not self.waiting_for:
+        # Drain everything queued for this wakeup; a level-triggered
+        # notifier would otherwise fire again straight away.
+        events = self._drain()
+        if not self.waiting_for:
             return
 
-        try:
-            for event in self.joystick.read():
-                self.current_mode = self.mode_select.currentText()
-                virtual_name = BUTTON_MAP[self.waiting_for]
-                physical_token = self._extract_physical_token(event, virtual_name)
-
-                if not physical_token:
-                    continue
-
-                self.mapper.set_mapping(
-                    self.current_mode,
-                    physical_token,
-                    virtual_name
-                )
-
-                self.waiting_for = None
-                self.refresh_ui()
-                self.status.setText(f"Mapping updated: {physical_token} -> {virtual_name}")
-                break
-
-        except BlockingIOError:
-            pass
-
+        self.current_mode = self.mode_select.currentText()
+        virtual_name = BUTTON_MAP[self.waiting_for]
+        for event in events:
+            physical_token = self._extract_physical_token(event, virtual_name)
+
+            if not physical_token:
+                continue
+
+            self.mapper.set_mapping(
+                self.current_mode,
+                physical_token,
+                virtual_name
+            )
+
+            self._set_waiting(None)
+            self.refresh_ui()
+            self.status.setText(f"Mapping updated: {physical_token} -> {virtual_name}")
+            break
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -1,32 +1,70 @@
-import sys
+import os
+import signal
 import subprocess
+import sys
+import threading
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QTabWidget, QSlider,
-    QCheckBox, QTextEdit, QLineEdit,
+    QCheckBox, QLineEdit,
     QFormLayout, QRadioButton, QButtonGroup,
-    QTextEdit, QComboBox
+    QComboBox, QListWidget, QListWidgetItem
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
-from evdev import InputDevice
+from PyQt6.QtCore import Qt, QThread, QObject, pyqtSignal, QTimer
 
-from core.device_detector import DeviceDetector
-from core.virtual_gamepad import VirtualGamepad
-from core.processor import InputProcessor
+from core.control import ControlClient, default_socket_path
+from core.device_registry import DeviceRegistry
+from core.latency import LatencyStats
+from core.usb_inventory import UsbInventory
 from core.vibration import VibrationManager
 from core.mapper import Mapper
+from core.profile_store import ProfileStore
+from core.realtime import RealtimeConfig, parse_cpus
+from core.ring import FrameRing
+from gui.diagnostics import DiagnosticsTab
 from gui.mapping_wizard import MappingWizard
+from daemon import EXIT_NO_CONTROLLER
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DAEMON_PATH = os.path.join(ROOT_DIR, "daemon.py")
 
 
 # ==========================
-# Controller Service Thread
+# Hotplug Notifications
+# ==========================
+
+
+class DeviceSignals(QObject):
+
+    # Registry listeners run on the registry thread; the signal hops the
+    # notification over to the GUI thread.
+    changed = pyqtSignal(str, str)
+
+
+class UsbSignals(QObject):
+
+    # (added, removed) lists of UsbDevice from the inventory thread.
+    changed = pyqtSignal(list, list)
+
+
+# ==========================
+# Controller Service Process
 # ==========================
 
 
 class ControllerThread(QThread):
 
+    # Runs the controller daemon (daemon.py) as a child process and talks to
+    # it over its control socket, so GUI work never shares an interpreter
+    # with input processing. Setters only queue the change; this thread
+    # sends it, so a slow or hung daemon never blocks the GUI thread.
+
     status_signal = pyqtSignal(str)
+    # Reply of the "stats" control command, after request_stats().
+    stats_signal = pyqtSignal(dict)
+
+    POLL_INTERVAL = 0.2
 
     def __init__(
         self,
@@ -36,6 +74,15 @@ class ControllerThread(QThread):
         use_mouse_mode=False,
         stick_sensitivity=100,
         mouse_sensitivity=140,
+        all_controllers=False,
+        measure_latency=False,
+        profiles=None,
+        registry=None,
+        ff_enabled=True,
+        ff_intensity=100,
+        realtime=False,
+        cpus="",
+        lock_memory=False,
     ):
         super().__init__()
         self.device_path = device_path
@@ -44,57 +91,217 @@ class ControllerThread(QThread):
         self.use_mouse_mode = use_mouse_mode
         self.stick_sensitivity = stick_sensitivity
         self.mouse_sensitivity = mouse_sensitivity
-        self.processor = None
+        self.all_controllers = all_controllers
+        self.measure_latency = measure_latency
+        self.profiles = profiles
+        self.registry = registry
+        self.ff_enabled = ff_enabled
+        self.ff_intensity = ff_intensity
+        self.realtime = realtime
+        self.cpus = cpus
+        self.lock_memory = lock_memory
+        self.diagnostics = False
+        self.process = None
+        self.client = None
+        self.ring = None
+        self.deadzone = 0
         self.running = False
+        self.socket_path = default_socket_path()
+        # Settings not sent yet, merged so slider drags send only the latest.
+        self._pending = {}
+        self._stats_wanted = False
+        self._stop_wanted = False
+        self._cond = threading.Condition()
+        self.last_error = ""
+
+    def _command(self):
+        profiles = self.profiles or ProfileStore()
+        command = [
+            sys.executable, "-u", DAEMON_PATH,
+            "--control", self.socket_path,
+            "--exit-with-stdin",
+            "--no-wait",
+            "--profile", os.path.abspath(profiles.default_path),
+            "--profiles-dir", os.path.abspath(profiles.directory),
+            "--stick-sensitivity", str(self.stick_sensitivity),
+            "--mouse-sensitivity", str(self.mouse_sensitivity),
+            "--rumble-intensity", str(self.ff_intensity),
+        ]
+        if self.device_path:
+            command += ["--device", self.device_path]
+        if self.all_controllers:
+            # The selected pad's VID/PID would restrict the session to that
+            # model; every supported controller is driven instead.
+            command.append("--all-controllers")
+        elif self.vid and self.pid:
+            command += ["--vid", self.vid, "--pid", self.pid]
+        if self.use_mouse_mode:
+            command.append("--mouse-mode")
+        if self.measure_latency:
+            command.append("--latency-stats")
+        if not self.ff_enabled:
+            command.append("--no-rumble")
+        if self.realtime:
+            command += ["--realtime", "fifo"]
+        if self.cpus:
+            command += ["--cpus", self.cpus]
+        if self.lock_memory:
+            command.append("--lock-memory")
+        return command
 
     def run(self):
         try:
-            device = None
-            if self.device_path:
-                try:
-                    device = InputDevice(self.device_path)
-                except Exception:
-                    device = None
-
-            if not device:
-                detector = DeviceDetector(vid=self.vid, pid=self.pid)
-                device = detector.find()
-
-            if not device:
+            self.process = subprocess.Popen(
+                self._command(),
+                stdin=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=ROOT_DIR,
+            )
+            # Drained continuously so a chatty stderr can never block the
+            # daemon; the last line is its fatal error, if any.
+            errors = threading.Thread(target=self._read_errors, daemon=True)
+            errors.start()
+            try:
+                self.client = ControlClient(self.socket_path).connect(
+                    wait=5.0, alive=lambda: self.process.poll() is None
+                )
+            except OSError:
+                self.client = None
+
+            if self.client:
+                self.running = True
+                self.status_signal.emit("Running")
+                if self.diagnostics:
+                    self.set_diagnostics(True)
+                self._serve()
+
+            code = self.process.wait()
+            errors.join(timeout=1.0)
+            if code == EXIT_NO_CONTROLLER:
                 self.status_signal.emit("Device Not Found")
-                return
-
-            self.status_signal.emit("Running")
-
-            virtual = VirtualGamepad()
-            self.processor = InputProcessor(device, virtual)
-            self.processor.set_mouse_mode(self.use_mouse_mode)
-            self.processor.set_stick_sensitivity(self.stick_sensitivity)
-            self.processor.set_mouse_sensitivity(self.mouse_sensitivity)
-
-            self.running = True
-            self.processor.start()
+            elif code not in (0, -signal.SIGTERM):
+                message = self.last_error.removeprefix("[!] ")
+                self.status_signal.emit(
+                    f"Error: {message or f'controller process exited ({code})'}"
+                )
         except Exception as e:
             self.status_signal.emit(f"Error: {e}")
+        finally:
+            self.running = False
+            self._close()
+
+    def _read_errors(self):
+        for line in self.process.stderr:
+            line = line.decode(errors="replace").rstrip()
+            print(line, file=sys.stderr)
+            if line:
+                self.last_error = line
+
+    def _close(self):
+        client, self.client = self.client, None
+        if client:
+            client.close()
+        # The Diagnostics timer may still be reading it on the GUI thread;
+        # the mapping goes away with the last reference.
+        self.ring = None
+
+    def _serve(self):
+        # Sends queued settings / stats requests until the daemon exits.
+        process = self.process
+        while process.poll() is None:
+            with self._cond:
+                if not (self._pending or self._stats_wanted or self._stop_wanted):
+                    self._cond.wait(self.POLL_INTERVAL)
+                settings, self._pending = self._pending, {}
+                stats, self._stats_wanted = self._stats_wanted, False
+                stop = self._stop_wanted
+            if stop:
+                if self._request("stop") is None:
+                    process.terminate()
+                return
+            if settings:
+                reply = self._request("set", **settings)
+                if "diagnostics" in settings:
+                    self._open_ring(reply)
+            if stats:
+                reply = self._request("stats")
+                if reply:
+                    self.stats_signal.emit(reply)
+
+    def _request(self, cmd, **args):
+        client = self.client
+        if client is None:
+            return None
+        try:
+            return client.request(cmd, **args)
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"[!] Control request {cmd} failed: {e}")
+            return None
+
+    def _post(self, **settings):
+        with self._cond:
+            self._pending.update(settings)
+            self._cond.notify()
 
     def set_mouse_mode(self, enabled):
         self.use_mouse_mode = enabled
-        if self.processor:
-            self.processor.set_mouse_mode(enabled)
+        self._post(mouse_mode=enabled)
 
     def set_sensitivity(self, percent):
         self.stick_sensitivity = percent
-        if self.processor:
-            self.processor.set_stick_sensitivity(percent)
+        self._post(stick_sensitivity=percent)
 
     def set_mouse_sensitivity(self, percent):
         self.mouse_sensitivity = percent
-        if self.processor:
-            self.processor.set_mouse_sensitivity(percent)
+        self._post(mouse_sensitivity=percent)
+
+    def set_ff_enabled(self, enabled):
+        self.ff_enabled = enabled
+        self._post(rumble=enabled)
+
+    def set_ff_intensity(self, percent):
+        self.ff_intensity = percent
+        self._post(rumble_intensity=percent)
+
+    def set_latency_stats(self, enabled):
+        self.measure_latency = enabled
+        self._post(latency_stats=enabled)
+
+    def set_diagnostics(self, enabled):
+        # Live input frames for the Diagnostics tab, read from the daemon's
+        # shared-memory ring (selected controller).
+        self.diagnostics = enabled
+        self._post(diagnostics=enabled)
+
+    def _open_ring(self, reply):
+        self.ring = None
+        if reply and reply.get("ring"):
+            try:
+                self.ring = FrameRing.open_file(reply["ring"])
+            except (OSError, ValueError):
+                self.ring = None
+            self.deadzone = reply.get("deadzone", 0)
+
+    def frame_ring(self):
+        return self.ring, self.deadzone
+
+    def request_stats(self):
+        with self._cond:
+            self._stats_wanted = True
+            self._cond.notify()
 
     def stop(self):
-        if self.processor:
-            self.processor.stop()
+        process = self.process
+        if process and process.poll() is None:
+            if self.client is None:
+                process.terminate()
+            with self._cond:
+                self._stop_wanted = True
+                self._cond.notify()
+            try:
+                process.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                process.kill()
         self.wait()
 
 
@@ -112,7 +319,17 @@ class LJGM(QMainWindow):
         self.apply_dark_theme()
 
         self.thread = None
-        self.vibration = VibrationManager()
+        self.profiles = ProfileStore()
+
+        self.device_signals = DeviceSignals()
+        self.device_signals.changed.connect(self.on_devices_changed)
+        self.registry = DeviceRegistry()
+        self.registry.add_listener(
+            lambda event, record: self.device_signals.changed.emit(event, record.path)
+        )
+        self.registry.start()
+
+        self.vibration = VibrationManager(registry=self.registry)
         # Default empty VID/PID (not hardcoded)
         self.current_vid = ""
         self.current_pid = ""
@@ -124,14 +341,21 @@ class LJGM(QMainWindow):
         self.setCentralWidget(self.tabs)
 
         self.dashboard = self.dashboard_tab()
-        self.assign_tab = MappingWizard()
+        self.assign_tab = MappingWizard(
+            profile_store=self.profiles, registry=self.registry
+        )
         self.vibration_tab_widget = self.vibration_tab()
         self.advanced_tab_widget = self.advanced_tab()
+        self.diagnostics_tab = DiagnosticsTab(
+            self.diagnostics_ring, on_active=self.on_diagnostics_active
+        )
 
         self.tabs.addTab(self.dashboard, "Dashboard")
         self.tabs.addTab(self.assign_tab, "Assign")
         self.tabs.addTab(self.vibration_tab_widget, "Vibration")
         self.tabs.addTab(self.advanced_tab_widget, "Advanced")
+        self.tabs.addTab(self.diagnostics_tab, "Diagnostics")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
         self.refresh_device_info()
         self.update_service_controls(False)
@@ -186,11 +410,22 @@ class LJGM(QMainWindow):
         self.mouse_guide.setWordWrap(True)
         self.mouse_guide.hide()
 
+        # Live input latency (kernel event timestamp -> uinput frame)
+        self.latency_checkbox = QCheckBox("Measure Input Latency")
+        self.latency_checkbox.stateChanged.connect(self.on_latency_mode_changed)
+        self.latency_label = QLabel()
+        self.latency_label.hide()
+        self.latency_timer = QTimer()
+        self.latency_timer.timeout.connect(self.refresh_latency)
+
         # Explicit controller selector when multiple gamepads are connected
         self.controller_select = QComboBox()
         self.controller_select.currentIndexChanged.connect(self.on_controller_selected)
         self.refresh_controllers_btn = QPushButton("Refresh Controllers")
         self.refresh_controllers_btn.clicked.connect(self.refresh_device_info)
+        self.all_controllers_checkbox = QCheckBox(
+            "Drive all detected controllers (one virtual pad per player)"
+        )
 
         layout.addWidget(self.device_label)
         layout.addWidget(self.status_label)
@@ -200,6 +435,7 @@ class LJGM(QMainWindow):
         layout.addWidget(QLabel("Controller List"))
         layout.addWidget(self.controller_select)
         layout.addWidget(self.refresh_controllers_btn)
+        layout.addWidget(self.all_controllers_checkbox)
 
         layout.addWidget(QLabel("Stick Sensitivity"))
         layout.addWidget(self.sensitivity_slider)
@@ -208,6 +444,8 @@ class LJGM(QMainWindow):
         layout.addWidget(self.mouse_sensitivity_label)
         layout.addWidget(self.mouse_sensitivity_slider)
         layout.addWidget(self.mouse_guide)
+        layout.addWidget(self.latency_checkbox)
+        layout.addWidget(self.latency_label)
 
         layout.addStretch()
         widget.setLayout(layout)
@@ -250,7 +488,7 @@ class LJGM(QMainWindow):
                 color: #6e7782;
                 border: 1px solid #2a313a;
             }
-            QLineEdit, QTextEdit, QComboBox {
+            QLineEdit, QTextEdit, QComboBox, QListWidget {
                 background-color: #0f1318;
                 border: 1px solid #303844;
                 border-radius: 6px;
@@ -274,6 +512,11 @@ class LJGM(QMainWindow):
         self.stop_btn.setEnabled(running)
         self.controller_select.setEnabled(not running and bool(self.available_devices))
         self.refresh_controllers_btn.setEnabled(not running)
+        self.all_controllers_checkbox.setEnabled(not running)
+        # Scheduling options are applied when the service starts.
+        self.realtime_checkbox.setEnabled(not running)
+        self.cpus_input.setEnabled(not running)
+        self.lock_memory_checkbox.setEnabled(not running)
 
         self.sensitivity_slider.setEnabled(running)
         self.apply_sensitivity_btn.setEnabled(running)
@@ -297,6 +540,12 @@ class LJGM(QMainWindow):
         if self.thread and self.thread.isRunning():
             return
 
+        try:
+            parse_cpus(self.cpus_input.text().strip())
+        except ValueError as e:
+            self.update_status(f"Error: {e}")
+            return
+
         self.thread = ControllerThread(
             device_path=self.selected_device.path,
             vid=format(self.selected_device.info.vendor, "04x"),
@@ -304,15 +553,30 @@ class LJGM(QMainWindow):
             use_mouse_mode=self.mouse_checkbox.isChecked(),
             stick_sensitivity=self.sensitivity_slider.value(),
             mouse_sensitivity=self.mouse_sensitivity_slider.value(),
+            all_controllers=self.all_controllers_checkbox.isChecked(),
+            measure_latency=self.latency_checkbox.isChecked(),
+            profiles=self.profiles,
+            registry=self.registry,
+            ff_enabled=self.enable_vibration.isChecked(),
+            ff_intensity=self.intensity_slider.value(),
+            realtime=self.realtime_checkbox.isChecked(),
+            cpus=self.cpus_input.text().strip(),
+            lock_memory=self.lock_memory_checkbox.isChecked(),
         )
+        self.thread.diagnostics = self.diagnostics_tab.isVisible()
 
         self.thread.status_signal.connect(self.update_status)
+        self.thread.stats_signal.connect(self.on_stats)
         self.thread.start()
         self.update_service_controls(True)
         if self.mouse_checkbox.isChecked():
             self.update_mouse_guide()
+        if self.latency_checkbox.isChecked():
+            self.latency_timer.start(500)
+
     def stop_service(self):
 
+        self.latency_timer.stop()
         if self.thread:
             self.thread.stop()
             self.thread = None
@@ -337,6 +601,47 @@ class LJGM(QMainWindow):
         if self.thread and self.thread.isRunning():
             self.thread.set_mouse_sensitivity(value)
 
+    def on_latency_mode_changed(self, state):
+        enabled = state == 2
+        self.latency_label.setVisible(enabled)
+        running = self.thread and self.thread.isRunning()
+        if running:
+            self.thread.set_latency_stats(enabled)
+        if enabled and running:
+            self.latency_label.setText("Latency: collecting...")
+            self.latency_timer.start(500)
+        else:
+            self.latency_timer.stop()
+
+    def diagnostics_ring(self):
+        if self.thread:
+            return self.thread.frame_ring()
+        return None, 0
+
+    def on_diagnostics_active(self, active):
+        if self.thread:
+            self.thread.set_diagnostics(active)
+
+    def refresh_latency(self):
+        if not self.thread:
+            return
+        # Answered on the controller thread, rendered by on_stats().
+        self.thread.request_stats()
+
+    def on_stats(self, stats):
+        if stats.get("latency") is None:
+            return
+        text = "Latency\n" + LatencyStats.format(stats["latency"])
+        realtime = stats.get("realtime")
+        if realtime:
+            text += "\nScheduling: " + RealtimeConfig.describe(realtime)
+            if realtime["errors"]:
+                text += " (partly refused: " + "; ".join(realtime["errors"]) + ")"
+        switches = stats.get("switches")
+        if switches:
+            text += f"\nPreemptions: {switches['involuntary']}"
+        self.latency_label.setText(text)
+
     def update_status(self, status):
     
         if status == "Running":
@@ -355,7 +660,10 @@ class LJGM(QMainWindow):
             self.status_label.setText(f"Status: 🔴 Not Running (Stick Sensitivity {value}%)")
 
     def _binding_for_virtual(self, virtual_name):
-        data = Mapper().data
+        if self.selected_device:
+            data = self.profiles.mapper_for(self.selected_device).data
+        else:
+            data = self.profiles.default_mapper().data
         analog = data.get("analog", {}).get("buttons", {})
         digital = data.get("digital", {}).get("buttons", {})
 
@@ -386,18 +694,33 @@ class LJGM(QMainWindow):
         self.mouse_guide.setText("\n".join(guide_lines))
 
     def refresh_device_info(self):
+        # Cheap resync: only nodes the registry has not seen are probed.
+        self.registry.scan()
+        self.refresh_controller_list()
+
+    def on_devices_changed(self, event, path):
+        if self.thread and self.thread.isRunning():
+            # Leave the running session's selection alone.
+            return
         self.refresh_controller_list()
 
+    def closeEvent(self, event):
+        if self.thread:
+            self.thread.stop()
+            self.thread = None
+        self.registry.stop()
+        self.usb_inventory.stop()
+        super().closeEvent(event)
+
     def refresh_controller_list(self):
         vid = self.vid_input.text().strip() if hasattr(self, "vid_input") else ""
         pid = self.pid_input.text().strip() if hasattr(self, "pid_input") else ""
         previous_path = self.selected_device.path if self.selected_device else None
 
-        detector = DeviceDetector(vid=vid or None, pid=pid or None)
-        devices = detector.list_supported()
+        devices = self.registry.supported(vid=vid or None, pid=pid or None)
         if not devices and (vid or pid):
             # Fall back to full auto-list when VID/PID filter gives no matches.
-            devices = DeviceDetector().list_supported()
+            devices = self.registry.supported()
 
         self.available_devices = devices
 
@@ -457,6 +780,7 @@ class LJGM(QMainWindow):
         self.tabs.setTabEnabled(2, True)
         self.assign_tab.set_controller_path(device.path)
         self.vibration.set_device_path(device.path)
+        self.preload_vibration()
         if self.mouse_checkbox.isChecked():
             self.update_mouse_guide()
 
@@ -471,9 +795,7 @@ class LJGM(QMainWindow):
 
         self.enable_vibration = QCheckBox("Enable Vibration")
         self.enable_vibration.setChecked(True)
-        self.enable_vibration.stateChanged.connect(
-            lambda s: self.vibration.set_enabled(s == 2)
-        )
+        self.enable_vibration.stateChanged.connect(self.on_vibration_enabled)
         motor_layout = QHBoxLayout()
         self.left_motor = QRadioButton("Left (Strong)")
         self.right_motor = QRadioButton("Right (Weak)")
@@ -485,9 +807,7 @@ class LJGM(QMainWindow):
         self.intensity_slider = QSlider(Qt.Orientation.Horizontal)
         self.intensity_slider.setRange(0, 100)
         self.intensity_slider.setValue(100)
-        self.intensity_slider.valueChanged.connect(
-            lambda v: self.vibration.set_intensity(v)
-        )
+        self.intensity_slider.valueChanged.connect(self.on_vibration_intensity)
 
         self.duration_slider = QSlider(Qt.Orientation.Horizontal)
         self.duration_slider.setRange(100, 5000)
@@ -496,6 +816,14 @@ class LJGM(QMainWindow):
             lambda v: self.vibration.set_duration(v)
         )
         
+        self.pattern_combo = QComboBox()
+        self.pattern_combo.addItems(list(VibrationManager.PATTERNS))
+        self.pattern_combo.currentTextChanged.connect(self.preload_vibration)
+        for button in (self.left_motor, self.right_motor, self.both_motor):
+            button.toggled.connect(
+                lambda checked: checked and self.preload_vibration()
+            )
+
         test_btn = QPushButton("Test Vibration")
         test_btn.clicked.connect(self.test_vibration)
         
@@ -506,20 +834,41 @@ class LJGM(QMainWindow):
         layout.addWidget(self.intensity_slider)
         layout.addWidget(QLabel("Duration (ms)"))
         layout.addWidget(self.duration_slider)
+        layout.addWidget(QLabel("Pattern"))
+        layout.addWidget(self.pattern_combo)
         layout.addWidget(test_btn)
         layout.addStretch()
 
         widget.setLayout(layout)
         return widget
-    def test_vibration(self):
+    def on_vibration_enabled(self, state):
+        enabled = state == 2
+        self.vibration.set_enabled(enabled)
+        if self.thread:
+            self.thread.set_ff_enabled(enabled)
+
+    def on_vibration_intensity(self, value):
+        self.vibration.set_intensity(value)
+        if self.thread:
+            self.thread.set_ff_intensity(value)
+
+    def selected_motor(self):
         if self.left_motor.isChecked():
-            motor = "left"
-        elif self.right_motor.isChecked():
-            motor = "right"
-        else:
-            motor = "both"
+            return "left"
+        if self.right_motor.isChecked():
+            return "right"
+        return "both"
+
+    def preload_vibration(self, *_):
+        # Upload the selected pattern now so "Test Vibration" starts at once.
+        self.vibration.preload(
+            self.pattern_combo.currentText(), self.selected_motor()
+        )
 
-        self.vibration.test(motor)
+    def test_vibration(self):
+        self.vibration.test(
+            self.selected_motor(), pattern=self.pattern_combo.currentText()
+        )
 
     # ======================
     # Advanced
@@ -542,33 +891,53 @@ class LJGM(QMainWindow):
         form.addRow("PID:", self.pid_input)
         form.addRow(apply_btn)
 
-        self.lsusb_output = QTextEdit()
-        self.lsusb_output.setReadOnly(True)
+        # Input loop scheduling; needs CAP_SYS_NICE / CAP_IPC_LOCK or the
+        # matching rlimits, otherwise the loop runs as a normal process.
+        self.realtime_checkbox = QCheckBox("Real-time priority (SCHED_FIFO)")
+        self.cpus_input = QLineEdit()
+        self.cpus_input.setPlaceholderText("all, or e.g. 2,3")
+        self.lock_memory_checkbox = QCheckBox("Lock memory (no page faults)")
+        form.addRow(self.realtime_checkbox)
+        form.addRow("Pin to CPUs:", self.cpus_input)
+        form.addRow(self.lock_memory_checkbox)
+
+        self.usb_list = QListWidget()
+        self.usb_list.setSortingEnabled(True)
+        # sysfs device name -> list item, so diffs touch only changed rows
+        self.usb_items = {}
 
         layout.addLayout(form)
         layout.addWidget(QLabel("Connected USB Devices"))
-        layout.addWidget(self.lsusb_output)
+        layout.addWidget(self.usb_list)
 
         widget.setLayout(layout)
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_lsusb)
-        self.timer.start(3000)
-
-        self.refresh_lsusb()
+        # Scanned in the background, and only while this tab is visible.
+        self.usb_signals = UsbSignals()
+        self.usb_signals.changed.connect(self.on_usb_changed)
+        self.usb_inventory = UsbInventory(self.usb_signals.changed.emit)
 
         return widget
 
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.advanced_tab_widget:
+            self.usb_inventory.start()
+        else:
+            self.usb_inventory.stop()
+
     def apply_vid_pid(self):
 
         self.refresh_device_info()
 
-    def refresh_lsusb(self):
-        try:
-            result = subprocess.check_output(["lsusb"]).decode()
-            self.lsusb_output.setText(result)
-        except Exception as e:
-            self.lsusb_output.setText(str(e))
+    def on_usb_changed(self, added, removed):
+        for device in removed:
+            item = self.usb_items.pop(device.key, None)
+            if item is not None:
+                self.usb_list.takeItem(self.usb_list.row(item))
+        for device in added:
+            item = QListWidgetItem(device.line())
+            self.usb_items[device.key] = item
+            self.usb_list.addItem(item)
 
 
 def run_app():
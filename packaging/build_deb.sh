@@ -15,6 +15,8 @@ mkdir -p \
   "${PKG_ROOT}/DEBIAN" \
   "${PKG_ROOT}/opt/${APP_NAME}" \
   "${PKG_ROOT}/usr/bin" \
+  "${PKG_ROOT}/lib/systemd/system" \
+  "${PKG_ROOT}/etc/ljgm" \
   "${PKG_ROOT}/usr/share/applications" \
   "${PKG_ROOT}/usr/share/icons/hicolor/256x256/apps" \
   "${PKG_ROOT}/usr/share/doc/${PKG_NAME}"
@@ -30,18 +32,31 @@ Depends: python3 (>= 3.10), python3-pyqt6, python3-evdev, python3-uinput
 Description: Linux Joypad Generic Manager
  GUI tool to map physical gamepads to virtual devices,
  with optional mouse mode and vibration testing.
+ Includes ljgm-daemon, a headless service that needs no Qt.
 CONTROL
 
+cat > "${PKG_ROOT}/DEBIAN/conffiles" <<'CONFFILES'
+/etc/ljgm/daemon.json
+CONFFILES
+
 cat > "${PKG_ROOT}/DEBIAN/postinst" <<'POSTINST'
 #!/usr/bin/env bash
 set -e
 modprobe uinput || true
 echo "uinput" > /etc/modules-load.d/ljgm.conf
+# The daemon is installed but not enabled; kiosks opt in with
+#   systemctl enable --now ljgm-daemon
+if [ -d /run/systemd/system ]; then
+    systemctl daemon-reload || true
+fi
 POSTINST
 
 cat > "${PKG_ROOT}/DEBIAN/prerm" <<'PRERM'
 #!/usr/bin/env bash
 set -e
+if [ -d /run/systemd/system ]; then
+    systemctl stop ljgm-daemon.service || true
+fi
 if [ -f /etc/modules-load.d/ljgm.conf ]; then
     rm -f /etc/modules-load.d/ljgm.conf
 fi
@@ -64,6 +79,15 @@ exec /usr/bin/python3 /opt/ljgm/gui_app.py "$@"
 BIN
 chmod 0755 "${PKG_ROOT}/usr/bin/${APP_NAME}"
 
+cat > "${PKG_ROOT}/usr/bin/${APP_NAME}-daemon" <<'BIN'
+#!/usr/bin/env bash
+exec /usr/bin/python3 /opt/ljgm/daemon.py "$@"
+BIN
+chmod 0755 "${PKG_ROOT}/usr/bin/${APP_NAME}-daemon"
+
+install -m 0644 "${ROOT_DIR}/packaging/ljgm-daemon.service" "${PKG_ROOT}/lib/systemd/system/ljgm-daemon.service"
+install -m 0644 "${ROOT_DIR}/packaging/daemon.json" "${PKG_ROOT}/etc/ljgm/daemon.json"
+
 install -m 0644 "${ROOT_DIR}/packaging/ljgm.desktop" "${PKG_ROOT}/usr/share/applications/ljgm.desktop"
 install -m 0644 "${ROOT_DIR}/assets/joystick.png" "${PKG_ROOT}/usr/share/icons/hicolor/256x256/apps/ljgm.png"
 install -m 0644 "${ROOT_DIR}/README.md" "${PKG_ROOT}/usr/share/doc/${PKG_NAME}/README.md"
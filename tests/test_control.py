@@ -0,0 +1,186 @@
+import json
+import os
+import select
+import socket
+import threading
+import time
+
+import pytest
+
+from core.control import ControlClient, ControlServer
+
+
+class Loop:
+
+    # Just enough of ControllerService's handler API to serve the socket.
+
+    def __init__(self):
+        self.poller = select.epoll()
+        self.handlers = {}
+        self.running = True
+        self._r, self._w = os.pipe()
+        self.poller.register(self._r, select.EPOLLIN)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def add_handler(self, fd, handler, events=select.EPOLLIN):
+        self.handlers[fd] = handler
+        self.poller.register(fd, events)
+
+    def modify_handler(self, fd, events):
+        self.poller.modify(fd, events)
+
+    def remove_handler(self, fd):
+        if self.handlers.pop(fd, None) is not None:
+            self.poller.unregister(fd)
+
+    def run(self):
+        while self.running:
+            for fd, mask in self.poller.poll():
+                handler = self.handlers.get(fd)
+                if handler:
+                    handler(mask)
+
+    def stop(self):
+        self.running = False
+        os.write(self._w, b"\0")
+        self.thread.join(2)
+
+    def close(self):
+        self.poller.close()
+        os.close(self._r)
+        os.close(self._w)
+
+
+def serve(path):
+    # Like the daemon: the server is closed only once its loop has stopped.
+    loop = Loop()
+    control = ControlServer(path, HANDLERS)
+    control.attach(loop)
+    loop.thread.start()
+    return loop, control
+
+
+def shut_down(loop, control):
+    loop.stop()
+    control.close()
+    loop.close()
+
+
+def slow(request):
+    time.sleep(request.get("delay", 0.3))
+    return {"slow": True}
+
+
+def fail(request):
+    raise ValueError("bad value")
+
+
+HANDLERS = {
+    "echo": lambda request: {"echo": request.get("value")},
+    "slow": slow,
+    "fail": fail,
+}
+
+
+@pytest.fixture
+def server(tmp_path):
+    loop, control = serve(str(tmp_path / "control.sock"))
+    yield control
+    shut_down(loop, control)
+
+
+def test_request_reply(server):
+    client = ControlClient(server.path).connect()
+    assert client.request("echo", value=3) == {"echo": 3, "ok": True}
+    assert client.request("echo", value=[1, "a"])["echo"] == [1, "a"]
+    client.close()
+
+
+def test_error_replies(server):
+    client = ControlClient(server.path).connect()
+    with pytest.raises(RuntimeError, match="unknown command: 'nope'"):
+        client.request("nope")
+    with pytest.raises(RuntimeError, match="bad value"):
+        client.request("fail")
+    # The connection survives error replies.
+    assert client.request("echo", value=1)["echo"] == 1
+    client.close()
+
+
+def test_dispatch_rejects_bad_lines():
+    dispatch = ControlServer.dispatch
+    fake = type("Fake", (), {"handlers": HANDLERS})()
+    assert dispatch(fake, b"{not json")["ok"] is False
+    assert "JSON object" in dispatch(fake, b"[1, 2]")["error"]
+    assert dispatch(fake, b'{"cmd": "echo", "value": 5}') == {"echo": 5, "ok": True}
+
+
+def _read_lines(sock, count):
+    data = b""
+    while data.count(b"\n") < count:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def test_framing_over_partial_and_batched_writes(server):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(2)
+    sock.connect(server.path)
+    # Two requests in one write, then one split across writes, plus blank
+    # lines that must be ignored.
+    sock.sendall(b'{"cmd": "echo", "value": 1}\n\n{"cmd": "echo", "value": 2}\n{"cmd": "ec')
+    time.sleep(0.05)
+    sock.sendall(b'ho", "value": 3}\n')
+    assert [reply["echo"] for reply in _read_lines(sock, 3)] == [1, 2, 3]
+    sock.close()
+
+
+def test_oversized_line_drops_connection(server):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(2)
+    sock.connect(server.path)
+    try:
+        sock.sendall(b"x" * (ControlServer.MAX_LINE + 4096))
+    except OSError:
+        pass
+    assert sock.recv(4096) == b""
+    sock.close()
+
+
+def test_late_reply_is_not_read_as_the_next_answer(server):
+    client = ControlClient(server.path, timeout=0.1).connect()
+    with pytest.raises(OSError):
+        client.request("slow", delay=0.3)
+    assert client.sock is None
+    time.sleep(0.3)
+    # Reconnects on its own and gets its own reply.
+    assert client.request("echo", value="after") == {"echo": "after", "ok": True}
+    client.close()
+
+
+def test_reconnect_after_server_restart(tmp_path):
+    path = str(tmp_path / "control.sock")
+    loop, control = serve(path)
+    client = ControlClient(path).connect()
+    assert client.request("echo", value=1)["echo"] == 1
+
+    shut_down(loop, control)
+    with pytest.raises(OSError):
+        client.request("echo", value=2)
+
+    loop, control = serve(path)
+    assert client.request("echo", value=3)["echo"] == 3
+    client.close()
+    shut_down(loop, control)
+
+
+def test_connect_waits_for_the_server(tmp_path):
+    path = str(tmp_path / "late.sock")
+    client = ControlClient(path)
+    with pytest.raises(OSError):
+        client.connect(wait=0.05)
+    with pytest.raises(OSError):
+        client.connect(wait=5, alive=lambda: False)
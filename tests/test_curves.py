@@ -0,0 +1,92 @@
+import pytest
+
+pytest.importorskip("evdev")
+
+from core.curves import AXIS_MAX, AxisCurve, validate_axes
+
+
+@pytest.mark.parametrize("axes, message", [
+    ({"ABS_RY2": {}}, "unknown axis"),
+    ({"X": {}}, "keys must be"),
+    ({"ABS_X": []}, "must be an object"),
+    ({"ABS_X": {"speed": 1}}, "unknown keys: speed"),
+    ({"ABS_X": {"curve": "cubic"}}, "curve"),
+    ({"ABS_X": {"expo": 1.5}}, "expo"),
+    ({"ABS_X": {"sensitivity": 5}}, "sensitivity"),
+    ({"ABS_X": {"deadzone": -1}}, "deadzone"),
+    ({"ABS_X": {"deadzone": True}}, "deadzone"),
+    ({"ABS_X": {"deadzone": 20000, "outer_deadzone": 12767}}, "no travel"),
+    ({"ABS_X": {"points": [[0.5, 0.5]]}}, "needs"),
+    ({"ABS_X": {"curve": "points", "points": []}}, "points"),
+    ({"ABS_X": {"curve": "points", "points": [[0.5, 0.2], [0.4, 0.6]]}}, "increase"),
+    ({"ABS_X": {"curve": "points", "points": [[0.5, 1.2]]}}, "0-1"),
+])
+def test_validate_axes_rejects(axes, message):
+    with pytest.raises(ValueError, match=message):
+        validate_axes(axes)
+
+
+def test_validate_axes_accepts():
+    axes = {
+        "ABS_X": {"curve": "expo", "expo": 0.4, "outer_deadzone": 1500},
+        "ABS_RZ": {"anti_deadzone": 3000, "sensitivity": 120},
+        "2": {"curve": "points", "points": [[0.3, 0.1], [0.7, 0.6]]},
+        "ABS_Y": {"deadzone": 20000, "outer_deadzone": 12766},
+    }
+    assert validate_axes(axes) is axes
+
+
+@pytest.mark.parametrize("spec", [
+    {},
+    {"curve": "expo", "expo": 0.6},
+    {"curve": "s-curve", "strength": 0.7},
+    {"anti_deadzone": 4000, "outer_deadzone": 2000},
+])
+def test_apply_is_symmetric(spec):
+    curve = AxisCurve(spec)
+    for value in range(0, 32768, 97):
+        assert curve.apply(-value, 4000, 1.0) == -curve.apply(value, 4000, 1.0)
+
+
+def test_apply_deadzone():
+    curve = AxisCurve({})
+    assert curve.apply(3999, 4000, 1.0) == 0
+    assert curve.apply(4000, 4000, 1.0) == 0
+    assert curve.apply(4100, 4000, 1.0) > 0
+    # A per-axis deadzone overrides the processor's.
+    assert AxisCurve({"deadzone": 0}).apply(100, 4000, 1.0) == 100
+
+
+def test_apply_saturates_at_outer_deadzone():
+    curve = AxisCurve({"deadzone": 0, "outer_deadzone": 2767})
+    assert curve.apply(30000, 0, 1.0) == 32767
+    assert curve.apply(32767, 0, 1.0) == 32767
+    assert curve.apply(-30000, 0, 1.0) == -32767
+    assert curve.apply(15000, 0, 1.0) == 16384
+
+
+def test_apply_anti_deadzone_offset():
+    curve = AxisCurve({"deadzone": 0, "anti_deadzone": 8000})
+    assert curve.apply(0, 0, 1.0) == 0
+    # The first step out of the deadzone jumps to the anti-deadzone.
+    assert 8000 <= curve.apply(1, 0, 1.0) <= 8001
+    assert curve.apply(32767, 0, 1.0) == 32767
+    # The rest of the travel is compressed into anti_deadzone..max.
+    assert curve.apply(16384, 0, 1.0) == round(8000 + (AXIS_MAX - 8000) * 16384 / AXIS_MAX)
+
+
+def test_apply_points_interpolation():
+    curve = AxisCurve({"deadzone": 0, "curve": "points", "points": [[0.5, 0.2]]})
+    # End points are added, so the curve runs (0,0) -> (0.5,0.2) -> (1,1).
+    assert curve.points == [(0.0, 0.0), (0.5, 0.2), (1.0, 1.0)]
+    assert curve.shape(0.25) == pytest.approx(0.1)
+    assert curve.shape(0.5) == pytest.approx(0.2)
+    assert curve.shape(0.75) == pytest.approx(0.6)
+    assert curve.apply(32767, 0, 1.0) == 32767
+
+
+def test_apply_sensitivity_clamps():
+    curve = AxisCurve({"deadzone": 0, "sensitivity": 200})
+    assert curve.apply(8192, 0, 1.0) == 16384
+    assert curve.apply(8192, 0, 1.5) == 24576
+    assert curve.apply(-32768, 0, 1.0) == -32768
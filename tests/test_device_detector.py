@@ -0,0 +1,104 @@
+import os
+import random
+import shutil
+
+import pytest
+
+pytest.importorskip("evdev")
+
+from evdev import ecodes
+
+from benchmarks.bench_scan import GAMEPAD, KEYBOARD, MOUSE, bitmap, build_tree, write_node
+from core.device_detector import DeviceDetector, _WORD_BITS, parse_bitmap
+
+
+@pytest.mark.parametrize("text, codes", [
+    ("0", set()),
+    ("", set()),
+    ("1", {0}),
+    ("5", {0, 2}),
+    ("1 0", {_WORD_BITS}),
+    ("8000000000000000 1" if _WORD_BITS == 64 else "80000000 1", {0, _WORD_BITS * 2 - 1}),
+    ("3 0 0\n", {_WORD_BITS * 2, _WORD_BITS * 2 + 1}),
+])
+def test_parse_bitmap(text, codes):
+    assert parse_bitmap(text) == codes
+
+
+def test_parse_bitmap_round_trip():
+    rng = random.Random(7)
+    for _ in range(50):
+        codes = set(rng.sample(range(0x300), rng.randint(1, 40)))
+        assert parse_bitmap(bitmap(codes)) == codes
+
+
+def test_parse_bitmap_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_bitmap("zz")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    sysfs = tmp_path / "sys"
+    dev_dir = tmp_path / "dev"
+    sysfs.mkdir()
+    dev_dir.mkdir()
+    write_node(str(sysfs), str(dev_dir), 0, KEYBOARD, "Keyboard")
+    write_node(str(sysfs), str(dev_dir), 1, MOUSE, "Mouse")
+    write_node(str(sysfs), str(dev_dir), 2, GAMEPAD, "Pad")
+    return DeviceDetector(sysfs_root=str(sysfs), input_dir=str(dev_dir)), sysfs, dev_dir
+
+
+def test_read_node_scores_only_gamepads(tree):
+    detector, _, dev_dir = tree
+    keyboard = detector.read_node("event0")
+    mouse = detector.read_node("event1")
+    pad = detector.read_node("event2")
+    assert keyboard.score == 0 and mouse.score == 0
+    # Named gamepad keys, plus every button in the joystick range, plus
+    # the gamepad axes.
+    named = len(GAMEPAD["key"] & DeviceDetector.GAMEPAD_KEYS)
+    assert pad.score == named + len(GAMEPAD["key"]) + len(GAMEPAD["abs"])
+    assert pad.ff and not keyboard.ff
+    assert pad.name == "Pad"
+    assert pad.path == os.path.join(str(dev_dir), "event2")
+    assert (pad.vid, pad.pid) == ("045e", "0b14")
+    assert pad.phys == "usb-bench/input2"
+
+
+def test_read_node_missing_or_malformed(tree):
+    detector, sysfs, _ = tree
+    assert detector.read_node("event9") is None
+    with open(sysfs / "event2" / "device" / "capabilities" / "key", "w") as f:
+        f.write("not-hex\n")
+    assert detector.read_node("event2") is None
+
+
+def test_probe_uses_sysfs(tree):
+    detector, _, dev_dir = tree
+    record = detector.probe(os.path.join(str(dev_dir), "event2"))
+    assert record.score > 0
+
+
+def test_score_codes():
+    detector = DeviceDetector()
+    axes = {ecodes.ABS_X, ecodes.ABS_Y}
+    assert detector._score_codes({ecodes.BTN_A}, set()) == 0
+    assert detector._score_codes(set(), axes) == 0
+    # Keys outside the gamepad sets (a keyboard with an odd axis).
+    assert detector._score_codes({ecodes.KEY_A}, axes) == 0
+    # BTN_TRIGGER is generic joystick range only; BTN_A counts twice
+    # (named gamepad key and joystick range).
+    assert detector._score_codes({ecodes.BTN_TRIGGER}, axes) == 3
+    assert detector._score_codes({ecodes.BTN_A}, axes) == 4
+
+
+def test_scan_fake_tree():
+    root, sysfs, dev_dir = build_tree(20, 3)
+    try:
+        records = DeviceDetector(sysfs_root=sysfs, input_dir=dev_dir).scan()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    assert len(records) == 20
+    assert sum(1 for r in records if r.score > 0) == 3
+    assert [r.path for r in records] == sorted(r.path for r in records)
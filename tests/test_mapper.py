@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("evdev")
+
+from core.mapper import Mapper
+
+
+PROFILE = {
+    "analog": {
+        "buttons": {
+            "288": "BTN_Y",
+            "289": "BTN_B",
+            "17:-1": "BTN_DPAD_UP",
+            # A plain code mapping wins over its directional ones.
+            "16": "BTN_SELECT",
+            "16:1": "BTN_DPAD_RIGHT",
+        }
+    },
+    "digital": {
+        "buttons": {
+            "288": "BTN_X",
+            "290": "BTN_A",
+            "17:1": "BTN_DPAD_DOWN",
+            "17:-1": "BTN_DPAD_LEFT",
+            "16:-1": "BTN_DPAD_LEFT",
+            "bogus": "BTN_START",
+        }
+    },
+}
+
+
+def make_mapper(data):
+    mapper = Mapper("unused.json", autoload=False)
+    mapper.data = data
+    return mapper
+
+
+@pytest.mark.parametrize("mode", ["analog", "digital", "unknown"])
+def test_compiled_profile_matches_translate(mode):
+    mapper = make_mapper(PROFILE)
+    profile = mapper.compile(mode)
+
+    for code in range(0, 400):
+        action = profile.keys.get(code)
+        assert (action.name if action else None) == mapper.translate(mode, code)
+
+    for code in profile.direction_axes:
+        for value in (-1, 0, 1):
+            action = profile.directions.get((code, value))
+            # A centred hat only releases; it was never translated.
+            expected = mapper.translate(mode, code, value) if value else None
+            assert (action.name if action else None) == expected
+
+
+def test_direction_axes_cover_both_modes():
+    profile = make_mapper(PROFILE).compile("analog")
+    assert profile.direction_axes == {16, 17}
+    # analog has no 17:1, so it falls back to the digital mapping.
+    assert profile.directions[(17, 1)].name == "BTN_DPAD_DOWN"
+    assert profile.directions[(17, -1)].name == "BTN_DPAD_UP"
+    assert profile.directions[(16, -1)].name == "BTN_SELECT"
+
+
+def test_actions_are_shared_and_resolved():
+    profile = make_mapper(PROFILE).compile("digital")
+    assert profile.keys[288].name == "BTN_X"
+    assert profile.keys[289].name == "BTN_B"
+    assert profile.directions[(17, -1)] is profile.directions[(16, -1)]
+    assert profile.directions[(17, -1)].dpad
+    assert not profile.keys[290].dpad
+    assert isinstance(profile.keys[290].code, int)
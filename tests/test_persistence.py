@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("evdev")
+
+from core.mapper import Mapper
+from core.persistence import ProfileWriter, atomic_write_json, backup_path
+
+
+def profile(button):
+    return {"analog": {"buttons": {"288": button}}, "digital": {"buttons": {}}}
+
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_atomic_write_keeps_last_good_backup(tmp_path):
+    path = str(tmp_path / "profile.json")
+    atomic_write_json(path, profile("BTN_A"))
+    assert read(path) == profile("BTN_A")
+    assert not os.path.exists(backup_path(path))
+
+    atomic_write_json(path, profile("BTN_B"))
+    assert read(path) == profile("BTN_B")
+    assert read(backup_path(path)) == profile("BTN_A")
+    # No temp files are left behind.
+    assert sorted(os.listdir(tmp_path)) == ["profile.json", "profile.json.bak"]
+
+
+def test_atomic_write_failure_leaves_file_untouched(tmp_path):
+    path = str(tmp_path / "profile.json")
+    atomic_write_json(path, profile("BTN_A"))
+    with pytest.raises(TypeError):
+        atomic_write_json(path, {"analog": {"buttons": {"288": object()}}})
+    assert read(path) == profile("BTN_A")
+    assert sorted(os.listdir(tmp_path)) == ["profile.json"]
+
+
+def test_invalid_file_is_not_kept_as_backup(tmp_path):
+    path = str(tmp_path / "profile.json")
+    with open(path, "w") as f:
+        f.write("{broken")
+    atomic_write_json(path, profile("BTN_A"))
+    assert not os.path.exists(backup_path(path))
+
+
+def test_writer_reports_unserialisable_data(tmp_path, capsys):
+    path = str(tmp_path / "profile.json")
+    writer = ProfileWriter(path)
+    writer.write_now({"analog": {"buttons": {"288": object()}}})
+    assert "Failed to save profile" in capsys.readouterr().out
+    assert writer.pending() is None
+    assert not os.path.exists(path)
+
+
+def test_writer_coalesces_scheduled_edits(tmp_path):
+    path = str(tmp_path / "profile.json")
+    writer = ProfileWriter(path)
+    writer.schedule(profile("BTN_A"))
+    writer.schedule(profile("BTN_B"))
+    assert writer.pending() == profile("BTN_B")
+    writer.flush()
+    assert read(path) == profile("BTN_B")
+    assert writer.pending() is None
+
+
+def test_mapper_falls_back_to_backup(tmp_path):
+    path = str(tmp_path / "profile.json")
+    atomic_write_json(path, profile("BTN_A"))
+    atomic_write_json(path, profile("BTN_B"))
+    with open(path, "w") as f:
+        f.write('{"analog": ')
+
+    mapper = Mapper(path)
+    assert mapper.data["analog"]["buttons"] == {"288": "BTN_A"}
+    # The broken file is set aside and the restored profile written back.
+    assert os.path.exists(path + ".corrupt")
+    assert read(path) == profile("BTN_A")
@@ -0,0 +1,99 @@
+import pytest
+
+pytest.importorskip("evdev")
+
+from evdev import AbsInfo, DeviceInfo, InputEvent, ecodes
+
+from core.recording import HEADER, SessionRecorder, SessionRecording, replay
+
+
+class Pad:
+
+    name = "Test Pad"
+    phys = "usb-test/input0"
+    uniq = "ABC123"
+    info = DeviceInfo(3, 0x0079, 0x0006, 0x0110)
+
+    def capabilities(self, verbose=False, absinfo=True):
+        return {
+            ecodes.EV_KEY: [288, 289, 290],
+            ecodes.EV_ABS: [
+                (ecodes.ABS_X, AbsInfo(128, 0, 255, 0, 15, 0)),
+                (ecodes.ABS_HAT0X, AbsInfo(0, -1, 1, 0, 0, 0)),
+            ],
+        }
+
+
+EVENTS = [
+    InputEvent(100, 10, ecodes.EV_KEY, 288, 1),
+    InputEvent(100, 10, ecodes.EV_SYN, ecodes.SYN_REPORT, 0),
+    InputEvent(100, 2010, ecodes.EV_ABS, ecodes.ABS_X, 255),
+    InputEvent(100, 2010, ecodes.EV_ABS, ecodes.ABS_HAT0X, -1),
+    InputEvent(100, 2010, ecodes.EV_SYN, ecodes.SYN_REPORT, 0),
+    InputEvent(100, 4010, ecodes.EV_KEY, 288, 0),
+]
+
+
+def event_tuples(events):
+    return [(e.sec, e.usec, e.type, e.code, e.value) for e in events]
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    path = str(tmp_path / "session.ljgmrec")
+    recorder = SessionRecorder(path, Pad())
+    for event in EVENTS:
+        recorder.write(event)
+    recorder.close()
+    assert recorder.count == len(EVENTS)
+    return path
+
+
+def test_round_trip(recorded):
+    recording = SessionRecording.load(recorded)
+    assert recording.name == "Test Pad"
+    assert recording.phys == "usb-test/input0"
+    assert recording.uniq == "ABC123"
+    assert tuple(recording.info) == (3, 0x0079, 0x0006, 0x0110)
+    assert recording.keys == [288, 289, 290]
+    assert recording.absinfo == Pad().capabilities()[ecodes.EV_ABS]
+    assert event_tuples(recording.events) == event_tuples(EVENTS)
+
+
+def test_frames_split_at_syn_report(recorded):
+    frames = list(SessionRecording.load(recorded).frames())
+    assert [len(frame) for frame in frames] == [2, 3, 1]
+
+
+def test_partial_trailing_event_is_dropped(recorded):
+    with open(recorded, "ab") as f:
+        f.write(b"\0" * 7)
+    assert len(SessionRecording.load(recorded).events) == len(EVENTS)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"hello")
+    with pytest.raises(ValueError, match="not an LJGM recording"):
+        SessionRecording.load(str(path))
+    path.write_bytes(b"X" * 64)
+    with pytest.raises(ValueError, match="not an LJGM recording"):
+        SessionRecording.load(str(path))
+
+
+def test_truncated_header_raises_value_error(recorded, tmp_path):
+    with open(recorded, "rb") as f:
+        data = f.read()
+    # Cut inside the strings, the key list and the absinfo table.
+    for size in (HEADER.size + 1, HEADER.size + 12, HEADER.size + 30, HEADER.size + 40, HEADER.size + 50):
+        path = tmp_path / f"cut{size}.ljgmrec"
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError, match="truncated"):
+            SessionRecording.load(str(path))
+
+
+def test_replay_feeds_every_event(recorded):
+    seen = []
+    sink = type("Sink", (), {"handle_event": lambda self, event: seen.append(event)})()
+    replay(SessionRecording.load(recorded), sink, realtime=False)
+    assert event_tuples(seen) == event_tuples(EVENTS)